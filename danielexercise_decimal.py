@@ -1,12 +1,22 @@
 # Infinite-precision decimal utilities
 # Exports:
-#   - Decimal
-#     - Decimal() -> Decimal
+#   - DEFAULT_PRECISION: int
+#   - Decimal (immutable)
+#     - Decimal(base: int = 0, order_of_magnitude: int = 0) -> Decimal
 #     - inherit_decimal_str(decimal_str: str) -> None
 #     - __add__(other: Decimal) -> Decimal
 #     - __radd__(other: Decimal) -> Decimal
 #     - __sub__(other: Decimal) -> Decimal
 #     - __mul__(other: Decimal) -> Decimal
+#     - divide(other: Decimal, precision: int = DEFAULT_PRECISION) -> Decimal
+#     - __truediv__(other: Decimal) -> Decimal
+#     - __floordiv__(other: Decimal) -> Decimal
+#     - __mod__(other: Decimal) -> Decimal
+#     - __divmod__(other: Decimal) -> (Decimal, Decimal)
+#     - reciprocal(precision: int = DEFAULT_PRECISION) -> Decimal
+#     - sqrt(precision: int = DEFAULT_PRECISION) -> Decimal
+#     - __hash__() -> int
+#     - __reduce__() -> (Callable, Tuple)
 #     - __lt__(other: Decimal) -> bool
 #     - __le__(other: Decimal) -> bool
 #     - __eq__(other: Decimal) -> bool
@@ -14,215 +24,946 @@
 #     - __ge__(other: Decimal) -> bool
 #     - __gt__(other: Decimal) -> bool
 #     - __repr__() -> str
-#   - decimal(toconvert: Any) -> Decimal
+#   - DecimalArray
+#     - DecimalArray(bases: Iterable[int] = (), order_of_magnitude: int = 0) -> DecimalArray
+#     - from_decimals(decimals: Iterable[Decimal]) -> DecimalArray
+#     - to_decimals() -> List[Decimal]
+#     - sum() -> Decimal
+#     - dot(other: DecimalArray) -> Decimal
+#     - scale(factor: Decimal) -> DecimalArray
+#     - __add__(other: DecimalArray) -> DecimalArray
+#     - __sub__(other: DecimalArray) -> DecimalArray
+#     - __mul__(other: DecimalArray) -> DecimalArray
+#     - lt/le/eq/ne/ge/gt(other: DecimalArray | Decimal) -> List[bool]
+#   - DecimalAccumulator
+#     - DecimalAccumulator() -> DecimalAccumulator
+#     - add(value: Decimal) -> None
+#     - update(values: Iterable[Decimal]) -> None
+#     - merge(other: DecimalAccumulator) -> None
+#     - result() -> Decimal
+#   - decimal_sum(values: Iterable[Decimal]) -> Decimal
+#   - decimal(toconvert: Any, exact_float: bool = False) -> Decimal
+#   - parse_decimals(decimal_strs: Iterable[str]) -> (List[Decimal | None], List[int])
+#   - DecimalContext (exact backend)
+#     - DecimalContext() -> DecimalContext
+#     - wrap(value: Decimal) -> Any
+#     - unwrap(value: Any) -> Decimal
+#     - add/sub/mul(x: Any, y: Any) -> Any
+#     - sum(values: Iterable[Any]) -> Any
+#   - BoundedDecimalContext(DecimalContext) (decimal module backend)
+#     - BoundedDecimalContext(precision: int = 28) -> BoundedDecimalContext
 #   - parse_decimal(prompt: str) -> Decimal
 
 from __future__ import annotations
+from array import array
+from decimal import Decimal as _StdlibDecimal
+import decimal as _stdlib_decimal
+from fractions import Fraction
+from math import isqrt
+from typing import Iterable, List, Optional, Union
+import operator
 
 
 #LIBRARY
+# Powers of ten below this order of magnitude are kept once computed
+_POWERS_OF_TEN_CACHE_LIMIT = 4096
+_powers_of_ten: List[int] = [1]
+
+# _squared_powers_of_ten[i] == 10**(2**i), kept up to 10**(2**20) which is about 400 KB
+_SQUARED_POWERS_OF_TEN_CACHE_LIMIT = 21
+_squared_powers_of_ten: List[int] = [10]
+
+
 def _order_of_magnitude_to_int(order_of_magnitude: int) -> int:
     """
     order_of_magnitude_to_int(order_of_magnitude: int) -> multiplier: int
 
     Returns 10 to the power of order_of_magnitude.
     """
-    if order_of_magnitude == 0:
-        return 1
-    elif order_of_magnitude < 0:
+    if order_of_magnitude < 0:
         raise ValueError
-    else:
-        result = 1
-        for _ in range(order_of_magnitude):
-            result *= 10
-        return result
+    if order_of_magnitude < len(_powers_of_ten):
+        return _powers_of_ten[order_of_magnitude]
+    if order_of_magnitude >= _POWERS_OF_TEN_CACHE_LIMIT:
+        return 10 ** order_of_magnitude
+    result = _powers_of_ten[-1]
+    for _ in range(order_of_magnitude - len(_powers_of_ten) + 1):
+        result *= 10
+        _powers_of_ten.append(result)
+    return result
+
+
+def _squared_power_of_ten(exponent: int) -> int:
+    """
+    _squared_power_of_ten(exponent: int) -> multiplier: int
+
+    Returns 10 to the power of 2 to the power of exponent.
+    """
+    if exponent < len(_squared_powers_of_ten):
+        return _squared_powers_of_ten[exponent]
+    if exponent >= _SQUARED_POWERS_OF_TEN_CACHE_LIMIT:
+        return 10 ** (1 << exponent)
+    result = _squared_powers_of_ten[-1]
+    for _ in range(exponent - len(_squared_powers_of_ten) + 1):
+        result *= result
+        _squared_powers_of_ten.append(result)
+    return result
+
+
+def _strip_trailing_zeros(base: int) -> (int, int):
+    """
+    _strip_trailing_zeros(base: int) -> (stripped: int, zeros: int); base != 0
+
+    Returns the base without its trailing zero digits and the number of digits removed.
+    The zeros are divided out by repeatedly squared powers of ten, then by smaller and smaller ones,
+    so only O(log(zeros)) big-int divisions are done.
+    """
+    if base % 10:
+        return base, 0
+    base //= 10
+    zeros = 1
+    exponent = 0
+    while True:
+        quotient, remainder = divmod(base, _squared_power_of_ten(exponent))
+        if remainder:
+            break
+        base = quotient
+        zeros += 1 << exponent
+        exponent += 1
+    while exponent > 0:
+        exponent -= 1
+        quotient, remainder = divmod(base, _squared_power_of_ten(exponent))
+        if not remainder:
+            base = quotient
+            zeros += 1 << exponent
+    return base, zeros
+
+
+# Number of significant digits of / and of reciprocal() and sqrt() when none is given
+DEFAULT_PRECISION = 28
+
+# Integers with fewer bits than this are divided with the builtin schoolbook division
+_NEWTON_DIVISION_BITS = 65536
+
+
+def _digit_count(value: int) -> int:
+    """
+    _digit_count(value: int) -> digits: int; value > 0
+
+    Returns the number of decimal digits of the positive integer.
+    """
+    digits = ((value.bit_length() - 1) * 1233 >> 12) + 1
+    while value >= _order_of_magnitude_to_int(digits):
+        digits += 1
+    return digits
+
+
+def _newton_reciprocal(divisor: int, bits: int) -> int:
+    """
+    _newton_reciprocal(divisor: int, bits: int) -> reciprocal: int; divisor.bit_length() == bits
+
+    Returns 2**(2 * bits) // divisor.
+    The reciprocal of the top half of the divisor is found recursively,
+    then one Newton-Raphson step doubles its number of correct bits.
+    """
+    if bits <= _NEWTON_DIVISION_BITS:
+        return (1 << (2 * bits)) // divisor
+    half_bits = (bits >> 1) + 2
+    result = _newton_reciprocal(divisor >> (bits - half_bits), half_bits) << (bits - half_bits)
+    result += (result * ((1 << (2 * bits)) - divisor * result)) >> (2 * bits)
+    error = (1 << (2 * bits)) - divisor * result
+    while error < 0:
+        result -= 1
+        error += divisor
+    while error >= divisor:
+        result += 1
+        error -= divisor
+    return result
+
+
+def _divmod_nonnegative(dividend: int, divisor: int) -> (int, int):
+    """
+    _divmod_nonnegative(dividend: int, divisor: int) -> (quotient: int, remainder: int); dividend >= 0, divisor > 0
+
+    Returns divmod(dividend, divisor).
+    Large operands are divided by multiplying with the Newton-Raphson reciprocal of the divisor,
+    one divisor-sized block of the dividend at a time, instead of with quadratic schoolbook division.
+    """
+    bits = divisor.bit_length()
+    dividend_bits = dividend.bit_length()
+    if bits <= _NEWTON_DIVISION_BITS or dividend_bits - bits <= _NEWTON_DIVISION_BITS:
+        return divmod(dividend, divisor)
+    reciprocal = _newton_reciprocal(divisor, bits)
+    mask = (1 << bits) - 1
+    quotient = 0
+    remainder = 0
+    shift = dividend_bits // bits * bits
+    while shift >= 0:
+        block = (remainder << bits) | ((dividend >> shift) & mask)
+        # Only the top bits of the block matter, and the truncation can only underestimate
+        block_quotient = ((block >> (bits - 1)) * reciprocal) >> (bits + 1)
+        remainder = block - block_quotient * divisor
+        while remainder >= divisor:
+            block_quotient += 1
+            remainder -= divisor
+        quotient = (quotient << bits) | block_quotient
+        shift -= bits
+    return quotient, remainder
+
+
+def _int_divmod(dividend: int, divisor: int) -> (int, int):
+    """
+    _int_divmod(dividend: int, divisor: int) -> (quotient: int, remainder: int); divisor != 0
+
+    Returns divmod(dividend, divisor), with the same flooring and remainder sign as the builtin.
+    """
+    quotient, remainder = _divmod_nonnegative(abs(dividend), abs(divisor))
+    if (dividend < 0) != (divisor < 0):
+        if remainder:
+            quotient = -quotient - 1
+            remainder = abs(divisor) - remainder
+        else:
+            quotient = -quotient
+    if divisor < 0:
+        remainder = -remainder
+    return quotient, remainder
+
+
+def _int_sqrt(value: int) -> int:
+    """
+    _int_sqrt(value: int) -> root: int; value >= 0
+
+    Returns math.isqrt(value).
+    Large values run the same Newton iteration as math.isqrt, but with the Newton-Raphson division.
+    """
+    if value.bit_length() <= 2 * _NEWTON_DIVISION_BITS:
+        return isqrt(value)
+    c = (value.bit_length() - 1) // 2
+    result = 1
+    d = 0
+    for s in reversed(range(c.bit_length())):
+        e = d
+        d = c >> s
+        result = (result << d - e - 1) + _divmod_nonnegative(value >> 2 * c - e - d + 1, result)[0]
+    return result - (result * result > value)
 
 
 class Decimal:
+    """
+    An immutable decimal number equal to base / 10**order_of_magnitude.
+    The base never ends in a zero digit unless the Decimal is zero, in which case order_of_magnitude is 0.
+    """
+    __slots__ = ("base", "order_of_magnitude")
     base: int
     order_of_magnitude: int
 
-    def __init__(self) -> None:
-        self.base = 0
-        self.order_of_magnitude = 0
+    def __init__(self, base: int = 0, order_of_magnitude: int = 0) -> None:
+        base, order_of_magnitude = _simplified(base, order_of_magnitude)
+        _set_base(self, base)
+        _set_order_of_magnitude(self, order_of_magnitude)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("Decimal is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Decimal is immutable")
 
     def inherit_decimal_str(self, decimal_str: str) -> None:
         """
         inherit_decimal_str(decimal_str: str) -> None
 
-        Makes this Decimal represent the decimal string.
+        Makes this freshly constructed Decimal represent the decimal string.
+        This is kept for the Decimal() then inherit_decimal_str() idiom and must not be used on a shared Decimal.
         Raises ValueError if the string cannot be represented as valid decimal.
         """
-        point_idx = decimal_str.rfind(".")
-        if point_idx < 0:
-            self._inherit_int(decimal_str)
-            return
+        base, order_of_magnitude = _parse_decimal_str(decimal_str)
+        _set_base(self, base)
+        _set_order_of_magnitude(self, order_of_magnitude)
 
-        before = decimal_str[:point_idx]
-        after = decimal_str[point_idx+1:]
-        if after == "":
-            self._inherit_int(before)
-            return
+    def _aligned_bases(self, other: Decimal) -> (int, int, int):
+        """
+        _aligned_bases(self, other: Decimal) -> (self_base: int, other_base: int, order_of_magnitude: int)
 
-        mag = len(after)
-        multiplier = _order_of_magnitude_to_int(mag)
-        before_int = int(before) * multiplier
-        after_int = int(after)
+        Returns the bases of both Decimals scaled to their common magnitude.
+        Neither Decimal is modified.
+        """
+        self_mag = self.order_of_magnitude
+        other_mag = other.order_of_magnitude
+        if self_mag == other_mag:
+            return self.base, other.base, self_mag
+        elif self_mag > other_mag:
+            return self.base, other.base * _order_of_magnitude_to_int(self_mag - other_mag), self_mag
+        else:
+            return self.base * _order_of_magnitude_to_int(other_mag - self_mag), other.base, other_mag
+
+    def _addsub(self, other: Decimal, sign: int) -> Decimal:
+        """
+        _addsub(self, other: Decimal, sign: int) -> result: Decimal
+
+        Does the logic for _add and _sub, where sign is 1 or -1.
+        """
+        if not isinstance(other, Decimal):
+            raise TypeError
+        if not other.base:
+            return self
+        if not self.base:
+            return other if sign > 0 else _make_decimal(-other.base, other.order_of_magnitude)
+        self_base, other_base, mag = self._aligned_bases(other)
+        if self.order_of_magnitude != other.order_of_magnitude:
+            # The operand with the larger magnitude has no trailing zero, so neither does the result
+            return _make_decimal(self_base + sign * other_base, mag)
+        return _make_simplified_decimal(self_base + sign * other_base, mag)
 
-        if before_int >= 0:
-            base = before_int + after_int
+    def __add__(self, other: Decimal) -> Decimal:
+        return self._addsub(other, 1)
+
+    def __radd__(self, other: Decimal) -> Decimal:
+        return self._addsub(other, 1)
+
+    def __sub__(self, other: Decimal) -> Decimal:
+        return self._addsub(other, -1)
+
+    def __mul__(self, other: Decimal) -> Decimal:
+        if not isinstance(other, Decimal):
+            raise TypeError
+        return _make_simplified_decimal(self.base * other.base, self.order_of_magnitude + other.order_of_magnitude)
+
+    def divide(self, other: Decimal, precision: int = DEFAULT_PRECISION) -> Decimal:
+        """
+        divide(self, other: Decimal, precision: int) -> quotient: Decimal; precision > 0
+
+        Returns self / other truncated toward zero to the given number of significant digits.
+        Raises ZeroDivisionError if other is zero.
+        """
+        if not isinstance(other, Decimal):
+            raise TypeError
+        if not other.base:
+            raise ZeroDivisionError
+        if not self.base:
+            return self
+        dividend = abs(self.base)
+        divisor = abs(other.base)
+        # The quotient of dividend * 10**shift by divisor has precision or precision + 1 digits
+        shift = precision - _digit_count(dividend) + _digit_count(divisor)
+        if shift >= 0:
+            quotient = _divmod_nonnegative(dividend * _order_of_magnitude_to_int(shift), divisor)[0]
         else:
-            base = before_int - after_int
+            quotient = _divmod_nonnegative(dividend, divisor * _order_of_magnitude_to_int(-shift))[0]
+        if quotient >= _order_of_magnitude_to_int(precision):
+            quotient //= 10
+            shift -= 1
+        if (self.base < 0) != (other.base < 0):
+            quotient = -quotient
+        return _make_simplified_decimal(quotient, self.order_of_magnitude - other.order_of_magnitude + shift)
+
+    def __truediv__(self, other: Decimal) -> Decimal:
+        return self.divide(other, DEFAULT_PRECISION)
+
+    def __divmod__(self, other: Decimal) -> (Decimal, Decimal):
+        if not isinstance(other, Decimal):
+            raise TypeError
+        if not other.base:
+            raise ZeroDivisionError
+        self_base, other_base, mag = self._aligned_bases(other)
+        quotient, remainder = _int_divmod(self_base, other_base)
+        return _make_simplified_decimal(quotient, 0), _make_simplified_decimal(remainder, mag)
 
-        self.base = base
-        self.order_of_magnitude = mag
+    def __floordiv__(self, other: Decimal) -> Decimal:
+        return divmod(self, other)[0]
 
-        self._simplify()
+    def __mod__(self, other: Decimal) -> Decimal:
+        return divmod(self, other)[1]
 
-    def _inherit_int(self, int_str: str) -> None:
+    def reciprocal(self, precision: int = DEFAULT_PRECISION) -> Decimal:
         """
-        inherit_int(self, int_str: str) -> None
+        reciprocal(self, precision: int) -> reciprocal: Decimal; precision > 0
 
-        Makes this decimal represent the parameter int.
-        _simplify() MUST be called before returning out of the module.
+        Returns 1 / self truncated toward zero to the given number of significant digits.
+        Raises ZeroDivisionError if this Decimal is zero.
         """
-        self.base = int(int_str)
-        self.order_of_magnitude = 0
+        return _ONE.divide(self, precision)
 
-    def _ensure_precision(self, other: Decimal) -> None:
+    def sqrt(self, precision: int = DEFAULT_PRECISION) -> Decimal:
         """
-        _ensure_precision(self, other: Decimal) -> None
+        sqrt(self, precision: int) -> root: Decimal; precision > 0
 
-        Makes this Decimal have the same magnitude as the other Decimal.
-        This is done by increasing the smallest magnitude.
-        _simplify() MUST be called before returning out of the module.
+        Returns the square root of self truncated toward zero to the given number of significant digits.
+        Raises ValueError if this Decimal is negative.
         """
-        if self.order_of_magnitude == other.order_of_magnitude:
-            return
-        if self.order_of_magnitude > other.order_of_magnitude:
-            target_mag = self.order_of_magnitude
-            to_fix = other
+        if self.base < 0:
+            raise ValueError
+        if not self.base:
+            return self
+        # Scale the base to 2 * precision - 1 or 2 * precision digits with an even magnitude,
+        # so that its integer square root has exactly precision digits
+        shift = 2 * precision - _digit_count(self.base)
+        if (self.order_of_magnitude + shift) % 2:
+            shift -= 1
+        if shift >= 0:
+            scaled = self.base * _order_of_magnitude_to_int(shift)
         else:
-            target_mag = other.order_of_magnitude
-            to_fix = self
-        mag_diff = target_mag - to_fix.order_of_magnitude
-        multiplier = _order_of_magnitude_to_int(mag_diff)
-        to_fix.base *= multiplier
-        to_fix.order_of_magnitude = target_mag
+            scaled = self.base // _order_of_magnitude_to_int(-shift)
+        return _make_simplified_decimal(_int_sqrt(scaled), (self.order_of_magnitude + shift) // 2)
+
+    def __hash__(self) -> int:
+        return hash((self.base, self.order_of_magnitude))
+
+    def __reduce__(self):
+        return Decimal, (self.base, self.order_of_magnitude)
 
-    def _simplify(self) -> None:
+    def __repr__(self) -> str:
+        return "{DanielDecimal " + str(self.base) + " / 10**" + str(self.order_of_magnitude) + " }"
+
+    def _compare_scaled(self, other: Decimal) -> int:
         """
-        _simplify(self) -> None
+        _compare_scaled(self, other: Decimal) -> sign: int; sign in (-1, 0, 1)
 
-        Simplifies this Decimal until the magnitude of its base is as small as possible by increasing the magnitude.
+        Returns the sign of self - other for Decimals with different magnitudes.
+        The bases are only scaled when their signs alone cannot decide.
         """
-        if self.base == 0:
-            self.order_of_magnitude = 0
-            return
-        while self.base % 10 == 0:
-            self.base //= 10
-            self.order_of_magnitude -= 1
+        self_base = self.base
+        other_base = other.base
+        if (self_base > 0) != (other_base > 0) or not self_base or not other_base:
+            return (self_base > other_base) - (self_base < other_base)
+        mag_diff = self.order_of_magnitude - other.order_of_magnitude
+        if mag_diff > 0:
+            other_base *= _order_of_magnitude_to_int(mag_diff)
+        else:
+            self_base *= _order_of_magnitude_to_int(-mag_diff)
+        return (self_base > other_base) - (self_base < other_base)
+
+    def __lt__(self, other: Decimal) -> bool:
+        if not isinstance(other, Decimal):
+            return NotImplemented
+        if self.order_of_magnitude == other.order_of_magnitude:
+            return self.base < other.base
+        return self._compare_scaled(other) < 0
+
+    def __le__(self, other: Decimal) -> bool:
+        if not isinstance(other, Decimal):
+            return NotImplemented
+        if self.order_of_magnitude == other.order_of_magnitude:
+            return self.base <= other.base
+        return self._compare_scaled(other) <= 0
+
+    def __eq__(self, other: Decimal) -> bool:
+        # Both Decimals are simplified, so equal values have equal fields
+        if not isinstance(other, Decimal):
+            return NotImplemented
+        return self.base == other.base and self.order_of_magnitude == other.order_of_magnitude
+
+    def __ne__(self, other: Decimal) -> bool:
+        if not isinstance(other, Decimal):
+            return NotImplemented
+        return self.base != other.base or self.order_of_magnitude != other.order_of_magnitude
+
+    def __ge__(self, other: Decimal) -> bool:
+        if not isinstance(other, Decimal):
+            return NotImplemented
+        if self.order_of_magnitude == other.order_of_magnitude:
+            return self.base >= other.base
+        return self._compare_scaled(other) >= 0
+
+    def __gt__(self, other: Decimal) -> bool:
+        if not isinstance(other, Decimal):
+            return NotImplemented
+        if self.order_of_magnitude == other.order_of_magnitude:
+            return self.base > other.base
+        return self._compare_scaled(other) > 0
+
+
+_new_decimal = object.__new__
+_set_base = Decimal.base.__set__
+_set_order_of_magnitude = Decimal.order_of_magnitude.__set__
+
+
+def _simplified(base: int, order_of_magnitude: int) -> (int, int):
+    """
+    _simplified(base: int, order_of_magnitude: int) -> (base: int, order_of_magnitude: int)
+
+    Returns the same value with the magnitude of its base as small as possible by increasing the magnitude.
+    """
+    if base == 0:
+        return 0, 0
+    if base % 10:
+        return base, order_of_magnitude
+    base, zeros = _strip_trailing_zeros(base)
+    return base, order_of_magnitude - zeros
+
+
+def _make_decimal(base: int, order_of_magnitude: int) -> Decimal:
+    """
+    _make_decimal(base: int, order_of_magnitude: int) -> result: Decimal
+
+    Returns a Decimal with exactly these fields. They must already be simplified.
+    """
+    result = _new_decimal(Decimal)
+    _set_base(result, base)
+    _set_order_of_magnitude(result, order_of_magnitude)
+    return result
+
+
+_ONE = _make_decimal(1, 0)
+
+
+def _make_simplified_decimal(base: int, order_of_magnitude: int) -> Decimal:
+    """
+    _make_simplified_decimal(base: int, order_of_magnitude: int) -> result: Decimal
+
+    Returns a Decimal representing base / 10**order_of_magnitude.
+    """
+    base, order_of_magnitude = _simplified(base, order_of_magnitude)
+    return _make_decimal(base, order_of_magnitude)
+
+
+def _parse_decimal_str(decimal_str: str) -> (int, int):
+    """
+    _parse_decimal_str(decimal_str: str) -> (base: int, order_of_magnitude: int)
+
+    Returns the simplified fields of the decimal string, which may have an exponent like 1.5e-7.
+    Raises ValueError if the string cannot be represented as valid decimal.
+    """
+    if "_" in decimal_str:
+        raise ValueError
+    decimal_str = decimal_str.strip()
+    mag = 0
+    if "e" in decimal_str or "E" in decimal_str:
+        decimal_str, _, exponent = decimal_str.replace("E", "e").partition("e")
+        mag = -int(exponent)
+
+    before, point, after = decimal_str.rpartition(".")
+    if not point:
+        return _simplified(int(after), mag)
+    if after == "":
+        return _simplified(int(before), mag)
+    if not after.isdigit():
+        raise ValueError
+
+    return _simplified(int(before + after), mag + len(after))
 
-    def _addsub_op_prepare(self, other: Decimal) -> Decimal:
+
+def _fraction_fields(numerator: int, denominator: int) -> (int, int):
+    """
+    _fraction_fields(numerator: int, denominator: int) -> (base: int, order_of_magnitude: int); denominator > 0
+
+    Returns the simplified fields of the fraction.
+    Raises ValueError if the fraction has no finite decimal expansion.
+    """
+    twos = (denominator & -denominator).bit_length() - 1
+    remaining = denominator >> twos
+    fives = 0
+    while remaining % 5 == 0:
+        remaining //= 5
+        fives += 1
+    if remaining != 1:
+        raise ValueError
+    mag = max(twos, fives)
+    return _simplified(numerator * (_order_of_magnitude_to_int(mag) // denominator), mag)
+
+
+def _pack_bases(bases: Iterable[int]) -> Union[array, List[int]]:
+    """
+    _pack_bases(bases: Iterable[int]) -> packed: array('q') | List[int]
+
+    Returns the bases as a signed 64-bit array if they all fit, otherwise as a list of Python ints.
+    """
+    bases = list(bases)
+    try:
+        return array("q", bases)
+    except OverflowError:
+        return bases
+
+
+def _scale_bases(bases: Union[array, List[int]], mag_diff: int) -> Union[array, List[int]]:
+    """
+    _scale_bases(bases: array('q') | List[int], mag_diff: int) -> scaled: array('q') | List[int]
+
+    Returns the bases multiplied by 10 to the power of mag_diff.
+    """
+    if mag_diff == 0:
+        return bases
+    multiplier = _order_of_magnitude_to_int(mag_diff)
+    return _pack_bases([x * multiplier for x in bases])
+
+
+class DecimalArray:
+    """
+    A column of decimals stored as integer bases sharing one order_of_magnitude.
+    Element i is equal to bases[i] / 10**order_of_magnitude.
+    The bases are an array('q') when they all fit in 64 bits, otherwise a list of Python ints.
+    """
+    __slots__ = ("bases", "order_of_magnitude")
+    bases: Union[array, List[int]]
+    order_of_magnitude: int
+
+    def __init__(self, bases: Iterable[int] = (), order_of_magnitude: int = 0) -> None:
+        self.bases = _pack_bases(bases)
+        self.order_of_magnitude = order_of_magnitude
+
+    @classmethod
+    def from_decimals(cls, decimals: Iterable[Decimal]) -> DecimalArray:
         """
-        _addsub_op_prepare(self, other: Decimal) -> buffer: Decimal
+        from_decimals(decimals: Iterable[Decimal]) -> column: DecimalArray
 
-        Does half of the logic for _add and _sub.
+        Returns a column holding the same values as the Decimals.
+        The shared order_of_magnitude is the largest one among them.
         """
-        if not isinstance(other, Decimal):
+        decimals = list(decimals)
+        mag = max((x.order_of_magnitude for x in decimals), default=0)
+        bases = [x.base * _order_of_magnitude_to_int(mag - x.order_of_magnitude) for x in decimals]
+        return cls(bases, mag)
+
+    def to_decimals(self) -> List[Decimal]:
+        """
+        to_decimals(self) -> decimals: List[Decimal]
+
+        Returns the values of this column as simplified Decimals.
+        """
+        mag = self.order_of_magnitude
+        return [_make_simplified_decimal(x, mag) for x in self.bases]
+
+    def __len__(self) -> int:
+        return len(self.bases)
+
+    def __getitem__(self, index: int) -> Decimal:
+        return _make_simplified_decimal(self.bases[index], self.order_of_magnitude)
+
+    def __iter__(self):
+        return iter(self.to_decimals())
+
+    def __repr__(self) -> str:
+        return "{DanielDecimalArray " + str(list(self.bases)) + " / 10**" + str(self.order_of_magnitude) + " }"
+
+    def _aligned_bases(self, other: DecimalArray) ->\
+            (Union[array, List[int]], Union[array, List[int]], int):
+        """
+        _aligned_bases(self, other: DecimalArray) ->
+            (self_bases: array('q') | List[int], other_bases: array('q') | List[int], order_of_magnitude: int)
+
+        Returns the bases of both columns scaled to their common magnitude.
+        Raises ValueError if the columns do not have the same length.
+        """
+        if not isinstance(other, DecimalArray):
             raise TypeError
-        self._ensure_precision(other)
-        result = Decimal()
-        result.order_of_magnitude = self.order_of_magnitude
-        result.base = self.base
-        return result
+        if len(self.bases) != len(other.bases):
+            raise ValueError
+        self_mag = self.order_of_magnitude
+        other_mag = other.order_of_magnitude
+        if self_mag >= other_mag:
+            return self.bases, _scale_bases(other.bases, self_mag - other_mag), self_mag
+        else:
+            return _scale_bases(self.bases, other_mag - self_mag), other.bases, other_mag
 
-    def _op_simplify(self, other: Decimal, buffer: Decimal) -> None:
+    def sum(self) -> Decimal:
         """
-        _op_simplify(self, other: Decimal, buffer: Decimal) -> None
+        sum(self) -> total: Decimal
 
-        Re-simplifies Decimal objects whose precisions have been increased for other operations.
+        Returns the exact sum of this column.
         """
-        self._simplify()
-        other._simplify()
-        buffer._simplify()
+        return _make_simplified_decimal(sum(self.bases), self.order_of_magnitude)
 
-    def _mul_op_prepare(self, other: Decimal) -> Decimal:
+    def dot(self, other: DecimalArray) -> Decimal:
         """
-        _mul_op_prepare(self, other: Decimal) -> buffer: Decimal
+        dot(self, other: DecimalArray) -> product: Decimal, len(self) == len(other)
 
-        Does half of the logic for _mul.
+        Returns the exact dot product of the two columns.
         """
-        if not isinstance(other, Decimal):
+        if not isinstance(other, DecimalArray):
             raise TypeError
-        result = Decimal()
-        result.order_of_magnitude = self.order_of_magnitude + other.order_of_magnitude
-        result.base = self.base
-        return result
+        if len(self.bases) != len(other.bases):
+            raise ValueError
+        return _make_simplified_decimal(sum(map(operator.mul, self.bases, other.bases)),
+                                        self.order_of_magnitude + other.order_of_magnitude)
 
-    def __add__(self, other: Decimal) -> Decimal:
-        result = self._addsub_op_prepare(other)
-        result.base += other.base
-        self._op_simplify(other, result)
-        return result
+    def scale(self, factor: Decimal) -> DecimalArray:
+        """
+        scale(self, factor: Decimal) -> scaled: DecimalArray
 
-    def __radd__(self, other: Decimal) -> Decimal:
-        result = self._addsub_op_prepare(other)
-        result.base += other.base
-        self._op_simplify(other, result)
-        return result
+        Returns a new column with every value multiplied by the factor.
+        """
+        if not isinstance(factor, Decimal):
+            raise TypeError
+        multiplier = factor.base
+        return DecimalArray([x * multiplier for x in self.bases],
+                            self.order_of_magnitude + factor.order_of_magnitude)
 
-    def __sub__(self, other: Decimal) -> Decimal:
-        result = self._addsub_op_prepare(other)
-        result.base -= other.base
-        self._op_simplify(other, result)
-        return result
+    def __add__(self, other: DecimalArray) -> DecimalArray:
+        self_bases, other_bases, mag = self._aligned_bases(other)
+        return DecimalArray(map(operator.add, self_bases, other_bases), mag)
 
-    def __mul__(self, other: Decimal) -> Decimal:
-        result = self._mul_op_prepare(other)
-        result.base *= other.base
-        result._simplify()
-        return result
+    def __sub__(self, other: DecimalArray) -> DecimalArray:
+        self_bases, other_bases, mag = self._aligned_bases(other)
+        return DecimalArray(map(operator.sub, self_bases, other_bases), mag)
 
-    def __repr__(self) -> str:
-        return "{DanielDecimal " + str(self.base) + " / 10**" + str(self.order_of_magnitude) + " }"
+    def __mul__(self, other: DecimalArray) -> DecimalArray:
+        if not isinstance(other, DecimalArray):
+            raise TypeError
+        if len(self.bases) != len(other.bases):
+            raise ValueError
+        return DecimalArray(map(operator.mul, self.bases, other.bases),
+                            self.order_of_magnitude + other.order_of_magnitude)
 
-    def __lt__(self, other: Decimal) -> bool:
-        diff = self - other
-        return diff.base < 0
+    def _mask(self, other: Union[DecimalArray, Decimal], comparison) -> List[bool]:
+        """
+        _mask(self, other: DecimalArray | Decimal, comparison: Callable[[int, int], bool]) -> mask: List[bool]
 
-    def __le__(self, other: Decimal) -> bool:
-        diff = self - other
-        return diff.base <= 0
+        Does the logic for the comparison masks.
+        A Decimal is compared against every value of this column.
+        """
+        if isinstance(other, Decimal):
+            mag = max(self.order_of_magnitude, other.order_of_magnitude)
+            bound = other.base * _order_of_magnitude_to_int(mag - other.order_of_magnitude)
+            bases = _scale_bases(self.bases, mag - self.order_of_magnitude)
+            return [comparison(x, bound) for x in bases]
+        self_bases, other_bases, _ = self._aligned_bases(other)
+        return list(map(comparison, self_bases, other_bases))
 
-    def __eq__(self, other: Decimal) -> bool:
-        diff = self - other
-        return diff.base == 0
+    def lt(self, other: Union[DecimalArray, Decimal]) -> List[bool]:
+        return self._mask(other, operator.lt)
 
-    def __ne__(self, other: Decimal) -> bool:
-        diff = self - other
-        return diff.base != 0
+    def le(self, other: Union[DecimalArray, Decimal]) -> List[bool]:
+        return self._mask(other, operator.le)
 
-    def __ge__(self, other: Decimal) -> bool:
-        diff = self - other
-        return diff.base >= 0
+    def eq(self, other: Union[DecimalArray, Decimal]) -> List[bool]:
+        return self._mask(other, operator.eq)
 
-    def __gt__(self, other: Decimal) -> bool:
-        diff = self - other
-        return diff.base > 0
+    def ne(self, other: Union[DecimalArray, Decimal]) -> List[bool]:
+        return self._mask(other, operator.ne)
+
+    def ge(self, other: Union[DecimalArray, Decimal]) -> List[bool]:
+        return self._mask(other, operator.ge)
+
+    def gt(self, other: Union[DecimalArray, Decimal]) -> List[bool]:
+        return self._mask(other, operator.gt)
+
+
+class DecimalAccumulator:
+    """
+    An exact running sum of Decimals kept as a single integer at the largest magnitude seen so far.
+    The total is only simplified when it is read with result().
+    Accumulators from different workers can be combined with merge().
+    """
+    __slots__ = ("total_base", "order_of_magnitude")
+    total_base: int
+    order_of_magnitude: int
+
+    def __init__(self) -> None:
+        self.total_base = 0
+        self.order_of_magnitude = 0
+
+    def _add_base(self, base: int, order_of_magnitude: int) -> None:
+        """
+        _add_base(self, base: int, order_of_magnitude: int) -> None
+
+        Adds base / 10**order_of_magnitude to the running total.
+        The total is only rescaled when the magnitude is larger than any seen before.
+        """
+        mag_diff = order_of_magnitude - self.order_of_magnitude
+        if mag_diff == 0:
+            self.total_base += base
+        elif mag_diff < 0:
+            self.total_base += base * _order_of_magnitude_to_int(-mag_diff)
+        else:
+            self.total_base = self.total_base * _order_of_magnitude_to_int(mag_diff) + base
+            self.order_of_magnitude = order_of_magnitude
+
+    def add(self, value: Decimal) -> None:
+        """
+        add(self, value: Decimal) -> None
+
+        Adds the Decimal to the running total.
+        """
+        if not isinstance(value, Decimal):
+            raise TypeError
+        self._add_base(value.base, value.order_of_magnitude)
+
+    def update(self, values: Iterable[Decimal]) -> None:
+        """
+        update(self, values: Iterable[Decimal]) -> None
+
+        Adds every Decimal to the running total.
+        The bases are first summed per magnitude, so each distinct magnitude is aligned only once.
+        Raises TypeError, leaving the total unchanged, if a value is not a Decimal.
+        """
+        totals_by_mag = {}
+        get = totals_by_mag.get
+        for value in values:
+            if not isinstance(value, Decimal):
+                raise TypeError
+            mag = value.order_of_magnitude
+            totals_by_mag[mag] = get(mag, 0) + value.base
+        for mag in sorted(totals_by_mag, reverse=True):
+            self._add_base(totals_by_mag[mag], mag)
+
+    def merge(self, other: DecimalAccumulator) -> None:
+        """
+        merge(self, other: DecimalAccumulator) -> None
+
+        Adds the running total of the other accumulator to this one.
+        """
+        if not isinstance(other, DecimalAccumulator):
+            raise TypeError
+        self._add_base(other.total_base, other.order_of_magnitude)
+
+    def result(self) -> Decimal:
+        """
+        result(self) -> total: Decimal
+
+        Returns the running total as a simplified Decimal.
+        """
+        return _make_simplified_decimal(self.total_base, self.order_of_magnitude)
+
+
+def decimal_sum(values: Iterable[Decimal]) -> Decimal:
+    """
+    decimal_sum(values: Iterable[Decimal]) -> total: Decimal
+
+    Returns the exact sum of the Decimals.
+    This is much faster than sum() because the total is only simplified once.
+    """
+    accumulator = DecimalAccumulator()
+    accumulator.update(values)
+    return accumulator.result()
 
 
-def decimal(toconvert) -> Decimal:
+def decimal(toconvert, exact_float: bool = False) -> Decimal:
     """
-    decimal(toconvert: Any) -> result: Decimal
+    decimal(toconvert: Any, exact_float: bool) -> result: Decimal
 
     Returns the passed parameter magically converted into a decimal.
+    ints, strs, Fractions and decimal.Decimals are converted exactly.
+    floats are converted to the shortest decimal that reads back as the same float, like str(),
+    unless exact_float is True, in which case their exact binary value is used.
+    Anything else is converted through str().
     If this fails, any Error might be raised.
     """
-    decimal_str = str(toconvert)
-    result = Decimal()
-    result.inherit_decimal_str(decimal_str)
-    return result
+    if isinstance(toconvert, Decimal):
+        return toconvert
+    elif isinstance(toconvert, int):
+        base, order_of_magnitude = _simplified(toconvert, 0)
+    elif isinstance(toconvert, str):
+        base, order_of_magnitude = _parse_decimal_str(toconvert)
+    elif isinstance(toconvert, float):
+        if exact_float:
+            base, order_of_magnitude = _fraction_fields(*toconvert.as_integer_ratio())
+        else:
+            base, order_of_magnitude = _parse_decimal_str(repr(toconvert))
+    elif isinstance(toconvert, _StdlibDecimal):
+        if not toconvert.is_finite():
+            raise ValueError
+        base, order_of_magnitude = _parse_decimal_str(str(toconvert))
+    elif isinstance(toconvert, Fraction):
+        base, order_of_magnitude = _fraction_fields(toconvert.numerator, toconvert.denominator)
+    else:
+        base, order_of_magnitude = _parse_decimal_str(str(toconvert))
+    return _make_decimal(base, order_of_magnitude)
+
+
+def parse_decimals(decimal_strs: Iterable[str]) -> (List[Optional[Decimal]], List[int]):
+    """
+    parse_decimals(decimal_strs: Iterable[str]) -> (results: List[Decimal | None], failed_indices: List[int])
+
+    Returns the Decimal of every string, and the indices of the strings that are not valid decimals.
+    The results of the invalid strings are None, so the results line up with the input.
+    """
+    results = []
+    failed_indices = []
+    append = results.append
+    for index, decimal_str in enumerate(decimal_strs):
+        try:
+            base, order_of_magnitude = _parse_decimal_str(decimal_str)
+        except ValueError:
+            append(None)
+            failed_indices.append(index)
+            continue
+        append(_make_decimal(base, order_of_magnitude))
+    return results, failed_indices
+
+
+class DecimalContext:
+    """
+    Explicit context for Decimal arithmetic with the exact infinite-precision backend.
+    Values are converted to the backend representation with wrap() and back with unwrap(),
+    so a computation can stay in that representation between the two.
+    """
+
+    def wrap(self, value: Decimal):
+        """
+        wrap(self, value: Decimal) -> wrapped: Any
+
+        Returns the value in the representation of this backend.
+        """
+        return value
+
+    def unwrap(self, value) -> Decimal:
+        """
+        unwrap(self, value: Any) -> result: Decimal
+
+        Returns the backend value as a Decimal.
+        """
+        return value
+
+    def add(self, x, y):
+        return x + y
+
+    def sub(self, x, y):
+        return x - y
+
+    def mul(self, x, y):
+        return x * y
+
+    def sum(self, values: Iterable):
+        return decimal_sum(values)
+
+
+class BoundedDecimalContext(DecimalContext):
+    """
+    Context that routes Decimal arithmetic through the C-accelerated decimal module,
+    for workloads whose results fit in a known number of significant digits.
+    Every operation traps Inexact, and falls back to the exact backend when the result does not fit,
+    so unwrapped results are always identical to the exact backend.
+    """
+    precision: int
+    _context: _stdlib_decimal.Context
+
+    def __init__(self, precision: int = 28) -> None:
+        self.precision = precision
+        self._context = _stdlib_decimal.Context(
+            prec=precision, Emin=_stdlib_decimal.MIN_EMIN, Emax=_stdlib_decimal.MAX_EMAX,
+            traps=[_stdlib_decimal.Inexact, _stdlib_decimal.Overflow, _stdlib_decimal.InvalidOperation])
+
+    def wrap(self, value: Decimal) -> _StdlibDecimal:
+        # Constructing from a string is always exact, whatever the precision
+        return _StdlibDecimal(str(value.base) + "E" + str(-value.order_of_magnitude))
+
+    def unwrap(self, value: _StdlibDecimal) -> Decimal:
+        return decimal(value)
+
+    def add(self, x: _StdlibDecimal, y: _StdlibDecimal) -> _StdlibDecimal:
+        try:
+            return self._context.add(x, y)
+        except _stdlib_decimal.Inexact:
+            return self.wrap(self.unwrap(x) + self.unwrap(y))
+
+    def sub(self, x: _StdlibDecimal, y: _StdlibDecimal) -> _StdlibDecimal:
+        try:
+            return self._context.subtract(x, y)
+        except _stdlib_decimal.Inexact:
+            return self.wrap(self.unwrap(x) - self.unwrap(y))
+
+    def mul(self, x: _StdlibDecimal, y: _StdlibDecimal) -> _StdlibDecimal:
+        try:
+            return self._context.multiply(x, y)
+        except _stdlib_decimal.Inexact:
+            return self.wrap(self.unwrap(x) * self.unwrap(y))
+
+    def sum(self, values: Iterable[_StdlibDecimal]) -> _StdlibDecimal:
+        values = list(values)
+        try:
+            with _stdlib_decimal.localcontext(self._context):
+                return sum(values, _StdlibDecimal(0))
+        except _stdlib_decimal.Inexact:
+            return self.wrap(decimal_sum(map(self.unwrap, values)))
 
 
 def parse_decimal(prompt: str) -> Decimal:
@@ -0,0 +1,281 @@
+# Benchmark the arithmetic of danielexercise_decimal
+# Type: Benchmark
+#
+# python danielexercise_decimal_benchmark.py [--output run.json] [--compare baseline.json] [--tolerance 0.2]
+#   Runs the suite and prints its JSON results, and the cases that got slower than the baseline run.
+# python danielexercise_decimal_benchmark.py --tables
+#   Prints the human-readable comparison tables instead.
+
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from unittest import mock
+import danielexercise_decimal
+from danielexercise_decimal import Decimal, decimal, decimal_sum, DecimalContext, BoundedDecimalContext,\
+    _simplified, _order_of_magnitude_to_int
+
+
+def _operands(count: int) -> List[Tuple]:
+    """
+    _operands(count: int) -> pairs: List[(Decimal, Decimal)]
+
+    Returns pairs of ledger-like values with mixed precisions.
+    """
+    return [(decimal(str(i * 37 % 100000) + "." + str(i % 100).zfill(2)),
+             decimal(str(i * 11 % 1000) + "." + str(i % 7)))
+            for i in range(count)]
+
+
+def _measure(op: Callable, pairs: List[Tuple], repeat: int = 5) -> Tuple[float, float]:
+    """
+    _measure(op: Callable, pairs: List[(Decimal, Decimal)], repeat: int) ->
+        (seconds_per_op: float, allocated_bytes_per_op: float)
+
+    Returns the best time per operation and the bytes kept alive by each result.
+    """
+    def run():
+        for x, y in pairs:
+            op(x, y)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    results = [op(x, y) for x, y in pairs]
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in snapshot_after.compare_to(snapshot_before, "filename"))
+    del results
+    return best / len(pairs), allocated / len(pairs)
+
+
+def _naive_simplified(base: int, order_of_magnitude: int) -> Tuple[int, int]:
+    """
+    _naive_simplified(base: int, order_of_magnitude: int) -> (base: int, order_of_magnitude: int)
+
+    The original digit-at-a-time simplification, kept as the reference for the scaling benchmark.
+    """
+    if base == 0:
+        return 0, 0
+    while base % 10 == 0:
+        base //= 10
+        order_of_magnitude -= 1
+    return base, order_of_magnitude
+
+
+def scaling(digit_counts=(10, 100, 1000, 10000, 100000), naive_limit: int = 10000) -> None:
+    """
+    scaling(digit_counts: Iterable[int], naive_limit: int) -> None
+
+    Prints the time to simplify a base whose second half is trailing zeros, for each digit count.
+    The digit-at-a-time reference is only run up to naive_limit digits because it is quadratic.
+    """
+    print("digits  naive_us  stripped_us  pow10_us")
+    for digits in digit_counts:
+        zeros = digits // 2
+        base = (_order_of_magnitude_to_int(digits - zeros) - 1) * _order_of_magnitude_to_int(zeros)
+        stripped = min(timeit.repeat(lambda: _simplified(base, 0), number=1, repeat=3))
+        pow10 = min(timeit.repeat(lambda: _order_of_magnitude_to_int(digits), number=1, repeat=3))
+        if digits <= naive_limit:
+            naive = "%9.1f" % (min(timeit.repeat(lambda: _naive_simplified(base, 0), number=1, repeat=3)) * 1e6)
+        else:
+            naive = "%9s" % "-"
+        print("%6d %s %12.1f %9.1f" % (digits, naive, stripped * 1e6, pow10 * 1e6))
+
+
+def backends(pairs: List[Tuple]) -> None:
+    """
+    backends(pairs: List[(Decimal, Decimal)]) -> None
+
+    Prints the time per operation of each context backend, on values already wrapped for it,
+    and the time to wrap and unwrap a value.
+    """
+    print("backend         add_ns   mul_ns  sum_ns/item  wrap+unwrap_ns")
+    for name, context in (("exact", DecimalContext()), ("bounded(28)", BoundedDecimalContext(28))):
+        wrapped = [(context.wrap(x), context.wrap(y)) for x, y in pairs]
+        add, _ = _measure(context.add, wrapped)
+        mul, _ = _measure(context.mul, wrapped)
+        values = [x for pair in wrapped for x in pair]
+        total = min(timeit.repeat(lambda: context.sum(values), number=1, repeat=5)) / len(values)
+        convert, _ = _measure(lambda x, y: context.unwrap(context.wrap(x)), pairs)
+        print("%-13s %8.0f %8.0f %12.0f %15.0f" % (name, add * 1e9, mul * 1e9, total * 1e9, convert * 1e9))
+
+
+def division_scaling(digit_counts=(1000, 10000, 100000)) -> None:
+    """
+    division_scaling(digit_counts: Iterable[int]) -> None
+
+    Prints the time of divide() and sqrt() to the full digit count,
+    with schoolbook division only and with the Newton-Raphson path.
+    """
+    rng = random.Random(1120)
+    print("digits  divide_schoolbook_ms  divide_newton_ms  sqrt_schoolbook_ms  sqrt_newton_ms")
+    for digits in digit_counts:
+        x = Decimal(rng.randrange(10 ** (digits - 1), 10 ** digits))
+        y = Decimal(rng.randrange(10 ** (digits - 1), 10 ** digits), digits)
+        timings = []
+        for limit in (1 << 62, danielexercise_decimal._NEWTON_DIVISION_BITS):
+            with mock.patch.object(danielexercise_decimal, "_NEWTON_DIVISION_BITS", limit):
+                timings.append(min(timeit.repeat(lambda: x.divide(y, digits), number=1, repeat=3)))
+                timings.append(min(timeit.repeat(lambda: x.sqrt(digits), number=1, repeat=3)))
+        print("%6d %21.1f %17.1f %19.1f %15.1f" % (digits, timings[0] * 1e3, timings[2] * 1e3,
+                                                   timings[1] * 1e3, timings[3] * 1e3))
+
+
+def tables(count: int = 20000) -> None:
+    pairs = _operands(count)
+    operations = (
+        ("add", lambda x, y: x + y),
+        ("sub", lambda x, y: x - y),
+        ("mul", lambda x, y: x * y),
+        ("lt", lambda x, y: x < y),
+        ("eq", lambda x, y: x == y),
+    )
+    print("op    ns/op    bytes/op")
+    for name, op in operations:
+        seconds, allocated = _measure(op, pairs)
+        print("%-4s %7.0f %10.1f" % (name, seconds * 1e9, allocated))
+    values = [x for pair in pairs for x in pair]
+    seconds = min(timeit.repeat(lambda: sorted(values), number=1, repeat=5))
+    print("sort %7.0f ns/item" % (seconds * 1e9 / len(values)))
+    seconds = min(timeit.repeat(lambda: sum(values[1:], values[0]), number=1, repeat=5))
+    print("sum()       %7.0f ns/item" % (seconds * 1e9 / len(values)))
+    seconds = min(timeit.repeat(lambda: decimal_sum(values), number=1, repeat=5))
+    print("decimal_sum %7.0f ns/item" % (seconds * 1e9 / len(values)))
+    print()
+    backends(pairs)
+    print()
+    scaling()
+    print()
+    division_scaling()
+
+
+def _suite_values(rng: random.Random, count: int, digits: int, spread: int) -> List[str]:
+    """
+    _suite_values(rng: random.Random, count: int, digits: int, spread: int) -> decimal_strs: List[str]
+
+    Returns decimal strings with the given number of significant digits,
+    and with between 0 and spread digits after the point.
+    """
+    result = []
+    for _ in range(count):
+        text = str(rng.randrange(10 ** (digits - 1), 10 ** digits))
+        point = len(text) - rng.randint(0, spread)
+        if point <= 0:
+            text = "0." + "0" * -point + text
+        elif point < len(text):
+            text = text[:point] + "." + text[point:]
+        if rng.random() < 0.5:
+            text = "-" + text
+        result.append(text)
+    return result
+
+
+def _run_case(func: Callable[[], object], items: int, repeat: int) -> Dict[str, float]:
+    """
+    _run_case(func: Callable[[], object], items: int, repeat: int) -> result: Dict[str, float]
+
+    Returns the best throughput of func in items per second, and the peak traced memory of one call.
+    """
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": items / best, "peak_bytes": peak}
+
+
+def suite(digit_counts=(5, 20, 100, 1000), spreads=(0, 4, 16), count: int = 2000, repeat: int = 5,
+          seed: int = 1120) -> List[Dict]:
+    """
+    suite(digit_counts: Iterable[int], spreads: Iterable[int], count: int, repeat: int, seed: int) ->
+        results: List[Dict]
+
+    Runs every case for every digit count and exponent spread,
+    and returns one record per case with its ops_per_sec and peak_bytes.
+    """
+    rng = random.Random(seed)
+    results = []
+    for digits in digit_counts:
+        for spread in spreads:
+            texts = _suite_values(rng, count, digits, spread)
+            values = [decimal(x) for x in texts]
+            others = values[1:] + values[:1]
+            ints = [x.base for x in values]
+            cases = [
+                ("from_str", lambda: [decimal(x) for x in texts]),
+                ("from_int", lambda: [decimal(x) for x in ints]),
+                ("add", lambda: [x + y for x, y in zip(values, others)]),
+                ("mul", lambda: [x * y for x, y in zip(values, others)]),
+                ("compare", lambda: [x < y for x, y in zip(values, others)]),
+                ("sort", lambda: sorted(values)),
+                ("sum", lambda: decimal_sum(values)),
+            ]
+            if digits <= 15:
+                floats = [float(x) for x in texts]
+                cases.append(("from_float", lambda: [decimal(x) for x in floats]))
+            for name, func in cases:
+                record = {"case": name, "digits": digits, "spread": spread, "count": count}
+                record.update(_run_case(func, count, repeat))
+                results.append(record)
+    return results
+
+
+def _case_key(record: Dict) -> Tuple:
+    return record["case"], record["digits"], record["spread"]
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """
+    compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> regressions: List[str]
+
+    Returns a description of every case whose throughput dropped by more than the tolerance fraction.
+    """
+    previous = {_case_key(x): x for x in baseline}
+    regressions = []
+    for record in results:
+        old = previous.get(_case_key(record))
+        if old is None:
+            continue
+        ratio = record["ops_per_sec"] / old["ops_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append("%s digits=%d spread=%d: %.0f -> %.0f ops/sec (%.0f%%)" % (
+                record["case"], record["digits"], record["spread"],
+                old["ops_per_sec"], record["ops_per_sec"], (ratio - 1) * 100))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark danielexercise_decimal")
+    parser.add_argument("--tables", action="store_true", help="print the human-readable tables instead")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional slowdown")
+    parser.add_argument("--count", type=int, default=2000, help="values per case")
+    args = parser.parse_args(argv)
+    if args.tables:
+        tables()
+        return 0
+
+    report = {"python": platform.python_version(), "results": suite(count=args.count)}
+    text = json.dumps(report, indent=1)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(report["results"], baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
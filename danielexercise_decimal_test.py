@@ -0,0 +1,237 @@
+# Test the Decimal class and decimal function in danielexercise_decimal
+# Type: Unit Tests
+
+import bisect
+import copy
+import decimal as stdlib_decimal
+import fractions
+import math
+import pickle
+import random
+import unittest
+from unittest import mock
+import danielexercise_decimal
+from danielexercise_decimal import Decimal, DecimalArray, DecimalAccumulator, DecimalContext, BoundedDecimalContext,\
+    decimal, decimal_sum, parse_decimals, _order_of_magnitude_to_int, _simplified
+
+
+class TestDecimalMethods(unittest.TestCase):
+    def test_arithmetic_does_not_touch_operands(self):
+        given1 = decimal("1.25")
+        given2 = decimal("100")
+        self.assertEqual((125, 2), (given1.base, given1.order_of_magnitude))
+        self.assertEqual((1, -2), (given2.base, given2.order_of_magnitude))
+
+        actual = given1 + given2
+        self.assertEqual((10125, 2), (actual.base, actual.order_of_magnitude))
+        actual = given1 - given2
+        self.assertEqual((-9875, 2), (actual.base, actual.order_of_magnitude))
+        actual = given1 * given2
+        self.assertEqual((125, 0), (actual.base, actual.order_of_magnitude))
+
+        self.assertEqual((125, 2), (given1.base, given1.order_of_magnitude))
+        self.assertEqual((1, -2), (given2.base, given2.order_of_magnitude))
+
+    def test_results_are_simplified(self):
+        actual = decimal("0.5") + decimal("0.5")
+        self.assertEqual((1, 0), (actual.base, actual.order_of_magnitude))
+        actual = decimal("0.5") - decimal("0.5")
+        self.assertEqual((0, 0), (actual.base, actual.order_of_magnitude))
+        actual = decimal("2.5") * decimal("4")
+        self.assertEqual((1, -1), (actual.base, actual.order_of_magnitude))
+        actual = decimal("0") - decimal("300")
+        self.assertEqual((-3, -2), (actual.base, actual.order_of_magnitude))
+
+    def test_immutable(self):
+        given = decimal("1.5")
+        with self.assertRaises(AttributeError):
+            given.base = 3
+        with self.assertRaises(AttributeError):
+            given.extra = 3
+
+    def test_pickle_and_copy(self):
+        given = decimal("-12.345")
+        for actual in (pickle.loads(pickle.dumps(given)), copy.copy(given), copy.deepcopy(given)):
+            self.assertIs(Decimal, type(actual))
+            self.assertEqual((-12345, 3), (actual.base, actual.order_of_magnitude))
+
+    def test_hash(self):
+        self.assertEqual(hash(decimal("1.50")), hash(decimal("1.5")))
+        self.assertEqual(hash(Decimal(150, 2)), hash(decimal("1.5")))
+        self.assertEqual({decimal("2"): 1}, {decimal("0.5") * decimal("4"): 1})
+
+    def test_compare(self):
+        given = ["-300", "-2.5", "-1.001", "-0.001", "0", "0.001", "0.01", "0.5", "1", "1.25", "100", "101.5"]
+        decimals = [decimal(x) for x in given]
+        for i, x in enumerate(decimals):
+            for j, y in enumerate(decimals):
+                self.assertEqual(i < j, x < y)
+                self.assertEqual(i <= j, x <= y)
+                self.assertEqual(i == j, x == y)
+                self.assertEqual(i != j, x != y)
+                self.assertEqual(i >= j, x >= y)
+                self.assertEqual(i > j, x > y)
+        self.assertEqual(decimals, sorted(reversed(decimals)))
+        self.assertEqual(8, bisect.bisect_left(decimals, decimal("1.00")))
+        self.assertNotEqual(decimal("1"), 1)
+        with self.assertRaises(TypeError):
+            decimal("1") < 1
+
+    def test_simplify_long_bases(self):
+        for zeros in (0, 1, 2, 3, 7, 8, 9, 63, 64, 65, 1000, 5000):
+            for digits in (1, 3, 40):
+                given = (_order_of_magnitude_to_int(digits) - 3) * 10**zeros
+                self.assertEqual((given // 10**zeros, 2 - zeros), _simplified(given, 2))
+                self.assertEqual((-given // 10**zeros, -zeros), _simplified(-given, 0))
+
+    def test_order_of_magnitude_to_int(self):
+        for given in (0, 1, 2, 17, 4095, 4096, 6000):
+            self.assertEqual(10**given, _order_of_magnitude_to_int(given))
+        with self.assertRaises(ValueError):
+            _order_of_magnitude_to_int(-1)
+
+    def test_decimal_sum(self):
+        given = [decimal(x) for x in ("1.25", "-3", "0", "400", "0.001", "0.75", "-0.001", "2.5")]
+        expected = Decimal()
+        for x in given:
+            expected = expected + x
+        self.assertEqual(expected, decimal_sum(given))
+        self.assertEqual(expected, decimal_sum(iter(given)))
+        self.assertEqual(Decimal(), decimal_sum([]))
+        actual = decimal_sum([decimal("0.5"), decimal("0.5")])
+        self.assertEqual((1, 0), (actual.base, actual.order_of_magnitude))
+
+    def test_accumulator_merge(self):
+        given = [decimal(str(i) + "." + str(i % 7)) for i in range(-50, 100)]
+        shards = [DecimalAccumulator() for _ in range(3)]
+        for i, x in enumerate(given):
+            shards[i % 3].add(x)
+        merged = pickle.loads(pickle.dumps(shards[0]))
+        merged.merge(shards[1])
+        merged.merge(shards[2])
+        self.assertEqual(decimal_sum(given), merged.result())
+        with self.assertRaises(TypeError):
+            merged.update([Decimal(1), 2])
+        with self.assertRaises(TypeError):
+            merged.add(2)
+        self.assertEqual(decimal_sum(given), merged.result())
+
+    def test_convert(self):
+        expected = Decimal(-15, 1)
+        for given in ("-1.5", " -1.50 ", "-15e-1", "-0.0015E3", -1.5, fractions.Fraction(-3, 2),
+                      stdlib_decimal.Decimal("-1.50"), expected):
+            self.assertEqual(expected, decimal(given))
+        self.assertEqual(Decimal(-5, 1), decimal("-0.5"))
+        self.assertEqual(Decimal(5, 1), decimal(".5"))
+        self.assertEqual(Decimal(1, -3), decimal(1000))
+        self.assertEqual(Decimal(1, 7), decimal(1e-7))
+        self.assertEqual(Decimal(1, 1), decimal(0.1))
+        self.assertEqual(Decimal(1000000000000000055511151231257827021181583404541015625, 55),
+                         decimal(0.1, exact_float=True))
+        self.assertEqual(Decimal(1, -20), decimal(stdlib_decimal.Decimal("1E+20")))
+        for given in ("", ".", "1.2.3", "1.-5", "1. 5", "1_000", "1e", "abc",
+                      float("inf"), fractions.Fraction(1, 3), stdlib_decimal.Decimal("NaN")):
+            with self.assertRaises(ValueError):
+                decimal(given)
+
+    def test_parse_decimals(self):
+        actual, failed = parse_decimals(["1.5", "oops", "2e3", "", "-0.25"])
+        self.assertEqual([decimal("1.5"), None, decimal("2000"), None, decimal("-0.25")], actual)
+        self.assertEqual([1, 3], failed)
+
+    def test_bounded_context_matches_exact(self):
+        given = [decimal(x) for x in ("1.25", "-3", "0", "400", "0.001", "123456789.987654321", "1e30", "7e-30")]
+        exact = DecimalContext()
+        for bounded in (BoundedDecimalContext(), BoundedDecimalContext(5)):
+            wrapped = [bounded.wrap(x) for x in given]
+            for x, wx in zip(given, wrapped):
+                for y, wy in zip(given, wrapped):
+                    self.assertEqual(exact.add(x, y), bounded.unwrap(bounded.add(wx, wy)))
+                    self.assertEqual(exact.sub(x, y), bounded.unwrap(bounded.sub(wx, wy)))
+                    self.assertEqual(exact.mul(x, y), bounded.unwrap(bounded.mul(wx, wy)))
+            self.assertEqual(exact.sum(given), bounded.unwrap(bounded.sum(wrapped)))
+            self.assertEqual(exact.sum(given[:5]), bounded.unwrap(bounded.sum(wrapped[:5])))
+
+    def test_divide(self):
+        context = stdlib_decimal.Context(prec=20, rounding=stdlib_decimal.ROUND_DOWN)
+        given = ("1", "3", "-7", "0.25", "123.456", "-0.003", "1e20", "98765.4321")
+        for x in given:
+            for y in given:
+                expected = decimal(context.divide(stdlib_decimal.Decimal(x), stdlib_decimal.Decimal(y)))
+                self.assertEqual(expected, decimal(x).divide(decimal(y), 20))
+        self.assertEqual(decimal("0.3333333333333333333333333333"), decimal(1) / decimal(3))
+        self.assertEqual(decimal("0.125"), decimal(8).reciprocal())
+        with self.assertRaises(ZeroDivisionError):
+            decimal(1) / decimal(0)
+
+    def test_divmod(self):
+        given = ("7", "-7", "7.5", "-7.5", "0.2", "-0.2", "3", "0.003")
+        for x in given:
+            for y in given:
+                quotient, remainder = divmod(decimal(x), decimal(y))
+                self.assertEqual(divmod(fractions.Fraction(x), fractions.Fraction(y)),
+                                 (fractions.Fraction(str(quotient.base)) / 10**quotient.order_of_magnitude,
+                                  fractions.Fraction(remainder.base, 1) / 10**remainder.order_of_magnitude))
+                self.assertEqual(quotient, decimal(x) // decimal(y))
+                self.assertEqual(remainder, decimal(x) % decimal(y))
+
+    def test_sqrt(self):
+        # The decimal module always rounds sqrt half-even, so truncate a more precise root instead
+        precise = stdlib_decimal.Context(prec=40)
+        context = stdlib_decimal.Context(prec=15, rounding=stdlib_decimal.ROUND_DOWN)
+        for x in ("2", "0.0004", "1e-5", "123456789", "0.5", "1e21"):
+            expected = decimal(context.plus(precise.sqrt(stdlib_decimal.Decimal(x))))
+            self.assertEqual(expected, decimal(x).sqrt(15))
+        self.assertEqual(Decimal(), Decimal().sqrt())
+        with self.assertRaises(ValueError):
+            decimal(-1).sqrt()
+
+    def test_newton_paths(self):
+        rng = random.Random(1120)
+        with mock.patch.object(danielexercise_decimal, "_NEWTON_DIVISION_BITS", 64):
+            for _ in range(100):
+                divisor = rng.getrandbits(rng.randint(1, 2000)) + 1
+                dividend = rng.getrandbits(rng.randint(1, 6000)) * rng.choice((1, -1))
+                divisor *= rng.choice((1, -1))
+                self.assertEqual(divmod(dividend, divisor), danielexercise_decimal._int_divmod(dividend, divisor))
+                self.assertEqual(math.isqrt(abs(dividend)), danielexercise_decimal._int_sqrt(abs(dividend)))
+            self.assertEqual(decimal(1).divide(decimal(7), 500), decimal("0." + "142857" * 84).divide(decimal(1), 500))
+
+
+class TestDecimalArrayMethods(unittest.TestCase):
+    def test_round_trip(self):
+        given = [decimal(x) for x in ("1.25", "-3", "0", "400", "0.001")]
+        column = DecimalArray.from_decimals(given)
+        self.assertEqual(3, column.order_of_magnitude)
+        self.assertEqual([1250, -3000, 0, 400000, 1], list(column.bases))
+        self.assertEqual("q", column.bases.typecode)
+        self.assertEqual(given, column.to_decimals())
+        self.assertEqual(given[3], column[3])
+
+    def test_big_bases_fall_back_to_ints(self):
+        given = [decimal("1" * 30), decimal("0.5")]
+        column = DecimalArray.from_decimals(given)
+        self.assertIsInstance(column.bases, list)
+        self.assertEqual(given, column.to_decimals())
+        self.assertEqual(given[0] + given[1], column.sum())
+
+    def test_bulk_operations(self):
+        given1 = [decimal(x) for x in ("1.25", "-3", "2", "0.5")]
+        given2 = [decimal(x) for x in ("0.1", "4", "2", "10")]
+        column1 = DecimalArray.from_decimals(given1)
+        column2 = DecimalArray.from_decimals(given2)
+        self.assertEqual(decimal("0.75"), column1.sum())
+        self.assertEqual(decimal("-2.875"), column1.dot(column2))
+        self.assertEqual([x + y for x, y in zip(given1, given2)], (column1 + column2).to_decimals())
+        self.assertEqual([x - y for x, y in zip(given1, given2)], (column1 - column2).to_decimals())
+        self.assertEqual([x * y for x, y in zip(given1, given2)], (column1 * column2).to_decimals())
+        self.assertEqual([x * decimal("0.2") for x in given1], column1.scale(decimal("0.2")).to_decimals())
+        self.assertEqual([False, True, False, True], column1.lt(column2))
+        self.assertEqual([False, False, True, False], column1.eq(column2))
+        self.assertEqual([True, False, True, True], column1.ge(decimal("0.5")))
+        with self.assertRaises(ValueError):
+            column1 + DecimalArray([1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+# Compact binary storage for danielexercise_decimal values
+# Exports:
+#   - encode_decimal(value: Decimal) -> bytes
+#   - decode_decimal(data: bytes-like, offset: int = 0) -> (Decimal, int)
+#   - write_decimal_column(file: BinaryIO, values: Iterable[Decimal]) -> None
+#   - DecimalColumnReader
+#     - DecimalColumnReader(path: str) -> DecimalColumnReader
+#     - __len__() -> int
+#     - __getitem__(index: int) -> Decimal
+#     - __iter__() -> Iterator[Decimal]
+#     - to_decimal_array() -> DecimalArray
+#     - close() -> None
+#
+# A value is the zigzag varint of its order_of_magnitude, the varint byte length of its base,
+# then the base in little-endian two's complement.
+#
+# A column file is a 32-byte header: magic, layout, 7 padding bytes, order_of_magnitude as int64 and count as uint64.
+# The fixed layout is followed by count little-endian int64 bases that all share the header's order_of_magnitude.
+# The variable layout is followed by count uint64 absolute offsets, then the encoded values.
+
+from array import array
+from typing import BinaryIO, Iterable, Iterator
+import mmap
+import struct
+import sys
+from danielexercise_decimal import Decimal, DecimalArray
+
+
+#LIBRARY
+_MAGIC = b"DDECCOL1"
+_HEADER = struct.Struct("<8sB7xqQ")
+_FIXED_LAYOUT = 0
+_VARIABLE_LAYOUT = 1
+_INT64 = struct.Struct("<q")
+_UINT64 = struct.Struct("<Q")
+
+
+def _encode_varint(value: int, out: bytearray) -> None:
+    """
+    _encode_varint(value: int, out: bytearray) -> None; value >= 0
+
+    Appends the value to out, 7 bits per byte, least significant first.
+    """
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varint(data, offset: int) -> (int, int):
+    """
+    _decode_varint(data: bytes-like, offset: int) -> (value: int, next_offset: int)
+
+    Returns the varint starting at the offset and the offset just past it.
+    Raises ValueError if the data ends in the middle of the varint.
+    """
+    value = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[offset]
+        except IndexError:
+            raise ValueError("Truncated varint") from None
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_decimal(value: Decimal) -> bytes:
+    """
+    encode_decimal(value: Decimal) -> encoded: bytes
+
+    Returns the compact binary encoding of the Decimal.
+    """
+    if not isinstance(value, Decimal):
+        raise TypeError
+    out = bytearray()
+    mag = value.order_of_magnitude
+    _encode_varint(mag << 1 if mag >= 0 else (-mag << 1) - 1, out)
+    length = (value.base.bit_length() + 8) // 8 if value.base else 0
+    _encode_varint(length, out)
+    out += value.base.to_bytes(length, "little", signed=True)
+    return bytes(out)
+
+
+def decode_decimal(data, offset: int = 0) -> (Decimal, int):
+    """
+    decode_decimal(data: bytes-like, offset: int) -> (value: Decimal, next_offset: int)
+
+    Returns the Decimal encoded at the offset and the offset just past it.
+    Raises ValueError if the data is truncated.
+    """
+    zigzag, offset = _decode_varint(data, offset)
+    mag = zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+    length, offset = _decode_varint(data, offset)
+    end = offset + length
+    if end > len(data):
+        raise ValueError("Truncated base")
+    base = int.from_bytes(data[offset:end], "little", signed=True)
+    return Decimal(base, mag), end
+
+
+def write_decimal_column(file: BinaryIO, values: Iterable[Decimal]) -> None:
+    """
+    write_decimal_column(file: BinaryIO, values: Iterable[Decimal]) -> None
+
+    Writes the Decimals to the binary file as a column.
+    If every base fits in 64 bits at a shared order_of_magnitude, the fixed-width layout is used.
+    """
+    values = list(values)
+    column = DecimalArray.from_decimals(values)
+    if isinstance(column.bases, array):
+        bases = column.bases
+        if sys.byteorder != "little":
+            bases = array("q", bases)
+            bases.byteswap()
+        file.write(_HEADER.pack(_MAGIC, _FIXED_LAYOUT, column.order_of_magnitude, len(bases)))
+        file.write(bases.tobytes())
+        return
+
+    encoded = [encode_decimal(x) for x in values]
+    offsets = bytearray()
+    offset = _HEADER.size + _UINT64.size * len(encoded)
+    for record in encoded:
+        offsets += _UINT64.pack(offset)
+        offset += len(record)
+    file.write(_HEADER.pack(_MAGIC, _VARIABLE_LAYOUT, 0, len(encoded)))
+    file.write(offsets)
+    for record in encoded:
+        file.write(record)
+
+
+class DecimalColumnReader:
+    """
+    Read-only view of a column file written by write_decimal_column().
+    The file is memory-mapped and each value is only decoded when it is indexed.
+    """
+    _file: BinaryIO
+    _map: mmap.mmap
+    _layout: int
+    _order_of_magnitude: int
+    _count: int
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        try:
+            # Mapping an empty file raises ValueError
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Not a decimal column file") from None
+        try:
+            magic, self._layout, self._order_of_magnitude, self._count = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = None
+        if magic != _MAGIC or self._layout not in (_FIXED_LAYOUT, _VARIABLE_LAYOUT):
+            self.close()
+            raise ValueError("Not a decimal column file")
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "DecimalColumnReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Decimal:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError
+        slot = _HEADER.size + 8 * index
+        if self._layout == _FIXED_LAYOUT:
+            return Decimal(_INT64.unpack_from(self._map, slot)[0], self._order_of_magnitude)
+        return decode_decimal(self._map, _UINT64.unpack_from(self._map, slot)[0])[0]
+
+    def __iter__(self) -> Iterator[Decimal]:
+        for index in range(self._count):
+            yield self[index]
+
+    def to_decimal_array(self) -> DecimalArray:
+        """
+        to_decimal_array(self) -> column: DecimalArray
+
+        Returns the whole column, copying the fixed-width layout in one block.
+        """
+        if self._layout != _FIXED_LAYOUT:
+            return DecimalArray.from_decimals(self)
+        bases = array("q")
+        bases.frombytes(self._map[_HEADER.size:_HEADER.size + 8 * self._count])
+        if sys.byteorder != "little":
+            bases.byteswap()
+        result = DecimalArray((), self._order_of_magnitude)
+        result.bases = bases
+        return result
@@ -0,0 +1,62 @@
+# Test the binary storage functions in danielexercise_decimalio
+# Type: Unit Tests
+
+import os
+import tempfile
+import unittest
+from danielexercise_decimal import decimal
+from danielexercise_decimalio import encode_decimal, decode_decimal, write_decimal_column, DecimalColumnReader
+
+
+class TestDecimalIOMethods(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_encode_round_trip(self):
+        given = [decimal(x) for x in ("0", "1", "-1", "127", "-128", "128", "1.25", "-0.001", "1e300", "-1e-300")]
+        data = b"".join(encode_decimal(x) for x in given)
+        offset = 0
+        for expected in given:
+            actual, offset = decode_decimal(data, offset)
+            self.assertEqual(expected, actual)
+        self.assertEqual(len(data), offset)
+        self.assertEqual(b"\x04\x01\x7d", encode_decimal(decimal("1.25")))
+        with self.assertRaises(ValueError):
+            decode_decimal(encode_decimal(decimal("1.25"))[:-1])
+
+    def test_fixed_column(self):
+        given = [decimal(x) for x in ("1.25", "-3", "0", "400", "0.001")]
+        with open(self.path, "wb") as file:
+            write_decimal_column(file, given)
+        self.assertEqual(32 + 8 * len(given), os.path.getsize(self.path))
+        with DecimalColumnReader(self.path) as reader:
+            self.assertEqual(len(given), len(reader))
+            self.assertEqual(given[3], reader[3])
+            self.assertEqual(given[-1], reader[-1])
+            self.assertEqual(given, list(reader))
+            self.assertEqual(given, reader.to_decimal_array().to_decimals())
+            with self.assertRaises(IndexError):
+                reader[len(given)]
+
+    def test_variable_column(self):
+        given = [decimal(x) for x in ("1e-30", "1e30", "-7.5", "0")]
+        with open(self.path, "wb") as file:
+            write_decimal_column(file, given)
+        with DecimalColumnReader(self.path) as reader:
+            self.assertEqual(given[1], reader[1])
+            self.assertEqual(given, list(reader))
+            self.assertEqual(given, reader.to_decimal_array().to_decimals())
+
+    def test_not_a_column(self):
+        with open(self.path, "wb") as file:
+            file.write(b"{DanielDecimal 123 / 10**2 }")
+        with self.assertRaises(ValueError):
+            DecimalColumnReader(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
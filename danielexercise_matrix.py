@@ -1,41 +1,143 @@
 # Matrix utilities
 
-from typing import List, Callable, TypeVar
+from array import array
+import operator
+import os
+from typing import Iterator, List, Callable, Optional, Tuple, TypeVar, Union
+from danielexercise_decimal import Decimal, DecimalArray
+from danielexercise_numpy import load_numpy
 
 
 T = TypeVar("T")
 
 
+# Set to False to always use the pure-Python implementations even when NumPy is installed
+USE_NUMPY = True
+
+# multiply_matrices converts nested lists to NumPy arrays from this many entries per operand.
+# Entrywise transformers and transpose only dispatch NumPy arrays or as_array calls,
+# because converting nested lists costs as much as the pure-Python loop.
+NUMPY_MIN_ENTRIES = 4096
+
+# int entries are only given to vectorized pair transformers when they are smaller than this,
+# so that one addition or multiplication cannot overflow int64
+_NUMPY_ENTRYWISE_INT_BOUND = 1 << 31
+
+
+def _is_numpy_array(mat) -> bool:
+    return type(mat).__module__ == "numpy"
+
+
+def _as_lists(mat) -> List[List[T]]:
+    """
+    _as_lists(mat: List[List[T]] | numpy.ndarray) -> orig: List[List[T]]
+
+    Returns NumPy arrays as nested lists of Python numbers, so the pure-Python paths cannot overflow.
+    """
+    return mat.tolist() if _is_numpy_array(mat) else mat
+
+
+def _max_magnitude(array_) -> int:
+    """
+    _max_magnitude(array_: numpy.ndarray) -> magnitude: int; array_.size > 0
+
+    Returns the largest absolute value of a NumPy integer array as a Python int.
+    NumPy's abs() cannot be used, because the absolute value of the smallest int64 wraps back to itself.
+    """
+    return max(-int(array_.min()), int(array_.max()))
+
+
+def _numpy_operands(as_array: bool, *origs) -> Optional[list]:
+    """
+    _numpy_operands(as_array: bool, *origs: List[List[T]] | numpy.ndarray) -> arrays: Optional[List[numpy.ndarray]]
+
+    Returns the matrices as NumPy int or float arrays, or None if NumPy is not installed
+    or if they hold other types, such as Decimal, which are never dispatched.
+    Raises ImportError if as_array is True but NumPy is not installed.
+    """
+    numpy = load_numpy()
+    if numpy is None:
+        if as_array:
+            raise ImportError("as_array=True requires NumPy")
+        return None
+    arrays = []
+    for orig in origs:
+        try:
+            converted = numpy.asarray(orig)
+        except (ValueError, OverflowError, TypeError):
+            return None
+        if converted.ndim != 2 or converted.dtype.kind not in "iuf":
+            return None
+        arrays.append(converted)
+    return arrays
+
+
+def _numpy_result(numpy_result, as_array: bool):
+    """
+    _numpy_result(numpy_result: numpy.ndarray, as_array: bool) -> result: List[List[T]] | numpy.ndarray
+
+    Returns the NumPy result as it was asked for.
+    """
+    return numpy_result if as_array else numpy_result.tolist()
+
+
+def _python_result(result: List[List[T]], as_array: bool):
+    """
+    _python_result(result: List[List[T]], as_array: bool) -> result: List[List[T]] | numpy.ndarray
+
+    Returns the pure-Python result as it was asked for. Exact entries such as Decimal become an object array.
+    """
+    if not as_array:
+        return result
+    return load_numpy().array(result, dtype=object if result and result[0] and
+                               not isinstance(result[0][0], (int, float)) else None)
+
+
 def generate_entrywise_matrix_transformer_with_pair_transformer(
-        pair_transformer: Callable[[T, T], T]) ->\
+        pair_transformer: Callable[[T, T], T], vectorized: bool = False) ->\
         Callable[[List[List[T]], List[List[T]]], List[List[T]]]:
     """
     generate_entrywise_matrix_transformer_with_pair_transformer(
-        pair_transformer: Callable[[T, T], T]) ->
+        pair_transformer: Callable[[T, T], T], vectorized: bool) ->
         matrix_transformer_func: Callable[[List[List[T]], List[List[T]]], List[List[T]]]:
 
     Returns a parsing that takes a prompt string and uses this function's argument error string and parser.
+    If vectorized is True, pair_transformer must also work on whole NumPy arrays, like operator.add,
+    and int or float NumPy arrays are then transformed by NumPy.
     """
-    def result(orig1: List[List[T]], orig2: List[List[T]]) -> List[List[T]]:
+    def result(orig1: List[List[T]], orig2: List[List[T]], as_array: bool = False) -> List[List[T]]:
         """
-        result(orig1: List[List[T]], orig2: List[List[T]]) -> transformed: List[List[T]],
+        result(orig1: List[List[T]], orig2: List[List[T]], as_array: bool) -> transformed: List[List[T]],
             len(orig1) == len(orig2) == len(transformed)
 
         Returns a new matrix with values computed by a function taking values
         from the same position in the original matrices.
+        If as_array is True, the result is a NumPy array instead.
+        If either matrix is a LazyMatrix, the result is a LazyMatrix that is only computed when evaluated.
         """
-        return [[pair_transformer(value1, value2) for value1, value2 in zip(row1, row2)]
-                for row1, row2 in zip(orig1, orig2)]
+        if isinstance(orig1, LazyMatrix) or isinstance(orig2, LazyMatrix):
+            return lazy(orig1).apply(pair_transformer, orig2)
+        if as_array or (vectorized and USE_NUMPY and (_is_numpy_array(orig1) or _is_numpy_array(orig2))):
+            arrays = _numpy_operands(as_array, orig1, orig2)
+            if arrays is not None and vectorized and arrays[0].shape == arrays[1].shape:
+                if all(array_.dtype.kind == "f" or not array_.size or
+                       _max_magnitude(array_) < _NUMPY_ENTRYWISE_INT_BOUND for array_ in arrays):
+                    return _numpy_result(pair_transformer(arrays[0], arrays[1]), as_array)
+        return _python_result([[pair_transformer(value1, value2) for value1, value2 in zip(row1, row2)]
+                               for row1, row2 in zip(_as_lists(orig1), _as_lists(orig2))], as_array)
     return result
 
 
-sum_matrices = generate_entrywise_matrix_transformer_with_pair_transformer(lambda x, y: x + y)
+sum_matrices = generate_entrywise_matrix_transformer_with_pair_transformer(operator.add, vectorized=True)
 sum_matrices.__doc__ = """
-    sum_matrices(orig1: List[List[T]], orig2: List[List[T]]) -> sum: List[List[T]],
+    sum_matrices(orig1: List[List[T]], orig2: List[List[T]], as_array: bool) -> sum: List[List[T]],
         len(orig1) == len(orig2) == len(transformed)
 
     Returns a new matrix with values computed by summing values
     from the same position in the original matrices.
+    int or float NumPy arrays are summed by NumPy.
+    If as_array is True, the result is a NumPy array instead.
+    If either matrix is a LazyMatrix, the result is a LazyMatrix that is only computed when evaluated.
     """
 
 
@@ -45,18 +147,43 @@ def matdim(mat: List[List]) -> (int, int):
     return len(mat), len(mat[0])
 
 
-def multiply_matrices(orig1: List[List[T]], orig2: List[List[T]]) -> List[List[T]]:
+def multiply_matrices(orig1: List[List[T]], orig2: List[List[T]], as_array: bool = False) -> List[List[T]]:
     """
-    multiply_matrices(orig1: List[List[T]], orig2: List[List[T]]) -> product: List[List[T]],
+    multiply_matrices(orig1: List[List[T]], orig2: List[List[T]], as_array: bool) -> product: List[List[T]],
         matdim(orig1) == matdim(orig2)[::-1]
 
     Returns a new matrix with values computed by a function taking values
     from the same position in the original matrices.
+    Large int or float matrices are multiplied by NumPy when it is installed,
+    unless the int entries are large enough for the int64 sums to overflow.
+    Matrices of Decimal are multiplied by multiply_decimal_matrices.
+    If as_array is True, the result is a NumPy array instead.
+    Raises ValueError if the number of columns of orig1 is not the number of rows of orig2.
     """
-    l1 = len(orig1)
-    w1 = len(orig1[0])
-    w2 = len(orig2[0])
-    result = [[sum(orig1[x][a] * orig2[a][y] for a in range(w1)) for y in range(w2)] for x in range(l1)]
+    arrays = None
+    if as_array or (USE_NUMPY and (_is_numpy_array(orig1) or _is_numpy_array(orig2) or
+                                   len(orig2) and min(len(orig1), len(orig2[0])) * len(orig2) >= NUMPY_MIN_ENTRIES)):
+        arrays = _numpy_operands(as_array, orig1, orig2)
+    if arrays is not None and arrays[0].shape[1] == arrays[1].shape[0]:
+        left, right = arrays
+        if left.dtype.kind == "f" or right.dtype.kind == "f" or not left.size or not right.size or \
+                _max_magnitude(left) * _max_magnitude(right) * left.shape[1] < 1 << 63:
+            return _numpy_result(left @ right, as_array)
+    # The shapes are read before the conversion because a NumPy array with no rows loses its columns as a list
+    l1, w1 = orig1.shape if _is_numpy_array(orig1) else matdim(orig1)
+    l2, w2 = orig2.shape if _is_numpy_array(orig2) else matdim(orig2)
+    orig1 = _as_lists(orig1)
+    orig2 = _as_lists(orig2)
+    if w1 != l2:
+        raise ValueError("The number of columns of orig1 must be the number of rows of orig2")
+    if not w1 or not w2:
+        return _python_result([[0] * w2 for _ in range(l1)], as_array)
+    if _all_decimals(orig1) and _all_decimals(orig2):
+        return _python_result(multiply_decimal_matrices(orig1, orig2), as_array)
+    columns = transpose(orig2)
+    # Each sum starts from the first product instead of 0 so that Decimal entries work too
+    result = [[sum(products, next(products)) for products in (map(operator.mul, row, column) for column in columns)]
+              for row in orig1]
     # result = []
     # for x in range(l1):
     #     row = []
@@ -66,18 +193,1096 @@ def multiply_matrices(orig1: List[List[T]], orig2: List[List[T]]) -> List[List[T
     #             acc += orig1[x][a] * orig2[a][y]
     #         row.append(acc)
     #     result.append(row)
-    return result
+    return _python_result(result, as_array)
+
+
+def _all_decimals(orig: List[List]) -> bool:
+    return all(type(value) is Decimal for row in orig for value in row)
+
+
+def multiply_decimal_matrices(orig1: List[List[Decimal]], orig2: List[List[Decimal]]) -> List[List[Decimal]]:
+    """
+    multiply_decimal_matrices(orig1: List[List[Decimal]], orig2: List[List[Decimal]]) -> product: List[List[Decimal]],
+        matdim(product) == (matdim(orig1)[0], matdim(orig2)[1])
+
+    Returns orig1 times orig2, exactly equal to multiplying and summing the Decimals one by one.
+    Each matrix is scaled to integer bases sharing one order_of_magnitude,
+    the products are summed as plain ints, and Decimals are only built for the entries of the product.
+    Raises ValueError if the number of columns of orig1 is not the number of rows of orig2.
+    """
+    l1, w1 = matdim(orig1)
+    l2, w2 = matdim(orig2)
+    if w1 != l2:
+        raise ValueError("The number of columns of orig1 must be the number of rows of orig2")
+    if not w1:
+        return [[Decimal()] * w2 for _ in range(l1)]
+    scaled1 = DecimalArray.from_decimals(value for row in orig1 for value in row)
+    scaled2 = DecimalArray.from_decimals(value for row in orig2 for value in row)
+    bases1 = list(scaled1.bases)
+    bases2 = list(scaled2.bases)
+    rows = [bases1[x * w1:(x + 1) * w1] for x in range(l1)]
+    columns = [bases2[y::w2] for y in range(w2)]
+    product = DecimalArray([sum(map(operator.mul, row, column)) for row in rows for column in columns],
+                           scaled1.order_of_magnitude + scaled2.order_of_magnitude).to_decimals()
+    return [product[x * w2:(x + 1) * w2] for x in range(l1)]
 
 
 #LIBRARY
-def transpose(orig: List[List[T]]) -> List[List[T]]:
+def transpose(orig: List[List[T]], as_array: bool = False) -> List[List[T]]:
     """
-    transpose(orig: List[List[T]]) -> transposed: List[List[T]]
+    transpose(orig: List[List[T]], as_array: bool) -> transposed: List[List[T]]
 
-    Returns a matrix representing the original matrix but transposed
+    Returns a matrix representing the original matrix but transposed.
+    NumPy arrays are transposed by NumPy. If as_array is True, the result is a NumPy array instead.
+    A LazyMatrix is transposed lazily.
     """
+    if isinstance(orig, LazyMatrix):
+        return orig.transpose()
+    if as_array or (USE_NUMPY and _is_numpy_array(orig)):
+        arrays = _numpy_operands(as_array, orig)
+        if arrays is not None:
+            return _numpy_result(arrays[0].T, as_array)
     if not orig:
-        return []
-    l = len(orig)
-    w = len(orig[0])
-    return [[orig[orig_x][orig_y] for orig_x in range(l)] for orig_y in range(w)]
+        return _python_result([], as_array)
+    return _python_result([list(column) for column in zip(*orig)], as_array)
+
+
+# Size of the square tiles of the output computed together by multiply_matrices_tiled
+MULTIPLY_BLOCK_SIZE = 64
+
+# multiply_matrices_tiled uses Strassen's algorithm while every dimension is at least this large
+STRASSEN_THRESHOLD = 128
+
+
+def _multiply_tiled(orig1: List[List[T]], columns: List[List[T]], block_size: int) -> List[List[T]]:
+    """
+    _multiply_tiled(orig1: List[List[T]], columns: List[List[T]], block_size: int) -> product: List[List[T]],
+        columns == transpose(orig2), len(orig1[0]) == len(columns[0]) > 0
+
+    Returns orig1 times orig2, computing the output one band of block_size columns at a time,
+    so the rows of the transposed right operand in use stay in cache.
+    """
+    result = [[None] * len(columns) for _ in orig1]
+    for start in range(0, len(columns), block_size):
+        block = columns[start:start + block_size]
+        for row, out in zip(orig1, result):
+            for y, column in enumerate(block, start):
+                products = map(operator.mul, row, column)
+                out[y] = sum(products, next(products))
+    return result
+
+
+def _add_blocks(orig1: List[List[T]], orig2: List[List[T]]) -> List[List[T]]:
+    return [list(map(operator.add, row1, row2)) for row1, row2 in zip(orig1, orig2)]
+
+
+def _sub_blocks(orig1: List[List[T]], orig2: List[List[T]]) -> List[List[T]]:
+    return [list(map(operator.sub, row1, row2)) for row1, row2 in zip(orig1, orig2)]
+
+
+def _pad(orig: List[List[T]], l: int, w: int, zero: T) -> List[List[T]]:
+    """
+    _pad(orig: List[List[T]], l: int, w: int, zero: T) -> padded: List[List[T]], matdim(padded) == (l, w)
+
+    Returns the matrix extended with zeros to the new dimensions.
+    """
+    padded = [row + [zero] * (w - len(row)) for row in orig]
+    padded.extend([zero] * w for _ in range(l - len(orig)))
+    return padded
+
+
+def _multiply_strassen(orig1: List[List[T]], orig2: List[List[T]], block_size: int, threshold: int) -> List[List[T]]:
+    """
+    _multiply_strassen(orig1: List[List[T]], orig2: List[List[T]], block_size: int, threshold: int) ->
+        product: List[List[T]]
+
+    Returns orig1 times orig2 with one level of Strassen's algorithm, recursing into the 7 half-size products.
+    Odd dimensions are padded with a zero of the same type as the entries.
+    """
+    l1, w1 = matdim(orig1)
+    w2 = len(orig2[0])
+    if min(l1, w1, w2) < threshold:
+        return _multiply_tiled(orig1, transpose(orig2), block_size)
+    half_l1 = (l1 + 1) // 2
+    half_w1 = (w1 + 1) // 2
+    half_w2 = (w2 + 1) // 2
+    zero = orig1[0][0] - orig1[0][0]
+    a = _pad(orig1, 2 * half_l1, 2 * half_w1, zero) if l1 % 2 or w1 % 2 else orig1
+    b = _pad(orig2, 2 * half_w1, 2 * half_w2, zero) if w1 % 2 or w2 % 2 else orig2
+    a11 = [row[:half_w1] for row in a[:half_l1]]
+    a12 = [row[half_w1:] for row in a[:half_l1]]
+    a21 = [row[:half_w1] for row in a[half_l1:]]
+    a22 = [row[half_w1:] for row in a[half_l1:]]
+    b11 = [row[:half_w2] for row in b[:half_w1]]
+    b12 = [row[half_w2:] for row in b[:half_w1]]
+    b21 = [row[:half_w2] for row in b[half_w1:]]
+    b22 = [row[half_w2:] for row in b[half_w1:]]
+
+    def recurse(x: List[List[T]], y: List[List[T]]) -> List[List[T]]:
+        return _multiply_strassen(x, y, block_size, threshold)
+    m1 = recurse(_add_blocks(a11, a22), _add_blocks(b11, b22))
+    m2 = recurse(_add_blocks(a21, a22), b11)
+    m3 = recurse(a11, _sub_blocks(b12, b22))
+    m4 = recurse(a22, _sub_blocks(b21, b11))
+    m5 = recurse(_add_blocks(a11, a12), b22)
+    m6 = recurse(_sub_blocks(a21, a11), _add_blocks(b11, b12))
+    m7 = recurse(_sub_blocks(a12, a22), _add_blocks(b21, b22))
+    c11 = _add_blocks(_sub_blocks(_add_blocks(m1, m4), m5), m7)
+    c12 = _add_blocks(m3, m5)
+    c21 = _add_blocks(m2, m4)
+    c22 = _add_blocks(_add_blocks(_sub_blocks(m1, m2), m3), m6)
+    top = [(row1 + row2)[:w2] for row1, row2 in zip(c11, c12)]
+    bottom = [(row1 + row2)[:w2] for row1, row2 in zip(c21[:l1 - half_l1], c22)]
+    return top + bottom
+
+
+def multiply_matrices_tiled(orig1: List[List[T]], orig2: List[List[T]], block_size: int = MULTIPLY_BLOCK_SIZE,
+                            strassen_threshold: int = STRASSEN_THRESHOLD) -> List[List[T]]:
+    """
+    multiply_matrices_tiled(orig1: List[List[T]], orig2: List[List[T]], block_size: int, strassen_threshold: int) ->
+        product: List[List[T]], matdim(product) == (matdim(orig1)[0], matdim(orig2)[1])
+
+    Returns the same product as multiply_matrices, faster for large matrices.
+    The right operand is transposed once so every entry is a row times a row, computed in tiles of block_size columns.
+    While every dimension is at least strassen_threshold, Strassen's algorithm does 7 half-size products instead of 8.
+    Results are exact for int and Decimal entries. For float entries they can differ in the last bits.
+    Raises ValueError if the number of columns of orig1 is not the number of rows of orig2.
+    """
+    l1, w1 = matdim(orig1)
+    l2, w2 = matdim(orig2)
+    if w1 != l2:
+        raise ValueError("The number of columns of orig1 must be the number of rows of orig2")
+    if not w1 or not w2:
+        return [[0] * w2 for _ in range(l1)]
+    if min(l1, w1, w2) >= strassen_threshold:
+        return _multiply_strassen(orig1, orig2, block_size, strassen_threshold)
+    return _multiply_tiled(orig1, transpose(orig2), block_size)
+
+
+# parallel_multiply_matrices stays in this process below this many scalar multiplications
+PARALLEL_MIN_WORK = 4_000_000
+
+# Columns of the right operand, set in each worker process by _init_multiply_worker
+_worker_columns: List[List] = []
+
+
+def _init_multiply_worker(shared_name: Optional[str], typecode: str, w1: int, w2: int,
+                          columns: Optional[List[List[T]]]) -> None:
+    """
+    _init_multiply_worker(shared_name: Optional[str], typecode: str, w1: int, w2: int,
+        columns: Optional[List[List[T]]]) -> None
+
+    Loads the transposed right operand once per worker process,
+    from the shared memory block if there is one, otherwise from the pickled columns.
+    """
+    global _worker_columns
+    if shared_name is None:
+        _worker_columns = columns
+        return
+    from multiprocessing import shared_memory
+    block = shared_memory.SharedMemory(name=shared_name)
+    try:
+        flat = block.buf.cast(typecode)
+        _worker_columns = [flat[y * w1:(y + 1) * w1].tolist() for y in range(w2)]
+        flat.release()
+    finally:
+        block.close()
+
+
+def _multiply_band(band: List[List[T]]) -> List[List[T]]:
+    return _multiply_tiled(band, _worker_columns, MULTIPLY_BLOCK_SIZE)
+
+
+def _shared_typecode(columns: List[List]) -> Optional[str]:
+    """
+    _shared_typecode(columns: List[List]) -> typecode: Optional[str]
+
+    Returns 'q' if every entry is an int that fits in 64 bits, 'd' if every entry is a float, otherwise None.
+    """
+    if all(type(value) is int for column in columns for value in column):
+        if all(-(1 << 63) <= value < 1 << 63 for column in columns for value in column):
+            return "q"
+    elif all(type(value) is float for column in columns for value in column):
+        return "d"
+    return None
+
+
+def parallel_multiply_matrices(orig1: List[List[T]], orig2: List[List[T]], workers: Optional[int] = None,
+                               min_work: int = PARALLEL_MIN_WORK) -> List[List[T]]:
+    """
+    parallel_multiply_matrices(orig1: List[List[T]], orig2: List[List[T]], workers: Optional[int], min_work: int) ->
+        product: List[List[T]], matdim(product) == (matdim(orig1)[0], matdim(orig2)[1])
+
+    Returns orig1 times orig2, computing bands of rows of orig1 on a pool of worker processes.
+    The transposed orig2 is placed in shared memory once when its entries are all int64 or all float,
+    and is otherwise sent once to each worker instead of once per band.
+    Below min_work scalar multiplications, or with a single worker, everything is done in this process.
+    Every entry is computed by the same kernel as multiply_matrices_tiled without Strassen,
+    so the result does not depend on the number of workers.
+    Raises ValueError if the number of columns of orig1 is not the number of rows of orig2.
+    """
+    l1, w1 = matdim(orig1)
+    l2, w2 = matdim(orig2)
+    if w1 != l2:
+        raise ValueError("The number of columns of orig1 must be the number of rows of orig2")
+    if not w1 or not w2:
+        return [[0] * w2 for _ in range(l1)]
+    columns = transpose(orig2)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, l1)
+    if workers <= 1 or l1 * w1 * w2 < min_work:
+        return _multiply_tiled(orig1, columns, MULTIPLY_BLOCK_SIZE)
+
+    # Imported here so that modules using only the serial operations do not load the process machinery
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+    band_count = min(l1, workers * 4)
+    bands = [orig1[l1 * i // band_count:l1 * (i + 1) // band_count] for i in range(band_count)]
+    typecode = _shared_typecode(columns)
+    block = None
+    try:
+        if typecode is None:
+            initargs = (None, "", w1, w2, columns)
+        else:
+            flat = array(typecode, [value for column in columns for value in column])
+            block = shared_memory.SharedMemory(create=True, size=max(1, len(flat) * flat.itemsize))
+            block.buf[:len(flat) * flat.itemsize] = flat.tobytes()
+            initargs = (block.name, typecode, w1, w2, None)
+        with ProcessPoolExecutor(workers, initializer=_init_multiply_worker, initargs=initargs) as executor:
+            result = []
+            for band_result in executor.map(_multiply_band, bands):
+                result.extend(band_result)
+            return result
+    finally:
+        if block is not None:
+            block.close()
+            block.unlink()
+
+
+def _flat_storage(values: list, typecode: Optional[str]) -> Union[array, list]:
+    """
+    _flat_storage(values: list, typecode: Optional[str]) -> data: array | list
+
+    Returns the values in the flat storage for the typecode.
+    If typecode is None, it is 'q' for ints that fit in 64 bits, 'd' for floats and ints, and a list otherwise.
+    """
+    if typecode is None:
+        if all(type(x) is int for x in values):
+            try:
+                return array("q", values)
+            except OverflowError:
+                return values
+        if all(type(x) in (int, float) for x in values):
+            return array("d", values)
+        return values
+    if typecode == "O":
+        return values
+    return array(typecode, values)
+
+
+class Matrix:
+    """
+    A matrix whose elements live in one flat array('d'), array('q') or list.
+    Element (x, y) is data[offset + x * strides[0] + y * strides[1]],
+    so transposes and row or column slices are views that share the data instead of copying it.
+    """
+    __slots__ = ("data", "shape", "strides", "offset")
+    data: Union[array, list]
+    shape: Tuple[int, int]
+    strides: Tuple[int, int]
+    offset: int
+
+    def __init__(self, data: Union[array, list], shape: Tuple[int, int],
+                 strides: Optional[Tuple[int, int]] = None, offset: int = 0) -> None:
+        if strides is None:
+            strides = (shape[1], 1)
+        self.data = data
+        self.shape = shape
+        self.strides = strides
+        self.offset = offset
+
+    @classmethod
+    def from_lists(cls, orig: List[List[T]], typecode: Optional[str] = None) -> "Matrix":
+        """
+        from_lists(orig: List[List[T]], typecode: Optional[str]) -> matrix: Matrix
+
+        Returns a contiguous Matrix with the values of the nested-list matrix.
+        typecode is 'q', 'd' or 'O' for a list of objects, and is guessed from the values if it is None.
+        Raises ValueError if the rows do not all have the same length.
+        """
+        l, w = matdim(orig)
+        if any(len(row) != w for row in orig):
+            raise ValueError("All the rows of a matrix must have the same length")
+        return cls(_flat_storage([value for row in orig for value in row], typecode), (l, w))
+
+    def to_lists(self) -> List[List[T]]:
+        """
+        to_lists(self) -> orig: List[List[T]]
+
+        Returns the matrix in the nested-list format used by the rest of this module.
+        """
+        data = self.data
+        l, w = self.shape
+        stride_x, stride_y = self.strides
+        # The stride between rows is 0 when there are no columns, so the row starts are not a range
+        starts = [self.offset + x * stride_x for x in range(l)]
+        if stride_y == 1:
+            return [data[start:start + w].tolist() if isinstance(data, array) else data[start:start + w]
+                    for start in starts]
+        return [[data[start + y * stride_y] for y in range(w)] for start in starts]
+
+    @property
+    def typecode(self) -> str:
+        return self.data.typecode if isinstance(self.data, array) else "O"
+
+    def is_contiguous(self) -> bool:
+        """
+        is_contiguous(self) -> contiguous: bool
+
+        Returns True if the elements are stored row after row without gaps.
+        """
+        return self.strides == (self.shape[1], 1) or self.shape[0] * self.shape[1] <= 1
+
+    def copy(self) -> "Matrix":
+        """
+        copy(self) -> matrix: Matrix
+
+        Returns a contiguous Matrix with its own copy of the elements.
+        """
+        l, w = self.shape
+        if self.is_contiguous():
+            values = self.data[self.offset:self.offset + l * w]
+        else:
+            values = [value for row in self.to_lists() for value in row]
+        return Matrix(_flat_storage(list(values), self.typecode), (l, w))
+
+    def _index(self, x: int, y: int) -> int:
+        """
+        _index(self, x: int, y: int) -> index: int
+
+        Returns the position of element (x, y) in the data.
+        Raises IndexError if it is outside the matrix.
+        """
+        l, w = self.shape
+        if x < 0:
+            x += l
+        if y < 0:
+            y += w
+        if not (0 <= x < l and 0 <= y < w):
+            raise IndexError
+        return self.offset + x * self.strides[0] + y * self.strides[1]
+
+    def __getitem__(self, key: Tuple):
+        x, y = key
+        if isinstance(x, slice) or isinstance(y, slice):
+            return self._view(x, y)
+        return self.data[self._index(x, y)]
+
+    def __setitem__(self, key: Tuple[int, int], value) -> None:
+        x, y = key
+        self.data[self._index(x, y)] = value
+
+    def _view(self, x: Union[int, slice], y: Union[int, slice]) -> "Matrix":
+        """
+        _view(self, x: int | slice, y: int | slice) -> view: Matrix
+
+        Returns a view of the rows and columns selected by the indices or slices.
+        """
+        offset = self.offset
+        shape = []
+        strides = []
+        for key, length, stride in zip((x, y), self.shape, self.strides):
+            if isinstance(key, slice):
+                start, stop, step = key.indices(length)
+                shape.append(len(range(start, stop, step)))
+                strides.append(stride * step)
+            else:
+                if key < 0:
+                    key += length
+                if not 0 <= key < length:
+                    raise IndexError
+                start = key
+                shape.append(1)
+                strides.append(stride)
+            offset += start * stride
+        return Matrix(self.data, (shape[0], shape[1]), (strides[0], strides[1]), offset)
+
+    def row(self, x: int) -> "Matrix":
+        """
+        row(self, x: int) -> view: Matrix, matdim(view) == (1, w)
+
+        Returns a view of row x.
+        """
+        return self._view(x, slice(None))
+
+    def column(self, y: int) -> "Matrix":
+        """
+        column(self, y: int) -> view: Matrix, matdim(view) == (l, 1)
+
+        Returns a view of column y.
+        """
+        return self._view(slice(None), y)
+
+    def transpose(self) -> "Matrix":
+        """
+        transpose(self) -> view: Matrix
+
+        Returns a view of this matrix transposed, without copying any element.
+        """
+        return Matrix(self.data, self.shape[::-1], self.strides[::-1], self.offset)
+
+    @property
+    def T(self) -> "Matrix":
+        return self.transpose()
+
+    def memoryview(self) -> memoryview:
+        """
+        memoryview(self) -> view: memoryview
+
+        Returns a 2-dimensional memoryview of the elements, copying them first if they are not contiguous.
+        Raises TypeError for matrices of objects, which have no buffer.
+        """
+        matrix = self if self.is_contiguous() else self.copy()
+        if not isinstance(matrix.data, array):
+            raise TypeError("A matrix of objects has no buffer")
+        l, w = matrix.shape
+        flat = memoryview(matrix.data)[matrix.offset:matrix.offset + l * w]
+        return flat.cast("B").cast(matrix.data.typecode, [l, w])
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return self.memoryview()
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Matrix):
+            return NotImplemented
+        return self.shape == other.shape and self.to_lists() == other.to_lists()
+
+    def __repr__(self) -> str:
+        return "Matrix(" + repr(self.to_lists()) + ")"
+
+
+class CooMatrix:
+    """
+    A sparse matrix stored as coordinate triplets, for building sparse matrices one entry at a time.
+    Entries appended at the same position are summed by to_csr().
+    """
+    __slots__ = ("shape", "rows", "columns", "values", "zero")
+    shape: Tuple[int, int]
+    rows: array
+    columns: array
+    values: list
+    zero: T
+
+    def __init__(self, shape: Tuple[int, int], zero: T = 0) -> None:
+        self.shape = shape
+        self.rows = array("q")
+        self.columns = array("q")
+        self.values = []
+        self.zero = zero
+
+    @classmethod
+    def from_lists(cls, orig: List[List[T]], zero: T = 0) -> "CooMatrix":
+        """
+        from_lists(orig: List[List[T]], zero: T) -> matrix: CooMatrix
+
+        Returns a CooMatrix with the entries of the nested-list matrix that are not equal to zero.
+        """
+        result = cls(matdim(orig), zero)
+        for x, row in enumerate(orig):
+            for y, value in enumerate(row):
+                if value != zero:
+                    result.append(x, y, value)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, x: int, y: int, value: T) -> None:
+        """
+        append(self, x: int, y: int, value: T) -> None
+
+        Adds value to the entry at row x and column y.
+        Raises IndexError if the position is outside the matrix.
+        """
+        if not (0 <= x < self.shape[0] and 0 <= y < self.shape[1]):
+            raise IndexError
+        self.rows.append(x)
+        self.columns.append(y)
+        self.values.append(value)
+
+    def to_csr(self) -> "CsrMatrix":
+        """
+        to_csr(self) -> matrix: CsrMatrix
+
+        Returns the matrix in compressed sparse row format, summing duplicate entries and dropping zeros.
+        """
+        rows = self.rows
+        columns = self.columns
+        values = self.values
+        zero = self.zero
+        indptr = array("q", [0])
+        indices = array("q")
+        data = []
+        order = sorted(range(len(values)), key=lambda i: (rows[i], columns[i]))
+        position = 0
+        for x in range(self.shape[0]):
+            while position < len(order) and rows[order[position]] == x:
+                i = order[position]
+                y = columns[i]
+                value = values[i]
+                position += 1
+                while position < len(order) and rows[order[position]] == x and columns[order[position]] == y:
+                    value = value + values[order[position]]
+                    position += 1
+                if value != zero:
+                    indices.append(y)
+                    data.append(value)
+            indptr.append(len(data))
+        return CsrMatrix(self.shape, indptr, indices, _flat_storage(data, None), zero)
+
+    def to_lists(self) -> List[List[T]]:
+        return self.to_csr().to_lists()
+
+
+class _CompressedMatrix:
+    """
+    Storage shared by CsrMatrix and CscMatrix.
+    The entries of major line i are data[indptr[i]:indptr[i + 1]],
+    at the minor positions indices[indptr[i]:indptr[i + 1]], in increasing order.
+    Positions without an entry hold zero.
+    """
+    __slots__ = ("shape", "indptr", "indices", "data", "zero")
+    shape: Tuple[int, int]
+    indptr: array
+    indices: array
+    data: Union[array, list]
+    zero: T
+
+    def __init__(self, shape: Tuple[int, int], indptr: array, indices: array, data: Union[array, list],
+                 zero: T = 0) -> None:
+        self.shape = shape
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.zero = zero
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def density(self) -> float:
+        """
+        density(self) -> density: float
+
+        Returns the fraction of the positions that hold an entry.
+        """
+        l, w = self.shape
+        return len(self.data) / (l * w) if l * w else 0.0
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, _CompressedMatrix):
+            return NotImplemented
+        return self.shape == other.shape and self.to_lists() == other.to_lists()
+
+    def __repr__(self) -> str:
+        return type(self).__name__ + "(" + repr(self.to_lists()) + ")"
+
+
+class CsrMatrix(_CompressedMatrix):
+    """
+    A sparse matrix in compressed sparse row format.
+    Sums and products with nested-list matrices return nested-list matrices,
+    and sums and products with other sparse matrices return CsrMatrix.
+    Use zero=Decimal() for Decimal entries, since Decimal never equals the int 0.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_lists(cls, orig: List[List[T]], zero: T = 0) -> "CsrMatrix":
+        """
+        from_lists(orig: List[List[T]], zero: T) -> matrix: CsrMatrix
+
+        Returns a CsrMatrix with the entries of the nested-list matrix that are not equal to zero.
+        """
+        indptr = array("q", [0])
+        indices = array("q")
+        data = []
+        for row in orig:
+            for y, value in enumerate(row):
+                if value != zero:
+                    indices.append(y)
+                    data.append(value)
+            indptr.append(len(data))
+        return cls(matdim(orig), indptr, indices, _flat_storage(data, None), zero)
+
+    def to_lists(self) -> List[List[T]]:
+        """
+        to_lists(self) -> orig: List[List[T]]
+
+        Returns the matrix in the nested-list format used by the rest of this module.
+        """
+        indptr = self.indptr
+        indices = self.indices
+        data = self.data
+        result = []
+        for x in range(self.shape[0]):
+            row = [self.zero] * self.shape[1]
+            for k in range(indptr[x], indptr[x + 1]):
+                row[indices[k]] = data[k]
+            result.append(row)
+        return result
+
+    def to_csr(self) -> "CsrMatrix":
+        return self
+
+    def to_csc(self) -> "CscMatrix":
+        """
+        to_csc(self) -> matrix: CscMatrix
+
+        Returns the same matrix in compressed sparse column format.
+        """
+        return self.transpose().to_csr().transpose()
+
+    def transpose(self) -> "CscMatrix":
+        """
+        transpose(self) -> transposed: CscMatrix
+
+        Returns the transposed matrix in compressed sparse column format, sharing the storage of this one.
+        """
+        return CscMatrix(self.shape[::-1], self.indptr, self.indices, self.data, self.zero)
+
+    @property
+    def T(self) -> "CscMatrix":
+        return self.transpose()
+
+    def __add__(self, other):
+        if isinstance(other, _CompressedMatrix):
+            return self._add_sparse(other.to_csr())
+        if isinstance(other, list):
+            return self._add_dense(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return self._add_dense(other)
+        return NotImplemented
+
+    def _add_dense(self, orig: List[List[T]]) -> List[List[T]]:
+        """
+        _add_dense(self, orig: List[List[T]]) -> sum: List[List[T]]
+
+        Returns the nested-list sum, only touching the positions that hold an entry.
+        """
+        if matdim(orig) != self.shape:
+            raise ValueError("Only matrices of the same shape can be summed")
+        indptr = self.indptr
+        indices = self.indices
+        data = self.data
+        result = [list(row) for row in orig]
+        for x, row in enumerate(result):
+            for k in range(indptr[x], indptr[x + 1]):
+                row[indices[k]] += data[k]
+        return result
+
+    def _add_sparse(self, other: "CsrMatrix") -> "CsrMatrix":
+        """
+        _add_sparse(self, other: CsrMatrix) -> sum: CsrMatrix
+
+        Returns the sparse sum, merging the sorted entries of each row and dropping the ones that cancel out.
+        """
+        if other.shape != self.shape:
+            raise ValueError("Only matrices of the same shape can be summed")
+        zero = self.zero
+        indptr = array("q", [0])
+        indices = array("q")
+        data = []
+        for x in range(self.shape[0]):
+            i, end1 = self.indptr[x], self.indptr[x + 1]
+            j, end2 = other.indptr[x], other.indptr[x + 1]
+            while i < end1 or j < end2:
+                y1 = self.indices[i] if i < end1 else self.shape[1]
+                y2 = other.indices[j] if j < end2 else self.shape[1]
+                if y1 < y2:
+                    y, value = y1, self.data[i]
+                    i += 1
+                elif y2 < y1:
+                    y, value = y2, other.data[j]
+                    j += 1
+                else:
+                    y, value = y1, self.data[i] + other.data[j]
+                    i += 1
+                    j += 1
+                if value != zero:
+                    indices.append(y)
+                    data.append(value)
+            indptr.append(len(data))
+        return CsrMatrix(self.shape, indptr, indices, _flat_storage(data, None), zero)
+
+    def __matmul__(self, other):
+        if isinstance(other, _CompressedMatrix):
+            return self._multiply_sparse(other.to_csr())
+        if isinstance(other, list):
+            return self._multiply_dense(other)
+        return NotImplemented
+
+    def __rmatmul__(self, other):
+        if isinstance(other, list):
+            return self._dense_multiply(other)
+        return NotImplemented
+
+    def _multiply_dense(self, orig: List[List[T]]) -> List[List[T]]:
+        """
+        _multiply_dense(self, orig: List[List[T]]) -> product: List[List[T]]
+
+        Returns the nested-list product of this matrix times orig,
+        adding each entry times its row of orig to the row of the product.
+        """
+        l2, w2 = matdim(orig)
+        if self.shape[1] != l2:
+            raise ValueError("The number of columns of orig1 must be the number of rows of orig2")
+        indptr = self.indptr
+        indices = self.indices
+        data = self.data
+        result = []
+        for x in range(self.shape[0]):
+            start, end = indptr[x], indptr[x + 1]
+            if start == end:
+                result.append([self.zero] * w2)
+                continue
+            value = data[start]
+            row = [value * other for other in orig[indices[start]]]
+            for k in range(start + 1, end):
+                value = data[k]
+                row = [acc + value * other for acc, other in zip(row, orig[indices[k]])]
+            result.append(row)
+        return result
+
+    def _dense_multiply(self, orig: List[List[T]]) -> List[List[T]]:
+        """
+        _dense_multiply(self, orig: List[List[T]]) -> product: List[List[T]]
+
+        Returns the nested-list product of orig times this matrix,
+        skipping the zeros of orig and the positions of this matrix without an entry.
+        """
+        l1, w1 = matdim(orig)
+        if w1 != self.shape[0]:
+            raise ValueError("The number of columns of orig1 must be the number of rows of orig2")
+        indptr = self.indptr
+        indices = self.indices
+        data = self.data
+        zero = self.zero
+        result = []
+        for orig_row in orig:
+            row = [zero] * self.shape[1]
+            for a, value in enumerate(orig_row):
+                if value != zero:
+                    for k in range(indptr[a], indptr[a + 1]):
+                        row[indices[k]] += value * data[k]
+            result.append(row)
+        return result
+
+    def _multiply_sparse(self, other: "CsrMatrix") -> "CsrMatrix":
+        """
+        _multiply_sparse(self, other: CsrMatrix) -> product: CsrMatrix
+
+        Returns the sparse product, accumulating each row of the product in a dict (Gustavson's algorithm).
+        """
+        if self.shape[1] != other.shape[0]:
+            raise ValueError("The number of columns of orig1 must be the number of rows of orig2")
+        zero = self.zero
+        indptr = array("q", [0])
+        indices = array("q")
+        data = []
+        for x in range(self.shape[0]):
+            row = {}
+            for k in range(self.indptr[x], self.indptr[x + 1]):
+                value = self.data[k]
+                a = self.indices[k]
+                for j in range(other.indptr[a], other.indptr[a + 1]):
+                    y = other.indices[j]
+                    product = value * other.data[j]
+                    row[y] = row[y] + product if y in row else product
+            for y in sorted(row):
+                if row[y] != zero:
+                    indices.append(y)
+                    data.append(row[y])
+            indptr.append(len(data))
+        return CsrMatrix((self.shape[0], other.shape[1]), indptr, indices, _flat_storage(data, None), zero)
+
+
+class CscMatrix(_CompressedMatrix):
+    """
+    A sparse matrix in compressed sparse column format, which is the CSR format of its transpose.
+    Sums and products are computed in CSR format.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_lists(cls, orig: List[List[T]], zero: T = 0) -> "CscMatrix":
+        """
+        from_lists(orig: List[List[T]], zero: T) -> matrix: CscMatrix
+
+        Returns a CscMatrix with the entries of the nested-list matrix that are not equal to zero.
+        """
+        # The shape comes from orig, because the transpose of a matrix without columns has no rows to count
+        columns = CsrMatrix.from_lists(transpose(orig), zero)
+        return cls(matdim(orig), columns.indptr, columns.indices, columns.data, zero)
+
+    def to_lists(self) -> List[List[T]]:
+        return transpose(self.transpose().to_lists()) if self.shape[1] else [[] for _ in range(self.shape[0])]
+
+    def to_csr(self) -> CsrMatrix:
+        """
+        to_csr(self) -> matrix: CsrMatrix
+
+        Returns the same matrix in compressed sparse row format, bucketing the entries by row.
+        Scanning the columns in order leaves the entries of each row sorted by column.
+        """
+        l, w = self.shape
+        counts = [0] * (l + 1)
+        for x in self.indices:
+            counts[x + 1] += 1
+        for x in range(l):
+            counts[x + 1] += counts[x]
+        indptr = array("q", counts)
+        indices = array("q", bytes(8 * len(self.data)))
+        data = [None] * len(self.data)
+        for y in range(w):
+            for k in range(self.indptr[y], self.indptr[y + 1]):
+                x = self.indices[k]
+                position = counts[x]
+                counts[x] = position + 1
+                indices[position] = y
+                data[position] = self.data[k]
+        return CsrMatrix(self.shape, indptr, indices, _flat_storage(data, None), self.zero)
+
+    def to_csc(self) -> "CscMatrix":
+        return self
+
+    def transpose(self) -> CsrMatrix:
+        """
+        transpose(self) -> transposed: CsrMatrix
+
+        Returns the transposed matrix in compressed sparse row format, sharing the storage of this one.
+        """
+        return CsrMatrix(self.shape[::-1], self.indptr, self.indices, self.data, self.zero)
+
+    @property
+    def T(self) -> CsrMatrix:
+        return self.transpose()
+
+    def __add__(self, other):
+        return self.to_csr().__add__(other)
+
+    def __radd__(self, other):
+        return self.to_csr().__radd__(other)
+
+    def __matmul__(self, other):
+        return self.to_csr().__matmul__(other)
+
+    def __rmatmul__(self, other):
+        return self.to_csr().__rmatmul__(other)
+
+
+# Operation of the LazyMatrix nodes that transpose their operand
+_TRANSPOSE = "transpose"
+
+
+def lazy(orig: List[List[T]]) -> "LazyMatrix":
+    """
+    lazy(orig: List[List[T]]) -> expression: LazyMatrix
+
+    Returns a LazyMatrix that stands for the nested-list matrix or NumPy array,
+    to start an expression that is only computed by LazyMatrix.evaluate().
+    """
+    if isinstance(orig, LazyMatrix):
+        return orig
+    orig = _as_lists(orig)
+    return LazyMatrix(None, (orig,), matdim(orig))
+
+
+class LazyMatrix:
+    """
+    A recorded expression of entrywise operations and transposes over nested-list matrices.
+    Entrywise transformers from generate_entrywise_matrix_transformer_with_pair_transformer, such as sum_matrices,
+    and transpose return a LazyMatrix when given one, instead of computing an intermediate matrix.
+    evaluate() computes the whole expression in one pass, one output row at a time,
+    so no intermediate matrix is ever built, and transposes cancel out instead of being computed.
+    """
+    __slots__ = ("_op", "_operands", "shape")
+    _op: Union[None, str, Callable]
+    _operands: tuple
+    shape: Tuple[int, int]
+
+    def __init__(self, op: Union[None, str, Callable], operands: tuple, shape: Tuple[int, int]) -> None:
+        self._op = op
+        self._operands = operands
+        self.shape = shape
+
+    def apply(self, pair_transformer: Callable[[T, T], T], other) -> "LazyMatrix":
+        """
+        apply(self, pair_transformer: Callable[[T, T], T], other: LazyMatrix | List[List[T]]) -> expression: LazyMatrix
+
+        Returns the expression whose values are pair_transformer of the values at the same position in both operands.
+        Raises ValueError if the operands do not have the same shape.
+        """
+        other = lazy(other)
+        if other.shape != self.shape:
+            raise ValueError("Only matrices of the same shape can be transformed entrywise")
+        return LazyMatrix(pair_transformer, (self, other), self.shape)
+
+    def map(self, transformer: Callable[[T], T]) -> "LazyMatrix":
+        """
+        map(self, transformer: Callable[[T], T]) -> expression: LazyMatrix
+
+        Returns the expression whose values are transformer of the values of this one.
+        """
+        return LazyMatrix(transformer, (self,), self.shape)
+
+    def __add__(self, other) -> "LazyMatrix":
+        return self.apply(operator.add, other)
+
+    def __radd__(self, other) -> "LazyMatrix":
+        return lazy(other).apply(operator.add, self)
+
+    def __sub__(self, other) -> "LazyMatrix":
+        return self.apply(operator.sub, other)
+
+    def __rsub__(self, other) -> "LazyMatrix":
+        return lazy(other).apply(operator.sub, self)
+
+    def __mul__(self, other) -> "LazyMatrix":
+        return self.apply(operator.mul, other)
+
+    def __rmul__(self, other) -> "LazyMatrix":
+        return lazy(other).apply(operator.mul, self)
+
+    def transpose(self) -> "LazyMatrix":
+        """
+        transpose(self) -> expression: LazyMatrix
+
+        Returns the transposed expression. Transposing a transpose returns the original expression.
+        """
+        if self._op == _TRANSPOSE:
+            return self._operands[0]
+        return LazyMatrix(_TRANSPOSE, (self,), self.shape[::-1])
+
+    @property
+    def T(self) -> "LazyMatrix":
+        return self.transpose()
+
+    def _row_function(self, transposed: bool) -> Callable[[int], Iterator]:
+        """
+        _row_function(self, transposed: bool) -> row: Callable[[int], Iterator[T]]
+
+        Returns a function giving an iterator over row x of this expression, or of its transpose if transposed is True.
+        Transposes are pushed down to the leaves, so that only leaves are ever read by column.
+        """
+        op = self._op
+        if op is None:
+            orig = self._operands[0]
+            if transposed:
+                return lambda x: map(operator.itemgetter(x), orig)
+            return lambda x: iter(orig[x])
+        if op == _TRANSPOSE:
+            return self._operands[0]._row_function(not transposed)
+        rows = [operand._row_function(transposed) for operand in self._operands]
+        if len(rows) == 1:
+            row = rows[0]
+            return lambda x: map(op, row(x))
+        row1, row2 = rows
+        return lambda x: map(op, row1(x), row2(x))
+
+    def evaluate(self) -> List[List[T]]:
+        """
+        evaluate(self) -> result: List[List[T]]
+
+        Returns the value of the expression as a nested-list matrix, computing each output row in one fused pass.
+        """
+        row = self._row_function(False)
+        return [list(row(x)) for x in range(self.shape[0])]
+
+    def __repr__(self) -> str:
+        return "LazyMatrix(" + repr(self.evaluate()) + ")"
+
+
+def _matrix_chain_order(dims: List[int]) -> (int, List[List[int]]):
+    """
+    _matrix_chain_order(dims: List[int]) -> (multiplications: int, splits: List[List[int]])
+
+    Matrix i of the chain is dims[i] by dims[i + 1].
+    Returns the fewest scalar multiplications needed to multiply the whole chain,
+    and the table where splits[i][j] is the last split of the cheapest product of matrices i to j.
+    """
+    n = len(dims) - 1
+    costs = [[0] * n for _ in range(n)]
+    splits = [[0] * n for _ in range(n)]
+    for length in range(1, n):
+        for i in range(n - length):
+            j = i + length
+            best = None
+            for split in range(i, j):
+                cost = costs[i][split] + costs[split + 1][j] + dims[i] * dims[split + 1] * dims[j + 1]
+                if best is None or cost < best:
+                    best = cost
+                    splits[i][j] = split
+            costs[i][j] = best
+    return costs[0][n - 1], splits
+
+
+def multiply_chain(*mats: List[List[T]]) -> (List[List[T]], int):
+    """
+    multiply_chain(*mats: List[List[T]]) -> (product: List[List[T]], multiplications: int)
+
+    Returns the product of the matrices in order, and the number of scalar multiplications it took.
+    The order of the products is chosen by dynamic programming over the shapes,
+    which can take far fewer multiplications than going from left to right.
+    Raises ValueError if no matrices are given or if two neighbours cannot be multiplied.
+    """
+    if not mats:
+        raise ValueError("multiply_chain needs at least one matrix")
+    shapes = [matdim(orig) for orig in mats]
+    for (_, w1), (l2, _) in zip(shapes, shapes[1:]):
+        if w1 != l2:
+            raise ValueError("The number of columns of each matrix must be the number of rows of the next")
+    multiplications, splits = _matrix_chain_order([shapes[0][0]] + [w for _, w in shapes])
+
+    def product(i: int, j: int) -> List[List[T]]:
+        if i == j:
+            return mats[i]
+        split = splits[i][j]
+        return multiply_matrices(product(i, split), product(split + 1, j))
+    return product(0, len(mats) - 1), multiplications
+
+
+def matrix_power(orig: List[List[T]], k: int) -> (List[List[T]], int):
+    """
+    matrix_power(orig: List[List[T]], k: int) -> (power: List[List[T]], multiplications: int), k >= 0
+
+    Returns orig multiplied by itself k times, and the number of scalar multiplications it took.
+    Squares and multiplies by the bits of k, so it takes about 2 * log2(k) matrix products instead of k - 1.
+    For k == 0, returns the identity matrix of ints.
+    Raises ValueError if the matrix is not square or k is negative.
+    """
+    n, w = matdim(orig)
+    if n != w:
+        raise ValueError("Only square matrices have powers")
+    if k < 0:
+        raise ValueError("The exponent must not be negative")
+    if k == 0:
+        return [[int(x == y) for y in range(n)] for x in range(n)], 0
+    result = None
+    multiplications = 0
+    square = orig
+    while True:
+        if k & 1:
+            if result is None:
+                result = square
+            else:
+                result = multiply_matrices(result, square)
+                multiplications += n ** 3
+        k >>= 1
+        if not k:
+            return result, multiplications
+        square = multiply_matrices(square, square)
+        multiplications += n ** 3
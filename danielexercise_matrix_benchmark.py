@@ -0,0 +1,227 @@
+# Benchmark the matrix multiplications of danielexercise_matrix
+# Type: Benchmark
+
+import operator
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, List
+from unittest import mock
+import danielexercise_matrix
+from danielexercise_numpy import load_numpy
+from danielexercise_matrix import multiply_matrices, multiply_matrices_tiled, parallel_multiply_matrices,\
+    CsrMatrix, lazy, sum_matrices, multiply_chain, matrix_power, multiply_decimal_matrices
+from danielexercise_decimal import Decimal
+
+
+def _random_matrix(rng: random.Random, l: int, w: int, kind: str) -> List[List]:
+    """
+    _random_matrix(rng: random.Random, l: int, w: int, kind: str) -> matrix: List[List[int | float]]
+
+    Returns an l by w matrix of small ints or of floats.
+    """
+    if kind == "int":
+        return [[rng.randint(-100, 100) for _ in range(w)] for _ in range(l)]
+    return [[rng.random() for _ in range(w)] for _ in range(l)]
+
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def multiply_sizes(sizes=(64, 128, 256, 512), kinds=("int", "float"), repeat: int = 3) -> None:
+    """
+    multiply_sizes(sizes: Iterable[int], kinds: Iterable[str], repeat: int) -> None
+
+    Prints the time of multiply_matrices, the tiled multiply without Strassen and the tiled multiply with Strassen
+    for square matrices of each size.
+    """
+    rng = random.Random(1120)
+    print("size  kind   multiply_s  tiled_s  strassen_s")
+    for size in sizes:
+        for kind in kinds:
+            given1 = _random_matrix(rng, size, size, kind)
+            given2 = _random_matrix(rng, size, size, kind)
+            plain = _best(lambda: multiply_matrices(given1, given2), repeat)
+            tiled = _best(lambda: multiply_matrices_tiled(given1, given2, strassen_threshold=sys.maxsize), repeat)
+            strassen = _best(lambda: multiply_matrices_tiled(given1, given2), repeat)
+            print("%4d  %-5s %11.3f %8.3f %11.3f" % (size, kind, plain, tiled, strassen))
+
+
+def numpy_dispatch(sizes=(64, 256, 512), repeat: int = 3) -> None:
+    """
+    numpy_dispatch(sizes: Iterable[int], repeat: int) -> None
+
+    Prints the time of multiply_matrices on float lists with and without the NumPy dispatch,
+    including the conversions to and from nested lists.
+    """
+    if load_numpy() is None:
+        print("NumPy is not installed, skipping the dispatch benchmark")
+        return
+    rng = random.Random(1120)
+    print("size  python_s  numpy_s")
+    for size in sizes:
+        given = _random_matrix(rng, size, size, "float")
+        with mock.patch.object(danielexercise_matrix, "USE_NUMPY", False):
+            python = _best(lambda: multiply_matrices(given, given), repeat)
+        numpy = _best(lambda: multiply_matrices(given, given), repeat)
+        print("%4d %9.3f %8.3f" % (size, python, numpy))
+
+
+def parallel_workers(size: int = 384, repeat: int = 3) -> None:
+    """
+    parallel_workers(size: int, repeat: int) -> None
+
+    Prints the time of parallel_multiply_matrices on square int and float matrices for 1, 2, 4, ... workers,
+    up to the number of cores.
+    """
+    rng = random.Random(1120)
+    cores = os.cpu_count() or 1
+    print("cores: %d" % cores)
+    print("workers  kind   seconds  speedup")
+    for kind in ("int", "float"):
+        given1 = _random_matrix(rng, size, size, kind)
+        given2 = _random_matrix(rng, size, size, kind)
+        workers = 1
+        serial = None
+        while True:
+            seconds = _best(lambda: parallel_multiply_matrices(given1, given2, workers, 0), repeat)
+            serial = serial or seconds
+            print("%7d  %-5s %8.3f %8.2f" % (workers, kind, seconds, serial / seconds))
+            if workers >= cores:
+                break
+            workers = min(workers * 2, cores)
+
+
+def sparse_densities(size: int = 300, densities=(0.001, 0.01, 0.05, 0.2, 0.5), repeat: int = 3) -> None:
+    """
+    sparse_densities(size: int, densities: Iterable[float], repeat: int) -> None
+
+    Prints the time of multiply_matrices and of the CSR sparse-dense and sparse-sparse products
+    for square int matrices with each fraction of nonzero entries.
+    The conversion to CSR is timed separately.
+    """
+    rng = random.Random(1120)
+    print("density  dense_s  to_csr_s  sparse@dense_s  sparse@sparse_s")
+    for density in densities:
+        given = [[rng.randint(-100, 100) if rng.random() < density else 0 for _ in range(size)] for _ in range(size)]
+        with mock.patch.object(danielexercise_matrix, "USE_NUMPY", False):
+            dense = _best(lambda: multiply_matrices(given, given), repeat)
+        convert = _best(lambda: CsrMatrix.from_lists(given), repeat)
+        sparse = CsrMatrix.from_lists(given)
+        sparse_dense = _best(lambda: sparse @ given, repeat)
+        sparse_sparse = _best(lambda: sparse @ sparse, repeat)
+        print("%7.3f %8.3f %9.3f %15.3f %16.3f" % (density, dense, convert, sparse_dense, sparse_sparse))
+
+
+def lazy_chain(size: int = 500, length: int = 8, repeat: int = 3) -> None:
+    """
+    lazy_chain(size: int, length: int, repeat: int) -> None
+
+    Prints the time and the peak memory of summing a chain of square float matrices
+    with nested sum_matrices calls and with one fused LazyMatrix evaluation.
+    """
+    rng = random.Random(1120)
+    given = [_random_matrix(rng, size, size, "float") for _ in range(length)]
+
+    def eager():
+        result = given[0]
+        for orig in given[1:]:
+            result = sum_matrices(result, orig)
+        return result
+
+    def fused():
+        result = lazy(given[0])
+        for orig in given[1:]:
+            result = sum_matrices(result, orig)
+        return result.evaluate()
+
+    print("chain of %d %dx%d sums" % (length - 1, size, size))
+    print("method  seconds  peak_MiB")
+    for name, func in (("eager", eager), ("lazy", fused)):
+        seconds = _best(func, repeat)
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("%-6s %8.3f %9.1f" % (name, seconds, peak / 2**20))
+
+
+def chain_and_power(dims=(200, 10, 200, 10, 200, 10, 200), size: int = 40, exponent: int = 64,
+                    repeat: int = 3) -> None:
+    """
+    chain_and_power(dims: Sequence[int], size: int, exponent: int, repeat: int) -> None
+
+    Prints the time and scalar multiplications of a chain of int matrices multiplied from left to right
+    and by multiply_chain, then of a power of a float matrix by repeated multiplication and by matrix_power.
+    """
+    rng = random.Random(1120)
+    given = [_random_matrix(rng, l, w, "int") for l, w in zip(dims, dims[1:])]
+
+    def left_to_right():
+        result = given[0]
+        for orig in given[1:]:
+            result = multiply_matrices(result, orig)
+        return result
+
+    naive = sum(dims[0] * l * w for l, w in zip(dims[1:], dims[2:]))
+    print("chain %s" % "x".join(map(str, dims)))
+    print("method          seconds  multiplications")
+    print("left_to_right %9.3f %16d" % (_best(left_to_right, repeat), naive))
+    print("multiply_chain%9.3f %16d" % (_best(lambda: multiply_chain(*given), repeat), multiply_chain(*given)[1]))
+
+    square = [[value / size for value in row] for row in _random_matrix(rng, size, size, "float")]
+
+    def repeated():
+        result = square
+        for _ in range(exponent - 1):
+            result = multiply_matrices(result, square)
+        return result
+
+    print("power %d of %dx%d" % (exponent, size, size))
+    print("repeated      %9.3f %16d" % (_best(repeated, repeat), (exponent - 1) * size ** 3))
+    print("matrix_power  %9.3f %16d" % (_best(lambda: matrix_power(square, exponent), repeat),
+                                        matrix_power(square, exponent)[1]))
+
+
+def decimal_multiply(sizes=(16, 32, 64), repeat: int = 3) -> None:
+    """
+    decimal_multiply(sizes: Iterable[int], repeat: int) -> None
+
+    Prints the time of multiplying square matrices of Decimals with two to four fractional digits,
+    one Decimal operation at a time and with the fixed-point multiply_decimal_matrices.
+    """
+    rng = random.Random(1120)
+    print("size  decimal_ops_s  fixed_point_s")
+    for size in sizes:
+        given = [[Decimal(rng.randint(-10**6, 10**6), rng.randint(2, 4)) for _ in range(size)] for _ in range(size)]
+        columns = list(zip(*given))
+
+        def one_by_one():
+            return [[sum(map(operator.mul, row[1:], column[1:]), row[0] * column[0]) for column in columns]
+                    for row in given]
+
+        print("%4d %14.3f %14.3f" % (size, _best(one_by_one, repeat),
+                                      _best(lambda: multiply_decimal_matrices(given, given), repeat)))
+
+
+def main() -> None:
+    multiply_sizes()
+    print()
+    numpy_dispatch()
+    print()
+    parallel_workers()
+    print()
+    sparse_densities()
+    print()
+    lazy_chain()
+    print()
+    chain_and_power()
+    print()
+    decimal_multiply()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
-# Test the transpose, sum_matrices, and multiply_matrices functions in danielexercise_matrix
+# Test the transpose, sum_matrices, and multiply_matrices functions and the matrix classes in danielexercise_matrix
 # Type: Unit Tests
 
+import operator
+import random
 import unittest
-from danielexercise_matrix import transpose, sum_matrices, multiply_matrices
+from unittest import mock
+from danielexercise_numpy import load_numpy
+from danielexercise_decimal import Decimal, decimal
+import danielexercise_matrix
+from danielexercise_matrix import transpose, sum_matrices, multiply_matrices, multiply_matrices_tiled,\
+    parallel_multiply_matrices, Matrix, CooMatrix, CsrMatrix, CscMatrix,\
+    LazyMatrix, lazy, multiply_chain, matrix_power, multiply_decimal_matrices,\
+    generate_entrywise_matrix_transformer_with_pair_transformer
 
 
 class TestMatrixMethods(unittest.TestCase):
@@ -52,6 +61,291 @@ class TestMatrixMethods(unittest.TestCase):
         actual = multiply_matrices(given1, given2)
         self.assertEqual(expected, actual)
 
+    def test_multiply_shapes(self):
+        with self.assertRaises(ValueError):
+            multiply_matrices([[1, 2]], [[1, 2]])
+        with self.assertRaises(ValueError):
+            multiply_matrices([[1, 2, 3], [4, 5, 6]], [[1, 2], [3, 4]])
+        with self.assertRaises(ValueError):
+            multiply_matrices([[]], [[1, 2]])
+        self.assertEqual([[], []], multiply_matrices([[], []], []))
+        self.assertEqual([], multiply_matrices([], []))
+
+    def test_multiply_tiled_matches(self):
+        rng = random.Random(1120)
+        for l1, w1, w2 in ((1, 1, 1), (5, 7, 3), (17, 9, 23), (33, 31, 29)):
+            given1 = [[rng.randint(-50, 50) for _ in range(w1)] for _ in range(l1)]
+            given2 = [[rng.randint(-50, 50) for _ in range(w2)] for _ in range(w1)]
+            expected = multiply_matrices(given1, given2)
+            self.assertEqual(expected, multiply_matrices_tiled(given1, given2, 4, 4))
+            self.assertEqual(expected, multiply_matrices_tiled(given1, given2, 8, 1000))
+        with self.assertRaises(ValueError):
+            multiply_matrices_tiled([[1, 2]], [[1, 2]])
+
+    def test_multiply_decimal(self):
+        given1 = [[decimal("0.5"), decimal("1.25"), decimal("-2")] for _ in range(5)]
+        given2 = [[decimal("0.1") * decimal(x + y) for y in range(5)] for x in range(3)]
+        expected = [[given1[x][0] * given2[0][y] + given1[x][1] * given2[1][y] + given1[x][2] * given2[2][y]
+                     for y in range(5)] for x in range(5)]
+        self.assertEqual(expected, multiply_matrices(given1, given2))
+        self.assertEqual(expected, multiply_matrices_tiled(given1, given2, 2, 2))
+        self.assertEqual(expected, parallel_multiply_matrices(given1, given2, 2, 0))
+
+    def test_multiply_decimal_fixed_point(self):
+        rng = random.Random(1120)
+        given1 = [[Decimal(rng.randint(-10**rng.randint(0, 25), 10**20), rng.randint(-5, 12)) for _ in range(6)]
+                  for _ in range(4)]
+        given2 = [[Decimal(rng.randint(-10**rng.randint(0, 25), 10**20), rng.randint(-5, 12)) for _ in range(3)]
+                  for _ in range(6)]
+        expected = multiply_matrices_tiled(given1, given2, 2, 1000)
+        actual = multiply_decimal_matrices(given1, given2)
+        self.assertEqual(expected, actual)
+        self.assertEqual([[(x.base, x.order_of_magnitude) for x in row] for row in expected],
+                         [[(x.base, x.order_of_magnitude) for x in row] for row in actual])
+        self.assertEqual(expected, multiply_matrices(given1, given2))
+        with self.assertRaises(ValueError):
+            multiply_decimal_matrices(given1, given1)
+
+    def test_parallel_multiply_matches(self):
+        rng = random.Random(1120)
+        given1 = [[rng.randint(-50, 50) for _ in range(9)] for _ in range(11)]
+        given2 = [[rng.randint(-50, 50) for _ in range(6)] for _ in range(9)]
+        expected = multiply_matrices(given1, given2)
+        for workers in (1, 2, 3):
+            self.assertEqual(expected, parallel_multiply_matrices(given1, given2, workers, 0))
+        given1 = [[rng.random() for _ in range(9)] for _ in range(11)]
+        self.assertEqual(parallel_multiply_matrices(given1, given2, 1),
+                         parallel_multiply_matrices(given1, given2, 3, 0))
+        with self.assertRaises(ValueError):
+            parallel_multiply_matrices([[1, 2]], [[1, 2]])
+
+
+@unittest.skipUnless(load_numpy(), "NumPy is not installed")
+class TestMatrixNumpyMethods(unittest.TestCase):
+    def test_dispatch_matches_python(self):
+        rng = random.Random(1120)
+        given1 = [[rng.randint(-50, 50) for _ in range(70)] for _ in range(60)]
+        given2 = [[rng.randint(-50, 50) for _ in range(70)] for _ in range(60)]
+        with mock.patch.object(danielexercise_matrix, "USE_NUMPY", False):
+            expected_sum = sum_matrices(given1, given2)
+            expected_product = multiply_matrices(given1, transpose(given2))
+        actual_sum = sum_matrices(given1, given2)
+        self.assertEqual(expected_sum, actual_sum)
+        self.assertIs(int, type(actual_sum[0][0]))
+        self.assertEqual(expected_product, multiply_matrices(given1, transpose(given2)))
+        self.assertEqual(expected_product, multiply_matrices(given1, transpose(given2, as_array=True),
+                                                             as_array=True).tolist())
+
+    def test_exact_fallback(self):
+        given = [[2 ** 40] * 80 for _ in range(80)]
+        expected = [[2 ** 80 * 80] * 80 for _ in range(80)]
+        self.assertEqual(expected, multiply_matrices(given, given))
+        smallest = load_numpy().array([[-2 ** 63, 1], [1, 1]])
+        self.assertEqual([[2 ** 126 + 1, 1 - 2 ** 63], [1 - 2 ** 63, 2]], multiply_matrices(smallest, smallest))
+        self.assertEqual([[-2 ** 64, 2], [2, 2]], sum_matrices(smallest, smallest))
+        decimals = [[decimal("0.1")] * 2]
+        self.assertEqual([[decimal("0.2")] * 2], sum_matrices(decimals, decimals, as_array=True).tolist())
+
+    def test_empty_inner_dimension(self):
+        numpy = load_numpy()
+        given1 = numpy.zeros((2, 0), dtype=numpy.int64)
+        given2 = numpy.zeros((0, 3), dtype=numpy.int64)
+        with mock.patch.object(danielexercise_matrix, "USE_NUMPY", False):
+            self.assertEqual([[0, 0, 0], [0, 0, 0]], multiply_matrices(given1, given2))
+        self.assertEqual([[0, 0, 0], [0, 0, 0]], multiply_matrices(given1, given2))
+
+    def test_vectorized_transformer(self):
+        transformer = generate_entrywise_matrix_transformer_with_pair_transformer(lambda x, y: x * 2 - y,
+                                                                                  vectorized=True)
+        given1 = [[x for x in range(100)] for _ in range(50)]
+        given2 = [[x * x for x in range(100)] for _ in range(50)]
+        actual = transformer(given1, given2)
+        self.assertEqual([[x * 2 - x * x for x in range(100)]] * 50, actual)
+        self.assertIs(int, type(actual[0][0]))
+        self.assertEqual((50, 100), transformer(given1, given2, as_array=True).shape)
+
+
+@unittest.skipIf(load_numpy(), "NumPy is installed")
+class TestMatrixWithoutNumpyMethods(unittest.TestCase):
+    def test_as_array_needs_numpy(self):
+        with self.assertRaises(ImportError):
+            transpose([[1]], as_array=True)
+
+
+class TestMatrixClassMethods(unittest.TestCase):
+    def test_round_trip(self):
+        given = [
+            [1, 2, 3],
+            [4, 5, 6],
+        ]
+        matrix = Matrix.from_lists(given)
+        self.assertEqual("q", matrix.typecode)
+        self.assertEqual(given, matrix.to_lists())
+        self.assertEqual("d", Matrix.from_lists([[1, 2.5]]).typecode)
+        self.assertEqual([[1.0, 2.0]], Matrix.from_lists([[1, 2]], "d").to_lists())
+        self.assertEqual("O", Matrix.from_lists([[decimal("1.5"), decimal("2")]]).typecode)
+        self.assertEqual("O", Matrix.from_lists([[1, 2 ** 70]]).typecode)
+        with self.assertRaises(ValueError):
+            Matrix.from_lists([[1, 2], [3]])
+
+    def test_empty(self):
+        for given, shape in (([], (0, 0)), ([[]], (1, 0)), ([[], []], (2, 0))):
+            matrix = Matrix.from_lists(given)
+            self.assertEqual(shape, matrix.shape)
+            self.assertEqual(given, matrix.to_lists())
+            self.assertEqual("Matrix(%r)" % given, repr(matrix))
+            self.assertEqual([], matrix.T.to_lists())
+
+    def test_views_share_data(self):
+        given = [
+            [1, 2, 3],
+            [4, 5, 6],
+        ]
+        matrix = Matrix.from_lists(given)
+        transposed = matrix.transpose()
+        self.assertIs(matrix.data, transposed.data)
+        self.assertEqual(transpose(given), transposed.to_lists())
+        self.assertEqual(given, transposed.T.to_lists())
+        self.assertEqual([[4, 5, 6]], matrix.row(1).to_lists())
+        self.assertEqual([[3], [6]], matrix.column(-1).to_lists())
+        self.assertEqual([[1, 3], [4, 6]], matrix[:, ::2].to_lists())
+        self.assertEqual([[2, 5]], transposed[1:2, :].to_lists())
+        transposed[2, 1] = 60
+        self.assertEqual(60, matrix[1, 2])
+        with self.assertRaises(IndexError):
+            matrix[2, 0]
+
+    def test_memoryview(self):
+        matrix = Matrix.from_lists([[1.5, 2.0], [3.0, 4.0]])
+        view = matrix.memoryview()
+        self.assertEqual((2, 2), view.shape)
+        self.assertEqual([[1.5, 2.0], [3.0, 4.0]], view.tolist())
+        self.assertEqual([[1.5, 3.0], [2.0, 4.0]], matrix.T.memoryview().tolist())
+        with self.assertRaises(TypeError):
+            Matrix.from_lists([[decimal("1")]]).memoryview()
+
+
+class TestSparseMatrixMethods(unittest.TestCase):
+    def random_sparse(self, rng, l, w):
+        return [[rng.randint(-5, 5) if rng.random() < 0.3 else 0 for _ in range(w)] for _ in range(l)]
+
+    def test_round_trip(self):
+        given = [[0, 2, 0], [0, 0, 0], [-1, 0, 3.5]]
+        actual = CsrMatrix.from_lists(given)
+        self.assertEqual([0, 1, 1, 3], list(actual.indptr))
+        self.assertEqual([1, 0, 2], list(actual.indices))
+        self.assertEqual(given, actual.to_lists())
+        self.assertEqual(given, CscMatrix.from_lists(given).to_lists())
+        self.assertEqual(transpose(given), actual.T.to_csr().to_lists())
+        self.assertEqual(given, actual.to_csc().to_csr().to_lists())
+        self.assertEqual(3 / 9, actual.density())
+        for given, shape in (([], (0, 0)), ([[]], (1, 0)), ([[], []], (2, 0))):
+            for cls in (CsrMatrix, CscMatrix, CooMatrix):
+                self.assertEqual(shape, cls.from_lists(given).shape)
+                self.assertEqual(given, cls.from_lists(given).to_lists())
+
+    def test_coo_sums_duplicates(self):
+        actual = CooMatrix((2, 3))
+        actual.append(1, 2, 5)
+        actual.append(0, 1, 1)
+        actual.append(1, 2, -2)
+        actual.append(0, 0, 4)
+        actual.append(0, 0, -4)
+        self.assertEqual([[0, 1, 0], [0, 0, 3]], actual.to_lists())
+        self.assertEqual(2, len(actual.to_csr()))
+        with self.assertRaises(IndexError):
+            actual.append(2, 0, 1)
+
+    def test_matches_dense(self):
+        rng = random.Random(1120)
+        for l, w, v in ((1, 1, 1), (5, 7, 3), (12, 9, 10)):
+            given1 = self.random_sparse(rng, l, w)
+            given2 = self.random_sparse(rng, w, v)
+            given3 = self.random_sparse(rng, l, w)
+            sparse1 = CsrMatrix.from_lists(given1)
+            sparse2 = CsrMatrix.from_lists(given2)
+            expected = multiply_matrices(given1, given2)
+            self.assertEqual(expected, sparse1 @ given2)
+            self.assertEqual(expected, given1 @ sparse2)
+            self.assertEqual(expected, (sparse1 @ sparse2).to_lists())
+            self.assertEqual(expected, (sparse1.to_csc() @ sparse2.to_csc()).to_lists())
+            expected = sum_matrices(given1, given3)
+            self.assertEqual(expected, sparse1 + given3)
+            self.assertEqual(expected, given3 + sparse1)
+            self.assertEqual(expected, (sparse1 + CscMatrix.from_lists(given3)).to_lists())
+        self.assertEqual(0, len(CsrMatrix.from_lists([[1, 2]]) + CsrMatrix.from_lists([[-1, -2]])))
+        with self.assertRaises(ValueError):
+            CsrMatrix.from_lists([[1, 2]]) @ [[1, 2]]
+
+    def test_decimal(self):
+        given = [[decimal("0.5"), Decimal()], [Decimal(), decimal("2")]]
+        expected = multiply_matrices(given, given)
+        sparse = CsrMatrix.from_lists(given, Decimal())
+        self.assertEqual(2, len(sparse))
+        self.assertEqual(expected, sparse @ given)
+        self.assertEqual(expected, given @ sparse)
+        self.assertEqual(expected, (sparse @ sparse).to_lists())
+
+
+class TestLazyMatrixMethods(unittest.TestCase):
+    def test_fused_chain(self):
+        given1 = [[1, 2, 3], [4, 5, 6]]
+        given2 = [[10, 20, 30], [40, 50, 60]]
+        given3 = [[1, 1, 1], [2, 2, 2]]
+        subtract = generate_entrywise_matrix_transformer_with_pair_transformer(lambda x, y: x - y)
+        expected = subtract(sum_matrices(sum_matrices(given1, given2), given3), given1)
+        actual = subtract(sum_matrices(sum_matrices(lazy(given1), given2), given3), given1)
+        self.assertIsInstance(actual, LazyMatrix)
+        self.assertEqual(expected, actual.evaluate())
+        self.assertEqual(expected, ((lazy(given1) + given2 + given3) - given1).evaluate())
+        self.assertEqual([[x * 2 for x in row] for row in given1], lazy(given1).map(lambda x: x * 2).evaluate())
+
+    def test_transposes(self):
+        given1 = [[1, 2, 3], [4, 5, 6]]
+        given2 = [[1, 2], [3, 4], [5, 6]]
+        expected = sum_matrices(transpose(given1), given2)
+        self.assertEqual(expected, transpose(lazy(given1)).apply(operator.add, given2).evaluate())
+        self.assertEqual(transpose(expected), (lazy(given1) + transpose(lazy(given2))).evaluate())
+        given = lazy(given1)
+        self.assertIs(given, given.T.T)
+        self.assertEqual(transpose(expected), transpose(lazy(given1).T + given2).evaluate())
+        self.assertEqual((3, 2), given.T.shape)
+        with self.assertRaises(ValueError):
+            given + given2
+
+
+class TestMatrixChainMethods(unittest.TestCase):
+    def test_multiply_chain(self):
+        rng = random.Random(1120)
+        # The chain from Introduction to Algorithms, whose cheapest order takes 15125 multiplications
+        dims = (30, 35, 15, 5, 10, 20, 25)
+        given = [[[rng.randint(-3, 3) for _ in range(w)] for _ in range(l)] for l, w in zip(dims, dims[1:])]
+        expected = given[0]
+        for orig in given[1:]:
+            expected = multiply_matrices(expected, orig)
+        actual, multiplications = multiply_chain(*given)
+        self.assertEqual(expected, actual)
+        self.assertEqual(15125, multiplications)
+        self.assertEqual((given[0], 0), multiply_chain(given[0]))
+        with self.assertRaises(ValueError):
+            multiply_chain(given[0], given[0])
+        with self.assertRaises(ValueError):
+            multiply_chain()
+
+    def test_matrix_power(self):
+        given = [[1, 1], [1, 0]]
+        expected = [[1, 0], [0, 1]]
+        for k in range(20):
+            actual, multiplications = matrix_power(given, k)
+            self.assertEqual(expected, actual)
+            self.assertEqual(8 * (k.bit_length() + bin(k).count("1") - 2) if k else 0, multiplications)
+            expected = multiply_matrices(expected, given)
+        self.assertEqual(354224848179261915075, matrix_power(given, 100)[0][0][1])
+        with self.assertRaises(ValueError):
+            matrix_power([[1, 2]], 2)
+        with self.assertRaises(ValueError):
+            matrix_power(given, -1)
+
 
 if __name__ == "__main__":
     unittest.main()
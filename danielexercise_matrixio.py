@@ -0,0 +1,298 @@
+# Disk-backed matrices for data larger than memory
+# Exports:
+#   - OUT_OF_CORE_MEMORY: int
+#   - create_matrix_file(path: str, shape: (int, int), typecode: str) -> None
+#   - write_matrix_file(path: str, orig: List[List[int | float]], typecode: Optional[str] = None) -> None
+#   - convert_text_matrix(text_file: TextIO, path: str, typecode: str) -> None
+#   - MappedMatrix
+#     - MappedMatrix(path: str, writable: bool = False) -> MappedMatrix
+#     - shape: (int, int)
+#     - typecode: str
+#     - __getitem__(key: (int, int)) -> int | float
+#     - read_block(x0: int, x1: int, y0: int, y1: int) -> List[List[int | float]]
+#     - write_block(x0: int, y0: int, block: List[List[int | float]]) -> None
+#     - to_lists() -> List[List[int | float]]
+#     - close() -> None
+#   - transpose_matrix_file(src_path: str, dst_path: str, memory_budget: int = OUT_OF_CORE_MEMORY) -> None
+#   - sum_matrix_files(src_path1: str, src_path2: str, dst_path: str, memory_budget: int = OUT_OF_CORE_MEMORY) -> None
+#   - multiply_matrix_files(src_path1: str, src_path2: str, dst_path: str,
+#                           memory_budget: int = OUT_OF_CORE_MEMORY) -> None
+#
+# A matrix file is a 32-byte header: magic, typecode ('q' or 'd'), 7 padding bytes, rows and columns as uint64.
+# It is followed by the elements, row after row, as little-endian int64 or float64.
+# The out-of-core operations read and write tiles through mmap. A tile is held as a nested list,
+# where each element costs a list slot and an int or float object, about 40 bytes instead of the 8 on disk,
+# and the tiles are sized so that everything an operation holds at once fits in memory_budget,
+# apart from a few kilobytes for the open files.
+
+from array import array
+from math import isqrt
+from typing import List, Optional, TextIO, Tuple, Union
+import mmap
+import operator
+import struct
+import sys
+from danielexercise_matrix import matdim, multiply_matrices, transpose
+
+
+#LIBRARY
+_MAGIC = b"DMATRIX1"
+_HEADER = struct.Struct("<8sc7xQQ")
+_TYPECODES = (b"q", b"d")
+
+# Default bytes of memory, counted as Python objects, that the out-of-core operations use at once
+OUT_OF_CORE_MEMORY = 64 * 2**20
+
+# Bytes of one element of a nested-list tile: an 8-byte list slot and an int64-range int or a float object,
+# which both take 32 bytes
+_LIST_ELEMENT_BYTES = 40
+
+
+def _to_bytes(values: list, typecode: str) -> bytes:
+    values = array(typecode, values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(data: bytes, typecode: str) -> list:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tolist()
+
+
+def create_matrix_file(path: str, shape: Tuple[int, int], typecode: str) -> None:
+    """
+    create_matrix_file(path: str, shape: (int, int), typecode: str) -> None
+
+    Creates a matrix file of the shape filled with zeros, without writing the zeros on file systems with sparse files.
+    typecode is 'q' for int64 or 'd' for float64.
+    """
+    if typecode.encode() not in _TYPECODES:
+        raise ValueError("typecode must be 'q' or 'd'")
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(_MAGIC, typecode.encode(), shape[0], shape[1]))
+        file.truncate(_HEADER.size + shape[0] * shape[1] * 8)
+
+
+def write_matrix_file(path: str, orig: List[List[Union[int, float]]], typecode: Optional[str] = None) -> None:
+    """
+    write_matrix_file(path: str, orig: List[List[int | float]], typecode: Optional[str]) -> None
+
+    Writes the nested-list matrix to a matrix file.
+    If typecode is None, it is 'q' when every element is an int and 'd' otherwise.
+    """
+    if typecode is None:
+        typecode = "q" if all(type(value) is int for row in orig for value in row) else "d"
+    create_matrix_file(path, matdim(orig), typecode)
+    with MappedMatrix(path, writable=True) as matrix:
+        matrix.write_block(0, 0, orig)
+
+
+def convert_text_matrix(text_file: TextIO, path: str, typecode: str) -> None:
+    """
+    convert_text_matrix(text_file: TextIO, path: str, typecode: str) -> None
+
+    Writes the matrix in the text format of parse_int_matrix and parse_float_matrix to a matrix file,
+    one row at a time: a row per line with the columns separated by commas, ending at an empty line or at the end.
+    typecode is 'q' to parse ints or 'd' to parse floats.
+    Raises ValueError with the line number if a row is not valid, if the rows have different lengths,
+    or if the matrix is empty.
+    """
+    if typecode.encode() not in _TYPECODES:
+        raise ValueError("typecode must be 'q' or 'd'")
+    parser = int if typecode == "q" else float
+    rows = 0
+    w = None
+    with open(path, "wb") as file:
+        file.write(bytes(_HEADER.size))
+        for number, line in enumerate(text_file, 1):
+            line = line.rstrip("\r\n")
+            if not line:
+                break
+            try:
+                row = [parser(part) for part in line.split(",")]
+            except ValueError:
+                raise ValueError("Line %d is not a valid comma-separated row" % number) from None
+            if w is None:
+                w = len(row)
+            elif len(row) != w:
+                raise ValueError("Line %d has %d columns instead of %d" % (number, len(row), w))
+            file.write(_to_bytes(row, typecode))
+            rows += 1
+        if not rows:
+            raise ValueError("The matrix must not be empty")
+        file.seek(0)
+        file.write(_HEADER.pack(_MAGIC, typecode.encode(), rows, w))
+
+
+class MappedMatrix:
+    """
+    A matrix file opened through mmap, whose elements are only read or written block by block.
+    """
+    shape: Tuple[int, int]
+    typecode: str
+    _file: object
+    _map: mmap.mmap
+
+    def __init__(self, path: str, writable: bool = False) -> None:
+        self._file = open(path, "r+b" if writable else "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except ValueError:
+            # Mapping an empty file raises ValueError
+            self._file.close()
+            raise ValueError("Not a matrix file") from None
+        try:
+            magic, typecode, l, w = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = None
+        if magic != _MAGIC or typecode not in _TYPECODES or len(self._map) != _HEADER.size + l * w * 8:
+            self.close()
+            raise ValueError("Not a matrix file")
+        self.shape = (l, w)
+        self.typecode = typecode.decode()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "MappedMatrix":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _position(self, x: int, y: int) -> int:
+        return _HEADER.size + (x * self.shape[1] + y) * 8
+
+    def __getitem__(self, key: Tuple[int, int]) -> Union[int, float]:
+        x, y = key
+        if not (0 <= x < self.shape[0] and 0 <= y < self.shape[1]):
+            raise IndexError
+        return self.read_block(x, x + 1, y, y + 1)[0][0]
+
+    def read_block(self, x0: int, x1: int, y0: int, y1: int) -> List[List[Union[int, float]]]:
+        """
+        read_block(self, x0: int, x1: int, y0: int, y1: int) -> block: List[List[int | float]]
+
+        Returns rows x0 to x1 and columns y0 to y1, excluding x1 and y1, as a nested-list matrix.
+        """
+        x1 = min(x1, self.shape[0])
+        y1 = min(y1, self.shape[1])
+        length = max(0, y1 - y0) * 8
+        return [_from_bytes(self._map[self._position(x, y0):self._position(x, y0) + length], self.typecode)
+                for x in range(x0, x1)]
+
+    def write_block(self, x0: int, y0: int, block: List[List[Union[int, float]]]) -> None:
+        """
+        write_block(self, x0: int, y0: int, block: List[List[int | float]]) -> None
+
+        Writes the nested-list matrix with its first element at row x0 and column y0.
+        Raises ValueError if the block does not fit in the matrix.
+        """
+        l, w = matdim(block)
+        if x0 < 0 or y0 < 0 or x0 + l > self.shape[0] or y0 + w > self.shape[1]:
+            raise ValueError("The block does not fit in the matrix")
+        for x, row in enumerate(block, x0):
+            start = self._position(x, y0)
+            self._map[start:start + len(row) * 8] = _to_bytes(row, self.typecode)
+
+    def to_lists(self) -> List[List[Union[int, float]]]:
+        """
+        to_lists(self) -> orig: List[List[int | float]]
+
+        Returns the whole matrix in memory as a nested-list matrix.
+        """
+        return self.read_block(0, self.shape[0], 0, self.shape[1])
+
+
+def _tile_size(memory_budget: int, tiles: int) -> int:
+    """
+    _tile_size(memory_budget: int, tiles: int) -> size: int
+
+    Returns the side of the largest square nested-list tiles of which this many fit in the budget.
+    """
+    return max(1, isqrt(memory_budget // (tiles * _LIST_ELEMENT_BYTES)))
+
+
+def transpose_matrix_file(src_path: str, dst_path: str, memory_budget: int = OUT_OF_CORE_MEMORY) -> None:
+    """
+    transpose_matrix_file(src_path: str, dst_path: str, memory_budget: int) -> None
+
+    Writes the transpose of the source matrix file to the destination matrix file, one tile at a time.
+    A tile and its transpose are held at once.
+    """
+    with MappedMatrix(src_path) as src:
+        l, w = src.shape
+        create_matrix_file(dst_path, (w, l), src.typecode)
+        size = _tile_size(memory_budget, 2)
+        with MappedMatrix(dst_path, writable=True) as dst:
+            for x0 in range(0, l, size):
+                for y0 in range(0, w, size):
+                    dst.write_block(y0, x0, transpose(src.read_block(x0, x0 + size, y0, y0 + size)))
+
+
+def sum_matrix_files(src_path1: str, src_path2: str, dst_path: str, memory_budget: int = OUT_OF_CORE_MEMORY) -> None:
+    """
+    sum_matrix_files(src_path1: str, src_path2: str, dst_path: str, memory_budget: int) -> None
+
+    Writes the sum of the source matrix files to the destination matrix file, one row segment at a time.
+    A segment of each source and of the sum are held at once.
+    The result holds floats if either source does.
+    Raises ValueError if the matrices do not have the same shape.
+    """
+    with MappedMatrix(src_path1) as src1, MappedMatrix(src_path2) as src2:
+        if src1.shape != src2.shape:
+            raise ValueError("Only matrices of the same shape can be summed")
+        l, w = src1.shape
+        create_matrix_file(dst_path, (l, w), "q" if src1.typecode == src2.typecode == "q" else "d")
+        # Sums need no tiles, so they run over rows, which are contiguous in the files.
+        # The fourth share of the budget covers the bytes and arrays that the segments are converted through
+        length = max(1, memory_budget // (4 * _LIST_ELEMENT_BYTES))
+        with MappedMatrix(dst_path, writable=True) as dst:
+            for x in range(l):
+                for y0 in range(0, w, length):
+                    row1, = src1.read_block(x, x + 1, y0, y0 + length)
+                    row2, = src2.read_block(x, x + 1, y0, y0 + length)
+                    dst.write_block(x, y0, [list(map(operator.add, row1, row2))])
+
+
+def multiply_matrix_files(src_path1: str, src_path2: str, dst_path: str,
+                          memory_budget: int = OUT_OF_CORE_MEMORY) -> None:
+    """
+    multiply_matrix_files(src_path1: str, src_path2: str, dst_path: str, memory_budget: int) -> None
+
+    Writes the product of the source matrix files to the destination matrix file.
+    Each tile of the product is accumulated in memory from the products of a row of tiles of the first source
+    and a column of tiles of the second, then written once.
+    A tile of each source, their product and the accumulated tile are held at once, with the columns of the second
+    source tile, which share its elements.
+    The result holds floats if either source does. int products must fit in int64.
+    Raises ValueError if the number of columns of the first source is not the number of rows of the second.
+    """
+    with MappedMatrix(src_path1) as src1, MappedMatrix(src_path2) as src2:
+        l1, w1 = src1.shape
+        l2, w2 = src2.shape
+        if w1 != l2:
+            raise ValueError("The number of columns of orig1 must be the number of rows of orig2")
+        create_matrix_file(dst_path, (l1, w2), "q" if src1.typecode == src2.typecode == "q" else "d")
+        size = _tile_size(memory_budget, 5)
+        with MappedMatrix(dst_path, writable=True) as dst:
+            for x0 in range(0, l1, size):
+                for y0 in range(0, w2, size):
+                    tile = None
+                    for k0 in range(0, w1, size):
+                        product = multiply_matrices(src1.read_block(x0, x0 + size, k0, k0 + size),
+                                                    src2.read_block(k0, k0 + size, y0, y0 + size))
+                        if tile is None:
+                            tile = product
+                            continue
+                        # Accumulating row by row frees each replaced row at once, unlike a new sum of the tiles
+                        for x, row in enumerate(product):
+                            tile[x] = list(map(operator.add, tile[x], row))
+                        del product
+                    if tile is not None:
+                        dst.write_block(x0, y0, tile)
@@ -0,0 +1,110 @@
+# Test the disk-backed matrices in danielexercise_matrixio
+# Type: Unit Tests
+
+import io
+import os
+import random
+import tempfile
+import tracemalloc
+import unittest
+from danielexercise_matrix import multiply_matrices, sum_matrices, transpose
+from danielexercise_matrixio import create_matrix_file, write_matrix_file, convert_text_matrix, MappedMatrix,\
+    transpose_matrix_file, sum_matrix_files, multiply_matrix_files
+
+
+class TestMatrixIOMethods(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_round_trip(self):
+        given = [[1, -2, 3], [4, 5, 1 << 40]]
+        write_matrix_file(self.path("a"), given)
+        self.assertEqual(32 + 8 * 6, os.path.getsize(self.path("a")))
+        with MappedMatrix(self.path("a")) as matrix:
+            self.assertEqual((2, 3), matrix.shape)
+            self.assertEqual("q", matrix.typecode)
+            self.assertEqual(given, matrix.to_lists())
+            self.assertEqual(1 << 40, matrix[1, 2])
+            self.assertEqual([[-2, 3], [5, 1 << 40]], matrix.read_block(0, 5, 1, 5))
+            with self.assertRaises(IndexError):
+                matrix[2, 0]
+        create_matrix_file(self.path("b"), (2, 2), "d")
+        with MappedMatrix(self.path("b"), writable=True) as matrix:
+            self.assertEqual([[0.0, 0.0], [0.0, 0.0]], matrix.to_lists())
+            matrix.write_block(1, 0, [[0.5, 1.5]])
+            with self.assertRaises(ValueError):
+                matrix.write_block(1, 1, [[0.5, 1.5]])
+        with MappedMatrix(self.path("b")) as matrix:
+            self.assertEqual([[0.0, 0.0], [0.5, 1.5]], matrix.to_lists())
+
+    def test_convert_text(self):
+        convert_text_matrix(io.StringIO("1,2,3\n4, 5,6\n\nignored\n"), self.path("a"), "q")
+        with MappedMatrix(self.path("a")) as matrix:
+            self.assertEqual([[1, 2, 3], [4, 5, 6]], matrix.to_lists())
+        convert_text_matrix(io.StringIO("0.5,1e3"), self.path("a"), "d")
+        with MappedMatrix(self.path("a")) as matrix:
+            self.assertEqual([[0.5, 1000.0]], matrix.to_lists())
+        for given, message in (("1,2\n3,x\n", "Line 2"), ("1,2\n3\n", "Line 2"), ("\n", "empty")):
+            with self.assertRaisesRegex(ValueError, message):
+                convert_text_matrix(io.StringIO(given), self.path("a"), "q")
+
+    def test_not_a_matrix(self):
+        with open(self.path("a"), "wb") as file:
+            file.write(b"1,2,3\n")
+        with self.assertRaises(ValueError):
+            MappedMatrix(self.path("a"))
+
+    def test_out_of_core_operations(self):
+        rng = random.Random(1120)
+        given1 = [[rng.randint(-50, 50) for _ in range(7)] for _ in range(5)]
+        given2 = [[rng.randint(-50, 50) for _ in range(9)] for _ in range(7)]
+        given3 = [[rng.random() for _ in range(7)] for _ in range(5)]
+        write_matrix_file(self.path("a"), given1)
+        write_matrix_file(self.path("b"), given2)
+        write_matrix_file(self.path("c"), given3)
+        # Multiply tiles of 2 by 2 elements, transpose tiles of 3 by 3 and sum segments of 5 elements,
+        # so that every operation crosses tile boundaries
+        budget = 5 * 40 * 4
+        transpose_matrix_file(self.path("a"), self.path("d"), budget)
+        with MappedMatrix(self.path("d")) as matrix:
+            self.assertEqual(transpose(given1), matrix.to_lists())
+        sum_matrix_files(self.path("a"), self.path("c"), self.path("d"), budget)
+        with MappedMatrix(self.path("d")) as matrix:
+            self.assertEqual("d", matrix.typecode)
+            self.assertEqual(sum_matrices(given1, given3), matrix.to_lists())
+        multiply_matrix_files(self.path("a"), self.path("b"), self.path("d"), budget)
+        with MappedMatrix(self.path("d")) as matrix:
+            self.assertEqual(multiply_matrices(given1, given2), matrix.to_lists())
+        with self.assertRaises(ValueError):
+            multiply_matrix_files(self.path("a"), self.path("a"), self.path("d"), budget)
+        with self.assertRaises(ValueError):
+            sum_matrix_files(self.path("a"), self.path("b"), self.path("d"), budget)
+
+    def test_memory_budget(self):
+        rng = random.Random(1120)
+        budget = 200000
+        write_matrix_file(self.path("a"), [[rng.randint(-2**40, 2**40) for _ in range(90)] for _ in range(90)])
+        write_matrix_file(self.path("b"), [[rng.random() for _ in range(90)] for _ in range(90)])
+        write_matrix_file(self.path("c"), [[rng.randint(-2**40, 2**40) for _ in range(10000)] for _ in range(2)])
+        write_matrix_file(self.path("d"), [[rng.random() for _ in range(10000)] for _ in range(2)])
+        for operation in (lambda: transpose_matrix_file(self.path("a"), self.path("e"), budget),
+                          lambda: multiply_matrix_files(self.path("a"), self.path("b"), self.path("e"), budget),
+                          lambda: sum_matrix_files(self.path("c"), self.path("d"), self.path("e"), budget)):
+            tracemalloc.start()
+            try:
+                operation()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            # The open files take a fixed few kilobytes on top of the budget
+            self.assertLess(peak, budget + 32 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
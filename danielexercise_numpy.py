@@ -0,0 +1,26 @@
+# Optional NumPy support shared by the other modules
+# Exports:
+#   - load_numpy() -> numpy: module | None
+#
+# NumPy is imported on first use only, so that modules which can dispatch to it
+# cost nothing more to import when it is not needed or not installed.
+
+
+#LIBRARY
+_numpy = None
+
+
+def load_numpy():
+    """
+    load_numpy() -> numpy: module | None
+
+    Returns the numpy module, importing it on first use, or None if it is not installed.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
@@ -1,6 +1,12 @@
 # Utilities for prompting the user for data
 
-from typing import List, Callable, TypeVar
+from array import array
+import asyncio
+from typing import Awaitable, BinaryIO, Callable, Iterator, List, NamedTuple, Optional, TextIO, Tuple, TypeVar, Union
+import codecs
+import re
+import warnings
+from danielexercise_numpy import load_numpy
 
 
 T = TypeVar("T")
@@ -154,3 +160,446 @@ parse_float_matrix.__doc__ = """
     Prompts the command line for a matrix of floating-point numbers and returns it.
     If the matrix is not valid, this function keeps on trying again.
     """
+
+
+async def _async_input(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str = "") -> str:
+    """
+    _async_input(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> line: str
+
+    Writes the prompt and returns the next line from the reader without its line ending, like input() does.
+    Raises EOFError if the reader is at its end.
+    """
+    if prompt:
+        writer.write(prompt.encode())
+        await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise EOFError
+    return line.decode().rstrip("\r\n")
+
+
+async def _async_print(writer: asyncio.StreamWriter, text: str) -> None:
+    writer.write(text.encode() + b"\n")
+    await writer.drain()
+
+
+def generate_async_parser(obj_desc: str, parser: Callable[[str], T]) ->\
+        Callable[[asyncio.StreamReader, asyncio.StreamWriter, str], Awaitable[T]]:
+    """
+    generate_async_parser(obj_desc: str, parser: Callable[[str], T]) ->
+        parse_func: Callable[[asyncio.StreamReader, asyncio.StreamWriter, str], Awaitable[T]]
+
+    Returns the coroutine function counterpart of generate_parser,
+    which prompts over a stream instead of the command line.
+    """
+    error = "Please try again with a valid " + obj_desc
+    async def result(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> T:
+        """
+        result(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> result: T
+
+        Prompts the stream for an value and returns it.
+        If the input is not valid, this function keeps on trying again.
+        Raises EOFError if the stream ends first.
+        """
+        while True:
+            try:
+                return parser(await _async_input(reader, writer, prompt))
+            except ValueError:
+                await _async_print(writer, error)
+    return result
+
+
+async_parse_int = generate_async_parser("integer", int)
+async_parse_int.__doc__ = """
+    async_parse_int(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> result: int
+
+    Prompts the stream for an integer and returns it.
+    If the input is not a valid integer, this function keeps on trying again.
+    """
+
+
+async_parse_float = generate_async_parser("decimal", float)
+async_parse_float.__doc__ = """
+    async_parse_float(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> result: float
+
+    Prompts the stream for a floating-point number and returns it.
+    If the input is not a valid floating-point number, this function keeps on trying again.
+    """
+
+
+async_parse_str = generate_async_parser("text", lambda x: x)
+async_parse_str.__doc__ = """
+    async_parse_str(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> result: str
+
+    Prompts the stream for some text and returns it.
+    This only errors if the stream ends.
+    """
+
+
+def generate_async_list_parser(obj_desc: str, parser: Callable[[str], T]) ->\
+        Callable[[asyncio.StreamReader, asyncio.StreamWriter, str], Awaitable[List[T]]]:
+    """
+    generate_async_list_parser(obj_desc: str, parser: Callable[[str], T]) ->
+        parse_func: Callable[[asyncio.StreamReader, asyncio.StreamWriter, str], Awaitable[List[T]]]
+
+    Returns the coroutine function counterpart of generate_list_parser,
+    which prompts over a stream instead of the command line.
+    """
+    error = "Please try again with a valid comma-separated " + obj_desc + " list"
+    async def result(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> List[T]:
+        """
+        result(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> result: List[T];
+            len(result) > 0
+
+        Prompts the stream for a list of values and returns it.
+        If the input is not valid, this function keeps on trying again.
+        Raises EOFError if the stream ends first.
+        """
+        while True:
+            input_str = await _async_input(reader, writer, prompt)
+            try:
+                return [parser(part) for part in input_str.split(",")]
+            except ValueError:
+                await _async_print(writer, error)
+    return result
+
+
+async_parse_list_int = generate_async_list_parser("integer", int)
+async_parse_list_int.__doc__ = """
+    async_parse_list_int(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) ->
+        result: List[int]; len(result) > 0
+
+    Prompts the stream for a list of integers and returns it.
+    If the input is not valid, this function keeps on trying again.
+    """
+
+
+async_parse_list_float = generate_async_list_parser("decimal", float)
+async_parse_list_float.__doc__ = """
+    async_parse_list_float(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) ->
+        result: List[float]; len(result) > 0
+
+    Prompts the stream for a list of floating-point numbers and returns it.
+    If the input is not valid, this function keeps on trying again.
+    """
+
+
+def generate_async_matrix_parser(obj_desc: str, parser: Callable[[str], T]) ->\
+        Callable[[asyncio.StreamReader, asyncio.StreamWriter, str], Awaitable[List[List[T]]]]:
+    """
+    generate_async_matrix_parser(obj_desc: str, parser: Callable[[str], T]) ->
+        parse_func: Callable[[asyncio.StreamReader, asyncio.StreamWriter, str], Awaitable[List[List[T]]]]
+
+    Returns the coroutine function counterpart of generate_matrix_parser,
+    which prompts over a stream instead of the command line, with the same messages.
+    """
+    error1 = "The matrix must not be empty. Please provide at least one " + obj_desc
+    error2 = "Please try again with a valid comma-separated " + obj_desc + " row"
+    async def result(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> List[List[T]]:
+        """
+        result(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) -> result: List[List[T]];
+            len(result) > 0
+
+        Prompts the stream for a matrix of values and returns it.
+        If a row is not valid, this function asks for it again.
+        Raises EOFError if the stream ends first.
+        """
+        await _async_print(writer, prompt)
+        await _async_print(writer, "Please input the matrix with each row on a separate line and the columns"
+                                   " separated by commas. Finish with an empty line.")
+        await _async_print(writer, "### Begun parsing matrix ###")
+        _result = []
+        while True:
+            input_str = await _async_input(reader, writer)
+            if not input_str:
+                if _result:
+                    break
+                await _async_print(writer, error1)
+            try:
+                _result.append([parser(part) for part in input_str.split(",")])
+            except ValueError:
+                await _async_print(writer, error2)
+        await _async_print(writer, "### Finished parsing matrix ###")
+        return _result
+    return result
+
+
+async_parse_int_matrix = generate_async_matrix_parser("integer", int)
+async_parse_int_matrix.__doc__ = """
+    async_parse_int_matrix(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) ->
+        result: List[List[int]]; len(result) > 0; len(x) > 0 ∀ x ∈ result
+
+    Prompts the stream for a matrix of integers and returns it.
+    If the matrix is not valid, this function keeps on trying again.
+    """
+
+
+async_parse_float_matrix = generate_async_matrix_parser("decimal", float)
+async_parse_float_matrix.__doc__ = """
+    async_parse_float_matrix(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, prompt: str) ->
+        result: List[List[float]]; len(result) > 0; len(x) > 0 ∀ x ∈ result
+
+    Prompts the stream for a matrix of floating-point numbers and returns it.
+    If the matrix is not valid, this function keeps on trying again.
+    """
+
+
+#LIBRARY
+# Characters read from a file at a time by the streaming parsers
+STREAM_CHUNK_SIZE = 1 << 20
+
+# tokenize_numbers uses NumPy, when it is installed, for texts of at least this many characters
+NUMPY_MIN_CHARS = 4096
+
+# Typecode of the arrays that the streaming parsers fill for each parser
+_TYPECODES = {int: "q", float: "d"}
+
+_INT64_BOUNDS = (-(1 << 63), (1 << 63) - 1)
+
+
+class MalformedRow(NamedTuple):
+    """
+    A row that a streaming parser skipped.
+    line and column count from 1, and column is where the first invalid field starts.
+    """
+    line: int
+    column: int
+    text: str
+
+
+def _fields(line: str, delimiter: Optional[str]) -> Iterator[Tuple[int, str]]:
+    """
+    _fields(line: str, delimiter: Optional[str]) -> fields: Iterator[(start: int, field: str)]
+
+    Returns the fields of the line and the index where each starts.
+    A delimiter of None separates the fields by runs of whitespace.
+    """
+    if delimiter is None:
+        for match in re.finditer(r"\S+", line):
+            yield match.start(), match.group()
+        return
+    start = 0
+    for part in line.split(delimiter):
+        yield start, part
+        start += len(part) + len(delimiter)
+
+
+def _split(text: str, delimiter: Optional[str]) -> List[str]:
+    return text.split(delimiter) if delimiter is not None else text.split()
+
+
+def _invalid_column(line: str, parser: Callable[[str], T], delimiter: Optional[str]) -> int:
+    """
+    _invalid_column(line: str, parser: Callable[[str], T], delimiter: Optional[str]) -> column: int
+
+    Returns the column, counting from 1, of the first field of the line that the parser rejects,
+    or that does not fit in int64 for the int parser, or 0 if there is none.
+    """
+    for start, part in _fields(line, delimiter):
+        try:
+            value = parser(part)
+        except ValueError:
+            return start + len(part) - len(part.lstrip()) + 1
+        if parser is int and not _INT64_BOUNDS[0] <= value <= _INT64_BOUNDS[1]:
+            return start + len(part) - len(part.lstrip()) + 1
+    return 0
+
+
+def _parse_fields(line: str, parser: Callable[[str], T], delimiter: Optional[str]) -> Union[array, List[T]]:
+    """
+    _parse_fields(line: str, parser: Callable[[str], T], delimiter: Optional[str]) -> row: array | List[T]
+
+    Returns the parsed fields, in an array('q') for int, an array('d') for float, and a list otherwise.
+    Raises ValueError if a field is invalid or an int does not fit in int64.
+    """
+    typecode = _TYPECODES.get(parser)
+    if typecode is None:
+        return [parser(part) for part in _split(line, delimiter)]
+    try:
+        return array(typecode, list(map(parser, _split(line, delimiter))))
+    except OverflowError:
+        raise ValueError("An integer does not fit in 64 bits") from None
+
+
+def _numpy_tokenize(text: str, typecode: str, delimiter: Optional[str]) -> Optional[array]:
+    """
+    _numpy_tokenize(text: str, typecode: str, delimiter: Optional[str]) -> values: Optional[array]
+
+    Returns the numbers of the single-line text parsed by numpy.fromstring,
+    or None if NumPy rejects it or may have clamped an int, so that the pure-Python path decides.
+    """
+    numpy = load_numpy()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            values = numpy.fromstring(text, dtype=numpy.int64 if typecode == "q" else numpy.float64,
+                                      sep=delimiter if delimiter is not None else " ")
+        except (ValueError, DeprecationWarning):
+            return None
+    # fromstring accepts a trailing delimiter and clamps ints that do not fit
+    if delimiter is not None and len(values) != text.count(delimiter) + 1:
+        return None
+    if typecode == "q" and len(values) and (values.min() == _INT64_BOUNDS[0] or values.max() == _INT64_BOUNDS[1]):
+        return None
+    result = array(typecode)
+    result.frombytes(values.tobytes())
+    return result
+
+
+def tokenize_numbers(text: str, parser: Callable[[str], T] = int, delimiter: Optional[str] = ",",
+                     use_numpy: Optional[bool] = None) -> array:
+    """
+    tokenize_numbers(text: str, parser: int | float, delimiter: Optional[str], use_numpy: Optional[bool]) ->
+        values: array
+
+    Returns all the numbers of the text, whose lines are delimited lists of numbers,
+    as an array('q') for the int parser or an array('d') for the float parser.
+    Whitespace around the numbers is ignored, and a delimiter of None separates the numbers by whitespace.
+    The text is parsed in one pass by NumPy if use_numpy is True,
+    or if it is None, NumPy is installed and the text has at least NUMPY_MIN_CHARS characters.
+    Raises ValueError, with the line and column of the first invalid number, if the text is not valid.
+    """
+    typecode = _TYPECODES.get(parser)
+    if typecode is None:
+        raise ValueError("tokenize_numbers only parses int and float")
+    text = text.strip()
+    joined = text.replace("\n", delimiter) if delimiter is not None else text
+    if use_numpy is None:
+        use_numpy = len(text) >= NUMPY_MIN_CHARS and load_numpy() is not None
+    elif use_numpy and load_numpy() is None:
+        raise ImportError("use_numpy=True requires NumPy")
+    if use_numpy:
+        result = _numpy_tokenize(joined, typecode, delimiter)
+        if result is not None:
+            return result
+    try:
+        return _parse_fields(joined, parser, delimiter)
+    except ValueError:
+        pass
+    for number, line in enumerate(text.split("\n"), 1):
+        column = _invalid_column(line, parser, delimiter)
+        if column:
+            raise ValueError("Line %d, column %d: invalid %s" % (number, column, parser.__name__))
+    raise ValueError("Invalid " + parser.__name__)
+
+
+def _read_line_batches(file: Union[TextIO, BinaryIO], chunk_size: int) -> Iterator[List[str]]:
+    """
+    _read_line_batches(file: TextIO | BinaryIO, chunk_size: int) -> batches: Iterator[List[str]]
+
+    Returns the lines of the file, without their line endings, in one batch per chunk read.
+    Binary files, such as sys.stdin.buffer, are decoded as UTF-8.
+    """
+    decoder = None
+    pending = ""
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder("utf-8")()
+            chunk = decoder.decode(chunk)
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        if lines:
+            yield [line[:-1] if line.endswith("\r") else line for line in lines]
+    if decoder is not None:
+        pending += decoder.decode(b"", final=True)
+    if pending:
+        yield [pending[:-1] if pending.endswith("\r") else pending]
+
+
+def iter_matrix_rows(file: Union[TextIO, BinaryIO], parser: Callable[[str], T] = int, delimiter: Optional[str] = ",",
+                     errors: Optional[List[MalformedRow]] = None,
+                     chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Union[array, List[T]]]:
+    """
+    iter_matrix_rows(file: TextIO | BinaryIO, parser: Callable[[str], T], delimiter: Optional[str],
+        errors: Optional[List[MalformedRow]], chunk_size: int) -> rows: Iterator[array | List[T]]
+
+    Returns the rows of the matrix in the file, in the format of parse_int_matrix and parse_float_matrix,
+    without prompting or printing. The file is read chunk_size characters at a time,
+    and the matrix ends at an empty line or at the end of the file.
+    Rows are array('q') for the int parser, array('d') for the float parser and lists otherwise.
+    A row that is not valid, or that does not have as many columns as the first valid row,
+    is added to errors and skipped, or raises ValueError with its line and column if errors is None.
+    """
+    width = None
+    number = 0
+    for lines in _read_line_batches(file, chunk_size):
+        for line in lines:
+            number += 1
+            if not line:
+                return
+            try:
+                row = _parse_fields(line, parser, delimiter)
+            except ValueError:
+                column = _invalid_column(line, parser, delimiter)
+            else:
+                if width is None:
+                    width = len(row)
+                if len(row) == width:
+                    yield row
+                    continue
+                column = len(line) + 1 if len(row) < width else list(_fields(line, delimiter))[width][0] + 1
+            if errors is None:
+                raise ValueError("Line %d, column %d: invalid %s row" % (number, column, parser.__name__))
+            errors.append(MalformedRow(number, column, line))
+
+
+def read_matrix(file: Union[TextIO, BinaryIO], parser: Callable[[str], T] = int, delimiter: Optional[str] = ",",
+                errors: Optional[List[MalformedRow]] = None,
+                chunk_size: int = STREAM_CHUNK_SIZE) -> (Union[array, List[T]], Tuple[int, int]):
+    """
+    read_matrix(file: TextIO | BinaryIO, parser: Callable[[str], T], delimiter: Optional[str],
+        errors: Optional[List[MalformedRow]], chunk_size: int) -> (data: array | List[T], shape: (int, int))
+
+    Returns the matrix in the file as the flat row-major data and the shape used by the Matrix class
+    of danielexercise_matrix, filling an array('q') or array('d') directly for the int and float parsers.
+    Rows are read and checked like iter_matrix_rows does.
+    """
+    typecode = _TYPECODES.get(parser)
+    data = array(typecode) if typecode is not None else []
+    rows = 0
+    width = 0
+    for row in iter_matrix_rows(file, parser, delimiter, errors, chunk_size):
+        data += row
+        rows += 1
+        width = len(row)
+    return data, (rows, width)
+
+
+def read_list(file: Union[TextIO, BinaryIO], parser: Callable[[str], T] = int, delimiter: Optional[str] = ",",
+              errors: Optional[List[MalformedRow]] = None,
+              chunk_size: int = STREAM_CHUNK_SIZE) -> Union[array, List[T]]:
+    """
+    read_list(file: TextIO | BinaryIO, parser: Callable[[str], T], delimiter: Optional[str],
+        errors: Optional[List[MalformedRow]], chunk_size: int) -> values: array | List[T]
+
+    Returns the values of the delimited list in the file, which may be split over several lines,
+    without prompting or printing. Each line may end with the delimiter before the list continues on the next one.
+    The list ends at an empty line or at the end of the file,
+    and is an array('q') for the int parser, an array('d') for the float parser and a list otherwise.
+    A line that is not valid is added to errors and skipped, or raises ValueError with its line and column
+    if errors is None.
+    """
+    typecode = _TYPECODES.get(parser)
+    data = array(typecode) if typecode is not None else []
+    number = 0
+    for lines in _read_line_batches(file, chunk_size):
+        for line in lines:
+            number += 1
+            if not line:
+                return data
+            if delimiter is not None:
+                stripped = line.rstrip()
+                if stripped.endswith(delimiter):
+                    line = stripped[:-len(delimiter)]
+            try:
+                data += _parse_fields(line, parser, delimiter)
+            except ValueError:
+                column = _invalid_column(line, parser, delimiter)
+                if errors is None:
+                    raise ValueError("Line %d, column %d: invalid %s" % (number, column, parser.__name__)) from None
+                errors.append(MalformedRow(number, column, line))
+    return data
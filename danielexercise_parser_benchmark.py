@@ -0,0 +1,94 @@
+# Benchmark the streaming parsers of danielexercise_parser against the per-element parsing of the prompting parsers
+# Type: Benchmark
+
+import asyncio
+import io
+import random
+import resource
+import socket
+import time
+import timeit
+from typing import Callable
+from danielexercise_numpy import load_numpy
+from danielexercise_parser import tokenize_numbers, read_matrix, async_parse_int_matrix
+
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def _generic(text: str, parser: Callable[[str], object]) -> list:
+    # The per-row parsing of generate_matrix_parser, without the prompts
+    return [[parser(part) for part in line.split(",")] for line in text.split("\n")]
+
+
+def parse_numbers(rows: int = 100000, columns: int = 10, repeat: int = 3) -> None:
+    """
+    parse_numbers(rows: int, columns: int, repeat: int) -> None
+
+    Prints the time of parsing a matrix of ints and a matrix of floats
+    with the generic per-element parser, read_matrix and tokenize_numbers with and without NumPy.
+    """
+    rng = random.Random(1120)
+    has_numpy = load_numpy() is not None
+    print("%d rows of %d columns" % (rows, columns))
+    print("kind   generic_s  read_matrix_s  tokenize_s  tokenize_numpy_s")
+    for parser in (int, float):
+        if parser is int:
+            values = [str(rng.randint(-10**6, 10**6)) for _ in range(rows * columns)]
+        else:
+            values = [repr(rng.uniform(-1000, 1000)) for _ in range(rows * columns)]
+        text = "\n".join(", ".join(values[x:x + columns]) for x in range(0, len(values), columns))
+        generic = _best(lambda: _generic(text, parser), repeat)
+        streamed = _best(lambda: read_matrix(io.StringIO(text), parser), repeat)
+        tokenized = _best(lambda: tokenize_numbers(text, parser, use_numpy=False), repeat)
+        numpy = _best(lambda: tokenize_numbers(text, parser, use_numpy=True), repeat) if has_numpy else float("nan")
+        print("%-6s %9.3f %14.3f %11.3f %17.3f" % (parser.__name__, generic, streamed, tokenized, numpy))
+
+
+async def _session(given: bytes) -> list:
+    # One session over a socket pair: the client sends its matrix at once, the server prompts and parses it
+    server, client = socket.socketpair()
+    reader, writer = await asyncio.open_connection(sock=server)
+    client_reader, client_writer = await asyncio.open_connection(sock=client)
+    client_writer.write(given)
+    await client_writer.drain()
+    result = await async_parse_int_matrix(reader, writer, "Matrix?")
+    writer.close()
+    await client_reader.read()
+    client_writer.close()
+    return result
+
+
+async def _sessions(count: int, given: bytes) -> list:
+    return await asyncio.gather(*(_session(given) for _ in range(count)))
+
+
+def async_sessions(counts=(100, 1000, 4000), rows: int = 20) -> None:
+    """
+    async_sessions(counts: Iterable[int], rows: int) -> None
+
+    Load test of the async parsers: prints the time of serving each number of concurrent
+    async_parse_int_matrix sessions over local socket pairs in one thread, each parsing a matrix of rows lines
+    with one invalid row. Each session uses 2 file descriptors, so the counts are capped by the open file limit.
+    """
+    limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    given = b"".join(b"%d,%d,%d\n" % (x, x + 1, x + 2) for x in range(rows)) + b"1,x\n\n"
+    print("sessions  seconds  sessions_per_s")
+    for count in counts:
+        count = min(count, (limit - 64) // 2)
+        start = time.perf_counter()
+        results = asyncio.run(_sessions(count, given))
+        seconds = time.perf_counter() - start
+        assert all(len(result) == rows for result in results)
+        print("%8d %8.3f %15.0f" % (count, seconds, count / seconds))
+
+
+def main() -> None:
+    parse_numbers()
+    print()
+    async_sessions()
+
+
+if __name__ == "__main__":
+    main()
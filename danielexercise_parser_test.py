@@ -0,0 +1,107 @@
+# Test the streaming parsers in danielexercise_parser
+# Type: Unit Tests
+
+import asyncio
+import io
+import socket
+import unittest
+from danielexercise_numpy import load_numpy
+from danielexercise_parser import MalformedRow, tokenize_numbers, iter_matrix_rows, read_matrix, read_list,\
+    async_parse_int, async_parse_list_float, async_parse_int_matrix
+
+
+class TestStreamingParserMethods(unittest.TestCase):
+    def test_tokenize_numbers(self):
+        for use_numpy in (False, None):
+            self.assertEqual([1, 2, 3, 4, 5], list(tokenize_numbers(" 1, 2 ,3\n4,5\n", use_numpy=use_numpy)))
+            self.assertEqual("q", tokenize_numbers("1", use_numpy=use_numpy).typecode)
+            self.assertEqual([1.5, -2.0, 1000.0], list(tokenize_numbers("1.5; -2\n1e3", float, ";", use_numpy)))
+            self.assertEqual([1, 2, 3], list(tokenize_numbers("1  2\n\t3", int, None, use_numpy)))
+            for given, message in (("1,2\n3,x", "Line 2, column 3"), ("1,99999999999999999999", "Line 1, column 3"),
+                                   ("1,2,", "Line 1, column 5"), ("1.5", "Line 1, column 1")):
+                with self.assertRaisesRegex(ValueError, message):
+                    tokenize_numbers(given, use_numpy=use_numpy)
+        with self.assertRaises(ValueError):
+            tokenize_numbers("a,b", str)
+
+    @unittest.skipUnless(load_numpy(), "NumPy is not installed")
+    def test_tokenize_numbers_numpy(self):
+        given = ",".join(str(x) for x in range(-1000, 1000))
+        self.assertEqual(list(range(-1000, 1000)), list(tokenize_numbers(given, use_numpy=True)))
+        self.assertEqual([1000, 9223372036854775807], list(tokenize_numbers("1_000, 9223372036854775807",
+                                                                             use_numpy=True)))
+
+    def test_iter_matrix_rows(self):
+        given = b"1,2\r\n3,x\n4,5,6\n7\n8, 9\n\n10,11\n"
+        errors = []
+        actual = list(iter_matrix_rows(io.BytesIO(given), errors=errors, chunk_size=3))
+        self.assertEqual([[1, 2], [8, 9]], [list(row) for row in actual])
+        self.assertEqual([MalformedRow(2, 3, "3,x"), MalformedRow(3, 5, "4,5,6"), MalformedRow(4, 2, "7")], errors)
+        with self.assertRaisesRegex(ValueError, "Line 2, column 3"):
+            list(iter_matrix_rows(io.BytesIO(given)))
+        actual = list(iter_matrix_rows(io.StringIO("a b\nc d"), lambda x: x.upper(), None))
+        self.assertEqual([["A", "B"], ["C", "D"]], actual)
+
+    def test_read_matrix_and_list(self):
+        data, shape = read_matrix(io.StringIO("1.5,2\n3,4\n"), float)
+        self.assertEqual("d", data.typecode)
+        self.assertEqual(([1.5, 2.0, 3.0, 4.0], (2, 2)), (list(data), shape))
+        self.assertEqual(([], (0, 0)), (list(read_matrix(io.StringIO(""))[0]), read_matrix(io.StringIO(""))[1]))
+        errors = []
+        self.assertEqual([1, 2, 3, 4], list(read_list(io.BytesIO("1,2\nx\n3, 4\n\n5".encode()), errors=errors)))
+        self.assertEqual([MalformedRow(2, 1, "x")], errors)
+        self.assertEqual([1, 2, 3, 4], list(read_list(io.StringIO("1,2,\n3, \n4\n"))))
+        self.assertEqual(["a", "b", "c"], read_list(io.StringIO("a; b ;\nc"), str.strip, ";"))
+        with self.assertRaisesRegex(ValueError, "Line 1, column 5"):
+            read_list(io.StringIO("1,2,,\n3"))
+
+
+async def run_session(parse, prompt: str, given: bytes):
+    """
+    run_session(parse, prompt: str, given: bytes) -> (result, output: str)
+
+    Runs the async parser over one end of a socket pair while the other end sends the given input.
+    """
+    server, client = socket.socketpair()
+    reader, writer = await asyncio.open_connection(sock=server)
+    client_reader, client_writer = await asyncio.open_connection(sock=client)
+    client_writer.write(given)
+    client_writer.write_eof()
+    try:
+        result = await parse(reader, writer, prompt)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    output = await client_reader.read()
+    client_writer.close()
+    await client_writer.wait_closed()
+    return result, output.decode()
+
+
+class TestAsyncParserMethods(unittest.IsolatedAsyncioTestCase):
+    async def test_parse_int(self):
+        result, output = await run_session(async_parse_int, "n? ", b"x\n12\n")
+        self.assertEqual(12, result)
+        self.assertEqual("n? Please try again with a valid integer\nn? ", output)
+        with self.assertRaises(EOFError):
+            await run_session(async_parse_int, "n? ", b"x\n")
+
+    async def test_parse_list_and_matrix(self):
+        result, _ = await run_session(async_parse_list_float, "", b"1,x\n1.5,2\n")
+        self.assertEqual([1.5, 2.0], result)
+        result, output = await run_session(async_parse_int_matrix, "m", b"\n1,2\n3,y\n3,4\n\n")
+        self.assertEqual([[1, 2], [3, 4]], result)
+        self.assertEqual(["m", "Please input the matrix with each row on a separate line and the columns separated by"
+                               " commas. Finish with an empty line.", "### Begun parsing matrix ###",
+                          "The matrix must not be empty. Please provide at least one integer",
+                          "Please try again with a valid comma-separated integer row",
+                          "Please try again with a valid comma-separated integer row",
+                          "### Finished parsing matrix ###", ""], output.split("\n"))
+
+    async def test_concurrent_sessions(self):
+        results = await asyncio.gather(*(run_session(async_parse_int, "", b"%d\n" % i) for i in range(50)))
+        self.assertEqual(list(range(50)), [result for result, _ in results])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,56 @@
 # Statistical utilities
 
-from typing import Iterable, Dict, TypeVar, List, Tuple
+from collections import Counter
+from typing import Callable, Iterable, Dict, Optional, TypeVar, List, Tuple, Union
+import array
+import bisect
+import hashlib
+import heapq
+import itertools
+import math
+import operator
+import os
+import random
+from danielexercise_decimal import DEFAULT_PRECISION, Decimal, DecimalAccumulator, decimal
+from danielexercise_numpy import load_numpy
 
 T = TypeVar("T")
 
+# Items counted by each task of parallel_histogram, and bytes of lines read at a time by parallel_file_histogram
+PARALLEL_CHUNK_SIZE = 1 << 16
+
+# bincount is used instead of unique for non-negative ints up to this many times the number of items
+_BINCOUNT_SPAN_FACTOR = 4
+
+
+def _numpy_int_histogram(data) -> Optional[Dict[int, int]]:
+    """
+    _numpy_int_histogram(data: numpy.ndarray | array.array) -> histogram: Optional[Dict[int, int]]
+
+    Returns the histogram of a NumPy integer array or of an integer array.array computed by NumPy,
+    or None if NumPy is not installed or the data is something else.
+    """
+    numpy = load_numpy()
+    if numpy is None:
+        return None
+    if isinstance(data, array.array):
+        if data.typecode not in "bBhHiIlLqQ":
+            return None
+        data = numpy.frombuffer(data, dtype=data.typecode)
+    elif type(data).__module__ != "numpy" or data.dtype.kind not in "iu":
+        return None
+    data = data.ravel()
+    if not data.size:
+        return {}
+    low = int(data.min())
+    high = int(data.max())
+    if low >= 0 and high < _BINCOUNT_SPAN_FACTOR * data.size:
+        counts = numpy.bincount(data)
+        values = numpy.flatnonzero(counts)
+        return dict(zip(values.tolist(), counts[values].tolist()))
+    values, counts = numpy.unique(data, return_counts=True)
+    return dict(zip(values.tolist(), counts.tolist()))
+
 
 def histogram(data: Iterable[T]) -> Dict[T, int]:
     """
@@ -11,20 +58,683 @@ def histogram(data: Iterable[T]) -> Dict[T, int]:
 
     Returns the histogram of the argument data.
     A histogram is the number of occurrences of each item in the data.
+    Items are counted by collections.Counter, consuming iterators and generators one item at a time
+    without materializing them. NumPy integer arrays and integer array.array are counted by NumPy when it is installed.
     """
-    result = {}
-    for x in data:
-        result[x] = result.get(x, 0) + 1
-    return result
+    result = _numpy_int_histogram(data)
+    if result is not None:
+        return result
+    return dict(Counter(data))
 
 
-K = TypeVar("K")
-V = TypeVar("V")
+def merge_histograms(histograms: Iterable[Dict[T, int]]) -> Dict[T, int]:
+    """
+    merge_histograms(histograms: Iterable[Dict[T, int]]) -> histogram: Dict[T, [0..inf[]
+
+    Returns the histogram of all the data whose histograms are given, such as the histograms of shards of the data.
+    """
+    result = Counter()
+    for partial in histograms:
+        result.update(partial)
+    return dict(result)
+
+
+def _histogram_task(chunk: List[T]) -> Dict[T, int]:
+    return dict(Counter(chunk))
+
+
+def _map_merged(executor: "ProcessPoolExecutor", func: Callable, tasks: Iterable, in_flight: int) -> Dict[T, int]:
+    """
+    _map_merged(executor: ProcessPoolExecutor, func: Callable, tasks: Iterable, in_flight: int) -> histogram: Dict
+
+    Returns the merged histograms of func over the tasks, merging each one as soon as its task completes
+    and never taking more tasks from the iterable than in_flight ahead of the merged ones.
+    """
+    from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+    result = Counter()
+    pending = set()
+    for task in tasks:
+        pending.add(executor.submit(func, *task))
+        if len(pending) >= in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result.update(future.result())
+    for future in as_completed(pending):
+        result.update(future.result())
+    return dict(result)
+
+
+def parallel_histogram(data: Iterable[T], workers: Optional[int] = None,
+                       chunk_size: int = PARALLEL_CHUNK_SIZE) -> Dict[T, int]:
+    """
+    parallel_histogram(data: Iterable[T], workers: Optional[int], chunk_size: int) -> histogram: Dict[T, [0..inf[]
+
+    Returns the histogram of the data, counting chunks of chunk_size items on a pool of worker processes
+    and merging their histograms. The data is consumed as a stream:
+    only about two chunks per worker are taken from it ahead of the counting.
+    The items must be picklable. With a single worker, everything is done in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return histogram(data)
+    # Imported here so that the serial functions of this module do not load the process machinery
+    from concurrent.futures import ProcessPoolExecutor
+    iterator = iter(data)
+    chunks = iter(lambda: (list(itertools.islice(iterator, chunk_size)),), ([],))
+    with ProcessPoolExecutor(workers) as executor:
+        return _map_merged(executor, _histogram_task, chunks, 2 * workers)
+
+
+def _file_histogram_task(path: str, start: int, end: int, key: Optional[Callable[[bytes], T]]) -> Dict[T, int]:
+    """
+    _file_histogram_task(path: str, start: int, end: int, key: Optional[Callable[[bytes], T]]) -> histogram: Dict
+
+    Returns the histogram of the lines that start in the byte range of the file, without their line endings,
+    or of key of each line if it is given.
+    """
+    result = Counter()
+    with open(path, "rb") as file:
+        if start:
+            file.seek(start - 1)
+            # A line starting before the range belongs to the previous range
+            file.readline()
+        while file.tell() < end:
+            lines = file.readlines(min(end - file.tell(), PARALLEL_CHUNK_SIZE))
+            if not lines:
+                break
+            # The last line read may belong to the next range
+            while lines and file.tell() - len(lines[-1]) >= end:
+                file.seek(-len(lines.pop()), os.SEEK_CUR)
+            lines = [line.rstrip(b"\r\n") for line in lines]
+            result.update(lines if key is None else map(key, lines))
+    return dict(result)
+
+
+def parallel_file_histogram(path: str, workers: Optional[int] = None, key: Optional[Callable[[bytes], T]] = None,
+                            range_size: int = 1 << 24) -> Dict[T, int]:
+    """
+    parallel_file_histogram(path: str, workers: Optional[int], key: Optional[Callable[[bytes], T]], range_size: int)
+        -> histogram: Dict[T, [0..inf[]
+
+    Returns the histogram of the lines of the file, as bytes without their line endings,
+    or of key of each line if it is given, such as a function extracting a field of a log line.
+    The file is split into byte ranges of about range_size bytes, each counted by a worker process
+    that reads it directly from the file. key must be picklable, so a module-level function.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    size = os.path.getsize(path)
+    ranges = [(path, start, min(start + range_size, size), key) for start in range(0, size, range_size)]
+    if workers <= 1 or len(ranges) <= 1:
+        return merge_histograms(_file_histogram_task(*task) for task in ranges)
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(min(workers, len(ranges))) as executor:
+        return _map_merged(executor, _file_histogram_task, ranges, 2 * workers)
+
+
+def _item_bytes(item) -> bytes:
+    """
+    _item_bytes(item: str | bytes | int | float | tuple) -> key: bytes
+
+    Returns bytes identifying the item that are the same in every process,
+    unlike hash(), which is salted for str and bytes.
+    Items of different types get different bytes, even if they are equal, like 1 and 1.0.
+    Raises TypeError for other types, whose repr() can depend on the process, such as frozenset or most objects.
+    """
+    kind = type(item)
+    if kind is str:
+        return b"s" + item.encode("utf-8", "surrogatepass")
+    if kind is bytes:
+        return b"b" + item
+    if kind is int or kind is bool:
+        return b"i" + repr(int(item)).encode()
+    if kind is float:
+        # 0.0 and -0.0 are the same key, as they are for a dict
+        return b"f" + (item or 0.0).hex().encode()
+    if kind is tuple:
+        parts = [_item_bytes(value) for value in item]
+        # Each part is prefixed by its length so that nested tuples cannot run into each other
+        return b"t" + b"".join(len(part).to_bytes(8, "little") + part for part in parts)
+    raise TypeError("Only str, bytes, int, float and tuples of these can be counted by a sketch, not "
+                    + kind.__name__)
+
+
+def _hash64(item, seed: int) -> int:
+    """
+    _hash64(item: Hashable, seed: int) -> hash: int
+
+    Returns a 64-bit hash of the item that is the same in every process, and independent for each seed.
+    """
+    return int.from_bytes(hashlib.blake2b(_item_bytes(item), digest_size=8,
+                                          salt=seed.to_bytes(16, "little")).digest(), "little")
+
+
+class CountMinSketch:
+    """
+    Frequency estimates of the items of a stream in a fixed depth by width table of counters.
+    An estimate is never below the true count, and is above it by more than epsilon times the total count
+    with probability at most delta. The table takes 8 * width * depth bytes,
+    with width = ceil(e / epsilon) and depth = ceil(ln(1 / delta)).
+    Sketches with the same parameters and seed can be merged.
+    Items must be str, bytes, int, float or tuples of these, which hash the same in every process;
+    add raises TypeError for other types.
+    """
+    width: int
+    depth: int
+    seed: int
+    total: int
+    _table: array.array
+
+    def __init__(self, epsilon: float = 0.001, delta: float = 0.01, seed: int = 0) -> None:
+        if not (0 < epsilon < 1 and 0 < delta < 1):
+            raise ValueError("epsilon and delta must be between 0 and 1")
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.seed = seed
+        self.total = 0
+        self._table = array.array("q", bytes(8 * self.width * self.depth))
+
+    def _positions(self, item) -> List[int]:
+        # Double hashing: row i uses h1 + i * h2, which is as good as depth independent hashes
+        h = _hash64(item, self.seed)
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, item, count: int = 1) -> None:
+        """
+        add(self, item: str | bytes | int | float | tuple, count: int) -> None; count >= 0
+
+        Counts count more occurrences of the item.
+        """
+        table = self._table
+        for position in self._positions(item):
+            table[position] += count
+        self.total += count
+
+    def update(self, data: Iterable) -> None:
+        """
+        update(self, data: Iterable[str | bytes | int | float | tuple]) -> None
+
+        Counts the items of the data, which is consumed as a stream, a chunk of PARALLEL_CHUNK_SIZE items at a time.
+        """
+        iterator = iter(data)
+        for chunk in iter(lambda: Counter(itertools.islice(iterator, PARALLEL_CHUNK_SIZE)), Counter()):
+            for item, count in chunk.items():
+                self.add(item, count)
+
+    def estimate(self, item) -> int:
+        """
+        estimate(self, item: str | bytes | int | float | tuple) -> count: int
+
+        Returns the estimated number of occurrences of the item.
+        """
+        table = self._table
+        return min(table[position] for position in self._positions(item))
+
+    def __getitem__(self, item) -> int:
+        return self.estimate(item)
+
+    def merge(self, other: "CountMinSketch") -> None:
+        """
+        merge(self, other: CountMinSketch) -> None
+
+        Adds the counts of the other sketch, which must have the same parameters and seed.
+        """
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Only sketches with the same parameters and seed can be merged")
+        self._table = array.array("q", map(operator.add, self._table, other._table))
+        self.total += other.total
+
+
+class HeavyHitters:
+    """
+    The most frequent items of a stream, with the Misra-Gries summary of at most 2 * k counters.
+    An estimate is never above the true count, and is below it by at most total / (k + 1),
+    so every item occurring more than total / (k + 1) times is kept.
+    Summaries with the same k can be merged, keeping the same bound for the merged stream.
+    """
+    k: int
+    total: int
+    _counters: Dict
+
+    def __init__(self, k: int = 100) -> None:
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.total = 0
+        self._counters = {}
+
+    def _reduce(self) -> None:
+        # Subtracting the (k + 1)-th largest count takes at least k + 1 times that much from the counters,
+        # which is what bounds the error by total / (k + 1)
+        counters = self._counters
+        delta = heapq.nlargest(self.k + 1, counters.values())[-1]
+        self._counters = {item: count - delta for item, count in counters.items() if count > delta}
+
+    def add(self, item, count: int = 1) -> None:
+        """
+        add(self, item: Hashable, count: int) -> None; count >= 0
+
+        Counts count more occurrences of the item.
+        """
+        counters = self._counters
+        counters[item] = counters.get(item, 0) + count
+        self.total += count
+        if len(counters) > 2 * self.k:
+            self._reduce()
+
+    def update(self, data: Iterable) -> None:
+        """
+        update(self, data: Iterable[Hashable]) -> None
+
+        Counts the items of the data, which is consumed as a stream.
+        """
+        for item in data:
+            self.add(item)
+
+    def estimate(self, item) -> int:
+        """
+        estimate(self, item: Hashable) -> count: int
+
+        Returns the estimated number of occurrences of the item, 0 if it is not kept.
+        """
+        return self._counters.get(item, 0)
+
+    def __getitem__(self, item) -> int:
+        return self.estimate(item)
+
+    def top(self, n: Optional[int] = None) -> List[Tuple]:
+        """
+        top(self, n: Optional[int]) -> heavy_hitters: List[(Hashable, int)]
+
+        Returns the n kept items with the highest estimates, or all of them, with their estimates,
+        from the highest estimate down.
+        """
+        n = min(n if n is not None else self.k, self.k)
+        return heapq.nlargest(n, self._counters.items(), key=operator.itemgetter(1))
+
+    def merge(self, other: "HeavyHitters") -> None:
+        """
+        merge(self, other: HeavyHitters) -> None
+
+        Adds the counters of the other summary, which must have the same k.
+        """
+        if self.k != other.k:
+            raise ValueError("Only summaries with the same k can be merged")
+        counters = self._counters
+        for item, count in other._counters.items():
+            counters[item] = counters.get(item, 0) + count
+        self.total += other.total
+        if len(counters) > self.k:
+            self._reduce()
+
+
+class HyperLogLog:
+    """
+    Estimate of the number of distinct items of a stream in 2**precision one-byte registers.
+    The relative standard error is about 1.04 / sqrt(2**precision), 1.6% with the default precision of 12.
+    Estimators with the same precision and seed can be merged.
+    Items must be str, bytes, int, float or tuples of these, which hash the same in every process;
+    add raises TypeError for other types.
+    """
+    precision: int
+    seed: int
+    _registers: bytearray
+
+    def __init__(self, precision: int = 12, seed: int = 0) -> None:
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.seed = seed
+        self._registers = bytearray(1 << precision)
+
+    def add(self, item) -> None:
+        """
+        add(self, item: str | bytes | int | float | tuple) -> None
+
+        Counts the item if it was not counted yet.
+        """
+        h = _hash64(item, self.seed)
+        precision = self.precision
+        index = h >> (64 - precision)
+        rest = h & ((1 << (64 - precision)) - 1)
+        # Position of the first 1 bit in the remaining 64 - precision bits
+        rank = 64 - precision - rest.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def update(self, data: Iterable) -> None:
+        """
+        update(self, data: Iterable[str | bytes | int | float | tuple]) -> None
+
+        Counts the distinct items of the data, which is consumed as a stream.
+        """
+        for item in data:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return round(self.estimate())
+
+    def estimate(self) -> float:
+        """
+        estimate(self) -> distinct: float
+
+        Returns the estimated number of distinct items, using linear counting for small numbers.
+        """
+        m = len(self._registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        raw = alpha * m * m / sum(2.0 ** -register for register in self._registers)
+        zeros = self._registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return raw
 
+    def merge(self, other: "HyperLogLog") -> None:
+        """
+        merge(self, other: HyperLogLog) -> None
 
-def _sorted_dict_pairs_helper(key_value_pair):
-    (key, value) = key_value_pair
-    return key
+        Adds the items counted by the other estimator, which must have the same precision and seed.
+        """
+        if (self.precision, self.seed) != (other.precision, other.seed):
+            raise ValueError("Only estimators with the same precision and seed can be merged")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+
+def _to_float(value) -> float:
+    """
+    _to_float(value: int | float | Decimal) -> converted: float
+
+    Returns the value as the nearest float.
+    """
+    if isinstance(value, Decimal):
+        if value.order_of_magnitude >= 0:
+            return value.base / 10 ** value.order_of_magnitude
+        return float(value.base * 10 ** -value.order_of_magnitude)
+    return float(value)
+
+
+class RunningStats:
+    """
+    Count, mean, variance, minimum and maximum of a stream in constant memory, in a single pass.
+    By default, values are converted to float and the mean and variance are updated with Welford's algorithm.
+    In exact mode, values are converted to Decimal and their sum and sum of squares are kept exactly,
+    so the mean and variance are only rounded when they are read, to the requested number of significant digits.
+    Statistics of shards of the data can be combined with merge().
+    """
+    exact: bool
+    count: int
+    min: Union[float, Decimal, None]
+    max: Union[float, Decimal, None]
+    _mean: float
+    _m2: float
+    _total: DecimalAccumulator
+    _total_squares: DecimalAccumulator
+
+    def __init__(self, exact: bool = False) -> None:
+        self.exact = exact
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._total = DecimalAccumulator()
+        self._total_squares = DecimalAccumulator()
+
+    def add(self, value: Union[int, float, Decimal]) -> None:
+        """
+        add(self, value: int | float | Decimal) -> None
+
+        Adds the value to the statistics.
+        """
+        if self.exact:
+            value = decimal(value)
+            self._total.add(value)
+            self._total_squares.add(value * value)
+        else:
+            value = _to_float(value)
+            delta = value - self._mean
+            self._mean += delta / (self.count + 1)
+            self._m2 += delta * (value - self._mean)
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def update(self, values: Iterable[Union[int, float, Decimal]]) -> None:
+        """
+        update(self, values: Iterable[int | float | Decimal]) -> None
+
+        Adds every value to the statistics, consuming them as a stream.
+        """
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "RunningStats") -> None:
+        """
+        merge(self, other: RunningStats) -> None
+
+        Adds the statistics of the other values, which must use the same mode, to these ones.
+        """
+        if self.exact != other.exact:
+            raise ValueError("Only statistics in the same mode can be merged")
+        if not other.count:
+            return
+        if self.exact:
+            self._total.merge(other._total)
+            self._total_squares.merge(other._total_squares)
+        else:
+            # Chan et al.'s pairwise update
+            count = self.count + other.count
+            delta = other._mean - self._mean
+            self._mean += delta * other.count / count
+            self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count += other.count
+        self.min = other.min if self.min is None or other.min < self.min else self.min
+        self.max = other.max if self.max is None or other.max > self.max else self.max
+
+    def total(self) -> Decimal:
+        """
+        total(self) -> total: Decimal
+
+        Returns the exact sum of the values. Raises ValueError if not in exact mode.
+        """
+        if not self.exact:
+            raise ValueError("The exact total is only kept in exact mode")
+        return self._total.result()
+
+    def mean(self, precision: int = DEFAULT_PRECISION) -> Union[float, Decimal]:
+        """
+        mean(self, precision: int) -> mean: float | Decimal
+
+        Returns the mean of the values, as a Decimal truncated to precision significant digits in exact mode.
+        Raises ValueError if there are no values.
+        """
+        if not self.count:
+            raise ValueError("The mean of no values is undefined")
+        if self.exact:
+            return self._total.result().divide(Decimal(self.count), precision)
+        return self._mean
+
+    def variance(self, ddof: int = 0, precision: int = DEFAULT_PRECISION) -> Union[float, Decimal]:
+        """
+        variance(self, ddof: int, precision: int) -> variance: float | Decimal
+
+        Returns the sum of the squared deviations from the mean divided by count - ddof,
+        so the population variance for ddof=0 and the sample variance for ddof=1,
+        as a Decimal truncated to precision significant digits in exact mode.
+        Raises ValueError if count - ddof is not positive.
+        """
+        if self.count - ddof <= 0:
+            raise ValueError("The variance needs more than ddof values")
+        if not self.exact:
+            return self._m2 / (self.count - ddof)
+        total = self._total.result()
+        # count * sum of squares - total**2 is count times the sum of the squared deviations, without rounding
+        deviations = Decimal(self.count) * self._total_squares.result() - total * total
+        return deviations.divide(Decimal(self.count * (self.count - ddof)), precision)
+
+    def stdev(self, ddof: int = 0, precision: int = DEFAULT_PRECISION) -> Union[float, Decimal]:
+        """
+        stdev(self, ddof: int, precision: int) -> standard_deviation: float | Decimal
+
+        Returns the square root of variance(ddof), truncated to precision significant digits in exact mode.
+        """
+        if self.exact:
+            # A root r with precision digits has a square with at most 2 * precision digits, so when r <= sqrt(variance)
+            # it is still at most the variance truncated to 2 * precision digits, and the truncated root is exact
+            return self.variance(ddof, 2 * precision).sqrt(precision)
+        return math.sqrt(self.variance(ddof))
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles of a stream of comparable values, such as int, float or Decimal,
+    with the KLL sketch of about 3 * k values.
+    The rank of a returned quantile is off by about 1.7 / k of the count at most with high probability,
+    and the returned quantiles are always values of the stream, so Decimals are returned exactly.
+    Sketches with the same k can be merged.
+    """
+    k: int
+    count: int
+    min: object
+    max: object
+    _levels: List[List]
+    _capacities: List[int]
+    _random: random.Random
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None) -> None:
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._levels = [[]]
+        self._capacities = [k]
+        self._random = random.Random(seed)
+
+    def _update_capacities(self) -> None:
+        # Lower levels get geometrically smaller capacities, down to 2
+        depth = len(self._levels)
+        self._capacities = [max(2, math.ceil(self.k * (2 / 3) ** (depth - 1 - level))) for level in range(depth)]
+
+    def _compress(self) -> None:
+        """
+        _compress(self) -> None
+
+        Compacts every level that is over its capacity: its sorted values are halved,
+        every other one being promoted to the next level with twice the weight, from a random offset.
+        """
+        level = 0
+        while level < len(self._levels):
+            values = self._levels[level]
+            if len(values) >= self._capacities[level]:
+                if level + 1 == len(self._levels):
+                    self._levels.append([])
+                    self._update_capacities()
+                # With an odd number of values, the last one added stays at this level
+                leftover = [values.pop()] if len(values) % 2 else []
+                values.sort()
+                self._levels[level + 1].extend(values[self._random.getrandbits(1)::2])
+                self._levels[level] = leftover
+            level += 1
+
+    def add(self, value) -> None:
+        """
+        add(self, value: int | float | Decimal) -> None
+
+        Adds the value to the sketch.
+        """
+        level0 = self._levels[0]
+        level0.append(value)
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if len(level0) >= self._capacities[0]:
+            self._compress()
+
+    def update(self, values: Iterable) -> None:
+        """
+        update(self, values: Iterable[int | float | Decimal]) -> None
+
+        Adds every value to the sketch, consuming them as a stream.
+        """
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """
+        merge(self, other: QuantileSketch) -> None
+
+        Adds the values summarized by the other sketch, which must have the same k.
+        """
+        if self.k != other.k:
+            raise ValueError("Only sketches with the same k can be merged")
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        self._update_capacities()
+        for values, other_values in zip(self._levels, other._levels):
+            values.extend(other_values)
+        self.count += other.count
+        if other.count:
+            self.min = other.min if self.min is None or other.min < self.min else self.min
+            self.max = other.max if self.max is None or other.max > self.max else self.max
+        self._compress()
+
+    def _weighted(self) -> List[Tuple]:
+        """
+        _weighted(self) -> weighted: List[(value, weight: int)]
+
+        Returns the values kept by the sketch with the number of values each stands for, sorted by value.
+        """
+        weighted = [(value, 1 << level) for level, values in enumerate(self._levels) for value in values]
+        weighted.sort(key=operator.itemgetter(0))
+        return weighted
+
+    def quantiles(self, fractions: Iterable[float]) -> List:
+        """
+        quantiles(self, fractions: Iterable[float]) -> quantiles: List[int | float | Decimal]; 0 <= fraction <= 1
+
+        Returns for each fraction the smallest kept value whose estimated rank reaches fraction * count,
+        and the exact minimum and maximum for the fractions 0 and 1.
+        Raises ValueError if the sketch is empty.
+        """
+        if not self.count:
+            raise ValueError("The quantiles of no values are undefined")
+        weighted = self._weighted()
+        total = sum(weight for _, weight in weighted)
+        cumulative = list(itertools.accumulate(weight for _, weight in weighted))
+        return [self.min if fraction <= 0 else self.max if fraction >= 1 else
+                weighted[min(bisect.bisect_left(cumulative, fraction * total), len(weighted) - 1)][0]
+                for fraction in fractions]
+
+    def quantile(self, fraction: float):
+        """
+        quantile(self, fraction: float) -> quantile: int | float | Decimal; 0 <= fraction <= 1
+
+        Returns the estimated value below which the fraction of the values fall, like quantiles([fraction])[0].
+        """
+        return self.quantiles([fraction])[0]
+
+    def rank(self, value) -> float:
+        """
+        rank(self, value: int | float | Decimal) -> fraction: float
+
+        Returns the estimated fraction of the values that are less than or equal to the value.
+        """
+        weighted = self._weighted()
+        total = sum(weight for _, weight in weighted)
+        return sum(weight for kept, weight in weighted if kept <= value) / total if total else 0.0
+
+
+K = TypeVar("K")
+V = TypeVar("V")
 
 
 def sorted_dict_pairs(data: Dict[K, V]) -> List[Tuple[K, V]]:
@@ -32,5 +742,164 @@ def sorted_dict_pairs(data: Dict[K, V]) -> List[Tuple[K, V]]:
     sorted_dict_pairs(data: Dict[K, V]) -> sorted_key_value_pairs: List[(K, V):
 
     Returns the key-value pairs of the dictionary, sorted in key order.
+    An OrderedHistogram is already in key order, so its pairs are returned without sorting.
+    """
+    if isinstance(data, OrderedHistogram):
+        return data.items()
+    return sorted(data.items(), key=operator.itemgetter(0))
+
+
+def top_k_by_key(data: Dict[K, V], k: int, reverse: bool = False) -> List[Tuple[K, V]]:
+    """
+    top_k_by_key(data: Dict[K, V], k: int, reverse: bool) -> key_value_pairs: List[(K, V)]
+
+    Returns the k key-value pairs with the smallest keys in key order, or with the largest keys from the largest down
+    if reverse, like sorted_dict_pairs(data)[:k] but in O(n log k).
     """
-    return sorted(data.items(), key=_sorted_dict_pairs_helper)
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    return select(k, data.items(), key=operator.itemgetter(0))
+
+
+def top_k_by_value(data: Dict[K, V], k: int) -> List[Tuple[K, V]]:
+    """
+    top_k_by_value(data: Dict[K, V], k: int) -> key_value_pairs: List[(K, V)]
+
+    Returns the k key-value pairs with the largest values, from the largest down, in O(n log k).
+    Pairs with equal values keep the order of the dictionary.
+    """
+    return heapq.nlargest(k, data.items(), key=operator.itemgetter(1))
+
+
+class OrderedHistogram:
+    """
+    A histogram that keeps a sorted list of its keys, updated with bisect when a key is first counted,
+    so that ordered iteration and key ranges need no sort.
+    The keys must be hashable and comparable with each other.
+    """
+    _counts: Dict
+    _keys: List
+
+    def __init__(self, data: Iterable = ()) -> None:
+        self._counts = {}
+        self._keys = []
+        self.update(data)
+
+    def add(self, key, count: int = 1) -> None:
+        """
+        add(self, key: K, count: int) -> None
+
+        Counts count more occurrences of the key.
+        """
+        counts = self._counts
+        if key in counts:
+            counts[key] += count
+        else:
+            counts[key] = count
+            bisect.insort(self._keys, key)
+
+    def update(self, data: Iterable) -> None:
+        """
+        update(self, data: Iterable[K]) -> None
+
+        Counts the items of the data.
+        """
+        counts = self._counts
+        new_keys = []
+        for key, count in Counter(data).items():
+            if key in counts:
+                counts[key] += count
+            else:
+                counts[key] = count
+                new_keys.append(key)
+        self._insert_keys(new_keys)
+
+    def merge(self, other: Dict) -> None:
+        """
+        merge(self, other: Dict[K, int] | OrderedHistogram) -> None
+
+        Adds the counts of the other histogram.
+        """
+        counts = self._counts
+        new_keys = []
+        for key, count in other.items():
+            if key in counts:
+                counts[key] += count
+            else:
+                counts[key] = count
+                new_keys.append(key)
+        self._insert_keys(new_keys)
+
+    def _insert_keys(self, new_keys: List) -> None:
+        # A few keys are inserted one by one, many are merged in with a single sort of the two runs
+        if len(new_keys) < 8:
+            for key in new_keys:
+                bisect.insort(self._keys, key)
+        else:
+            self._keys.extend(new_keys)
+            self._keys.sort()
+
+    def __delitem__(self, key) -> None:
+        del self._counts[key]
+        keys = self._keys
+        del keys[bisect.bisect_left(keys, key)]
+
+    def __getitem__(self, key) -> int:
+        return self._counts[key]
+
+    def get(self, key, default=None):
+        return self._counts.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        return key in self._counts
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def keys(self) -> List:
+        """
+        keys(self) -> keys: List[K]
+
+        Returns the keys in key order.
+        """
+        return list(self._keys)
+
+    def items(self, start=None, stop=None) -> List[Tuple]:
+        """
+        items(self, start: Optional[K], stop: Optional[K]) -> key_value_pairs: List[(K, int)]
+
+        Returns the key-value pairs in key order, only those with start <= key < stop for the bounds given.
+        """
+        keys = self._keys
+        low = 0 if start is None else bisect.bisect_left(keys, start)
+        high = len(keys) if stop is None else bisect.bisect_left(keys, stop)
+        keys = keys[low:high] if low or high < len(keys) else keys
+        return list(zip(keys, map(self._counts.__getitem__, keys)))
+
+    def first(self, n: int) -> List[Tuple]:
+        """
+        first(self, n: int) -> key_value_pairs: List[(K, int)]
+
+        Returns the n key-value pairs with the smallest keys, in key order.
+        """
+        counts = self._counts
+        return [(key, counts[key]) for key in self._keys[:n]]
+
+    def top(self, n: int) -> List[Tuple]:
+        """
+        top(self, n: int) -> key_value_pairs: List[(K, int)]
+
+        Returns the n key-value pairs with the highest counts, from the highest down.
+        """
+        return top_k_by_value(self._counts, n)
+
+    def to_dict(self) -> Dict:
+        """
+        to_dict(self) -> histogram: Dict[K, int]
+
+        Returns the counts as a dictionary in key order.
+        """
+        counts = self._counts
+        return {key: counts[key] for key in self._keys}
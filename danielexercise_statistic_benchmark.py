@@ -0,0 +1,199 @@
+# Benchmark the histograms of danielexercise_statistic
+# Type: Benchmark
+
+import array
+import operator
+import os
+import random
+import statistics
+import tempfile
+import timeit
+import tracemalloc
+from typing import Callable
+from danielexercise_numpy import load_numpy
+from danielexercise_statistic import histogram, parallel_file_histogram, parallel_histogram, CountMinSketch,\
+    HeavyHitters, HyperLogLog, RunningStats, QuantileSketch,\
+    sorted_dict_pairs, top_k_by_key, top_k_by_value, OrderedHistogram
+
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def _dict_get_histogram(data):
+    # The histogram loop before Counter
+    result = {}
+    for x in data:
+        result[x] = result.get(x, 0) + 1
+    return result
+
+
+def histogram_paths(count: int = 1000000, repeat: int = 3) -> None:
+    """
+    histogram_paths(count: int, repeat: int) -> None
+
+    Prints the time of counting ints and strings with the dict.get loop, with histogram,
+    and for an int array with histogram through NumPy.
+    """
+    rng = random.Random(1120)
+    ints = [rng.randint(0, 1000) for _ in range(count)]
+    strs = ["key%d" % x for x in ints]
+    has_numpy = load_numpy() is not None
+    print("%d items" % count)
+    print("kind  dict_get_s  counter_s  numpy_s")
+    for kind, given in (("int", ints), ("str", strs)):
+        numpy = float("nan")
+        if kind == "int" and has_numpy:
+            packed = array.array("q", ints)
+            numpy = _best(lambda: histogram(packed), repeat)
+        print("%-4s %11.3f %10.3f %8.3f" % (kind, _best(lambda: _dict_get_histogram(given), repeat),
+                                            _best(lambda: histogram(given), repeat), numpy))
+
+
+def parallel_throughput(lines: int = 2000000, repeat: int = 3) -> None:
+    """
+    parallel_throughput(lines: int, repeat: int) -> None
+
+    Prints the throughput of parallel_file_histogram over a generated log file
+    and of parallel_histogram over a generator, for 1, 2, 4, ... workers up to the number of cores.
+    """
+    rng = random.Random(1120)
+    cores = os.cpu_count() or 1
+    handle, path = tempfile.mkstemp()
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.writelines(b"key%d value\n" % rng.randint(0, 10000) for _ in range(lines))
+        megabytes = os.path.getsize(path) / 2**20
+        print("cores: %d, file: %.1f MiB" % (cores, megabytes))
+        print("workers  file_MiB_per_s  generator_items_per_s")
+        workers = 1
+        while True:
+            file_seconds = _best(lambda: parallel_file_histogram(path, workers, range_size=1 << 22), repeat)
+            generator_seconds = _best(lambda: parallel_histogram((x & 1023 for x in range(lines)), workers), repeat)
+            print("%7d %15.1f %22.0f" % (workers, megabytes / file_seconds, lines / generator_seconds))
+            if workers >= cores:
+                break
+            workers = min(workers * 2, cores)
+    finally:
+        os.remove(path)
+
+
+def sketches(count: int = 300000, distinct: int = 100000) -> None:
+    """
+    sketches(count: int, distinct: int) -> None
+
+    Prints the time and the peak memory of counting a high-cardinality stream of strings
+    with histogram and with each sketch.
+    """
+    rng = random.Random(1120)
+    given = ["user%d" % rng.randrange(distinct) for _ in range(count)]
+
+    def run(factory):
+        def result():
+            sketch = factory()
+            sketch.update(given)
+            return sketch
+        return result
+
+    print("%d items, %d distinct" % (count, distinct))
+    print("method          seconds  peak_MiB")
+    for name, func in (("histogram", lambda: histogram(given)),
+                       ("count_min", run(lambda: CountMinSketch(0.001, 0.01))),
+                       ("heavy_hitters", run(lambda: HeavyHitters(100))),
+                       ("hyperloglog", run(HyperLogLog))):
+        seconds = _best(func, 1)
+        # tracemalloc slows allocations down, so the peak is measured on a separate run
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("%-14s %8.3f %9.2f" % (name, seconds, peak / 2**20))
+
+
+def streaming_stats(count: int = 300000) -> None:
+    """
+    streaming_stats(count: int) -> None
+
+    Prints the time and the peak memory of the mean, variance and quartiles of a stream of floats
+    computed from a stored list with statistics and in one pass with RunningStats and QuantileSketch.
+    """
+    rng = random.Random(1120)
+    given = [rng.gauss(0, 1) for _ in range(count)]
+
+    def stored():
+        data = list(iter(given))
+        return statistics.fmean(data), statistics.pvariance(data), statistics.quantiles(data)
+
+    def one_pass():
+        stats = RunningStats()
+        sketch = QuantileSketch()
+        for value in given:
+            stats.add(value)
+            sketch.add(value)
+        return stats.mean(), stats.variance(), sketch.quantiles((0.25, 0.5, 0.75))
+
+    print("%d floats" % count)
+    print("method      seconds  peak_MiB")
+    for name, func in (("statistics", stored), ("one_pass", one_pass)):
+        seconds = _best(func, 1)
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("%-10s %8.3f %9.2f" % (name, seconds, peak / 2**20))
+
+
+def ordered_views(distinct: int = 100000, updates: int = 100, k: int = 20, repeat: int = 3) -> None:
+    """
+    ordered_views(distinct: int, updates: int, k: int, repeat: int) -> None
+
+    Prints the time of reading the first k keys and the k highest counts of a histogram with many keys
+    by sorting with sorted_dict_pairs and with top_k_by_key, top_k_by_value and an OrderedHistogram,
+    then of a slowly changing histogram read in key order after each of a few updates.
+    """
+    rng = random.Random(1120)
+    given = histogram(rng.randrange(10 * distinct) for _ in range(distinct))
+    ordered = OrderedHistogram()
+    ordered.merge(given)
+    print("%d keys, first %d" % (len(given), k))
+    print("method           seconds")
+    for name, func in (("sorted_by_key", lambda: sorted_dict_pairs(given)[:k]),
+                       ("top_k_by_key", lambda: top_k_by_key(given, k)),
+                       ("ordered_first", lambda: ordered.first(k)),
+                       ("sorted_by_value", lambda: sorted(given.items(), key=operator.itemgetter(1))[-k:]),
+                       ("top_k_by_value", lambda: top_k_by_value(given, k))):
+        print("%-15s %8.4f" % (name, _best(func, repeat)))
+    new_keys = [rng.randrange(10 * distinct) for _ in range(updates)]
+
+    def resort():
+        data = dict(given)
+        for key in new_keys:
+            data[key] = data.get(key, 0) + 1
+            sorted_dict_pairs(data)
+
+    def maintained():
+        data = OrderedHistogram()
+        data.merge(given)
+        for key in new_keys:
+            data.add(key)
+            data.items()
+
+    print("%d updates, each followed by an ordered read" % updates)
+    print("resort          %8.3f" % _best(resort, repeat))
+    print("ordered         %8.3f" % _best(maintained, repeat))
+
+
+def main() -> None:
+    histogram_paths()
+    print()
+    parallel_throughput()
+    print()
+    sketches()
+    print()
+    streaming_stats()
+    print()
+    ordered_views()
+
+
+if __name__ == "__main__":
+    main()
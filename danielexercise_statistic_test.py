@@ -1,8 +1,26 @@
-# Test the histogram, and sorted_dict_pairs functions in danielexercise_statistic
+# Test the histogram functions, the sketches and the ordered views in danielexercise_statistic
 # Type: Unit Tests
 
+import array
+import os
+import pickle
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
 import unittest
-from danielexercise_statistic import histogram, sorted_dict_pairs
+from collections import Counter
+from fractions import Fraction
+from danielexercise_numpy import load_numpy
+from danielexercise_statistic import histogram, merge_histograms, parallel_histogram, parallel_file_histogram,\
+    CountMinSketch, HeavyHitters, HyperLogLog, RunningStats, QuantileSketch,\
+    sorted_dict_pairs, top_k_by_key, top_k_by_value, OrderedHistogram, _hash64, _item_bytes
+from danielexercise_decimal import Decimal
+
+
+def first_field(line: bytes) -> bytes:
+    return line.split(b" ")[0]
 
 
 class TestStatisticMethods(unittest.TestCase):
@@ -56,6 +74,277 @@ class TestStatisticMethods(unittest.TestCase):
         hist_actual = histogram(given)
         self.assertEqual(hist_expected, hist_actual)
 
+    def test_histogram_stream_and_merge(self):
+        rng = random.Random(1120)
+        given = [rng.randint(-20, 20) for _ in range(1000)]
+        expected = dict(Counter(given))
+        self.assertEqual(expected, histogram(x for x in given))
+        self.assertEqual(expected, merge_histograms(histogram(given[i::3]) for i in range(3)))
+        self.assertEqual(expected, histogram(array.array("q", given)))
+        self.assertEqual({}, histogram(array.array("q")))
+        self.assertEqual(expected, parallel_histogram((x for x in given), workers=2, chunk_size=77))
+        self.assertEqual(expected, parallel_histogram(given, workers=1))
+
+    @unittest.skipUnless(load_numpy(), "NumPy is not installed")
+    def test_histogram_numpy(self):
+        numpy = load_numpy()
+        for given in ([3, 1, 3, -5, 10**12], [0, 1, 1, 2, 2, 2]):
+            actual = histogram(numpy.array(given))
+            self.assertEqual(dict(Counter(given)), actual)
+            self.assertEqual([int] * len(actual), [type(x) for x in actual])
+
+    def test_parallel_file_histogram(self):
+        rng = random.Random(1120)
+        given = [b"key%d value%d" % (rng.randint(0, 30), i) for i in range(2000)]
+        handle, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.write(b"\n".join(line + b"\r" * (i % 2) for i, line in enumerate(given)))
+            expected = dict(Counter(line.split(b" ")[0] for line in given))
+            for workers, range_size in ((1, 7), (1, 100), (2, 4000), (2, 1 << 20)):
+                self.assertEqual(expected, parallel_file_histogram(path, workers, first_field, range_size))
+            self.assertEqual(dict(Counter(given)), parallel_file_histogram(path, 1, range_size=333))
+        finally:
+            os.remove(path)
+
+
+def zipf_data(rng: random.Random, count: int, distinct: int) -> list:
+    # Item i occurs about proportionally to 1 / i
+    weights = [1 / i for i in range(1, distinct + 1)]
+    return ["item%d" % i for i in rng.choices(range(distinct), weights, k=count)]
+
+
+class TestSketchMethods(unittest.TestCase):
+    def test_count_min_bounds(self):
+        given = zipf_data(random.Random(1120), 20000, 2000)
+        expected = Counter(given)
+        epsilon = 0.005
+        sketch = CountMinSketch(epsilon, 0.01)
+        sketch.update(given)
+        self.assertEqual(len(given), sketch.total)
+        over = 0
+        for item, count in expected.items():
+            self.assertGreaterEqual(sketch[item], count)
+            over += sketch[item] > count + epsilon * len(given)
+        self.assertLessEqual(over, 0.01 * len(expected))
+        self.assertEqual(0, CountMinSketch(epsilon, 0.01).estimate("absent"))
+
+    def test_count_min_merge(self):
+        given = zipf_data(random.Random(1120), 5000, 500)
+        whole = CountMinSketch(0.01, 0.05)
+        whole.update(given)
+        shards = [CountMinSketch(0.01, 0.05) for _ in range(3)]
+        for i, shard in enumerate(shards):
+            shard.update(given[i::3])
+        merged = pickle.loads(pickle.dumps(shards[0]))
+        merged.merge(shards[1])
+        merged.merge(shards[2])
+        self.assertEqual([whole[item] for item in set(given)], [merged[item] for item in set(given)])
+        with self.assertRaises(ValueError):
+            merged.merge(CountMinSketch(0.01, 0.05, seed=1))
+
+    def test_heavy_hitters_bounds(self):
+        rng = random.Random(1120)
+        given = zipf_data(rng, 20000, 5000)
+        expected = Counter(given)
+        k = 50
+        shards = [HeavyHitters(k) for _ in range(4)]
+        for i, shard in enumerate(shards):
+            shard.update(given[i::4])
+        merged = shards[0]
+        for shard in shards[1:]:
+            merged.merge(shard)
+        bound = len(given) / (k + 1)
+        for summary in (shards[1], merged):
+            for item, count in expected.items():
+                self.assertLessEqual(summary[item], count)
+                if summary is merged:
+                    self.assertGreaterEqual(summary[item], count - bound)
+        self.assertEqual(len(given), merged.total)
+        self.assertLessEqual(len(merged.top()), k)
+        for item, count in expected.most_common():
+            if count <= bound:
+                break
+            self.assertIn(item, dict(merged.top()))
+        self.assertEqual("item0", merged.top(1)[0][0])
+
+    def test_hyperloglog_error(self):
+        for distinct in (10, 1000, 50000):
+            estimator = HyperLogLog(12)
+            estimator.update(range(distinct))
+            estimator.update(range(distinct))
+            self.assertLess(abs(estimator.estimate() - distinct), max(1, 3 * 0.0163 * distinct))
+        shards = [HyperLogLog(10) for _ in range(3)]
+        for i, shard in enumerate(shards):
+            shard.update(range(i * 1000, (i + 2) * 1000))
+        whole = HyperLogLog(10)
+        whole.update(range(4000))
+        for shard in shards[1:]:
+            shards[0].merge(shard)
+        self.assertEqual(whole.estimate(), shards[0].estimate())
+        with self.assertRaises(ValueError):
+            whole.merge(HyperLogLog(11))
+
+    def test_sketch_keys(self):
+        given = ["ab", b"ab", 1, 1.0, -0.0, ("ab", (1, 2.5)), frozenset({"ab", "cd"})]
+        code = ("from danielexercise_statistic import _hash64; "
+                "print([_hash64(item, 7) for item in %r[:-1]])" % given)
+        outputs = {subprocess.run([sys.executable, "-c", code], env=dict(os.environ, PYTHONHASHSEED=seed),
+                                  capture_output=True, text=True, check=True).stdout for seed in ("1", "2")}
+        self.assertEqual({"%r\n" % [_hash64(item, 7) for item in given[:-1]]}, outputs)
+        self.assertEqual(len(given) - 1, len(set(map(_item_bytes, given[:-1]))))
+        self.assertEqual(_item_bytes(0.0), _item_bytes(-0.0))
+        self.assertNotEqual(_item_bytes(("a", ("b",))), _item_bytes(("a", "b")))
+        for item in (given[-1], None, ("ab", object())):
+            with self.assertRaises(TypeError):
+                CountMinSketch(0.01, 0.05).add(item)
+            with self.assertRaises(TypeError):
+                HyperLogLog().add(item)
+
+
+def to_fraction(value):
+    return Fraction(value.base) / Fraction(10) ** value.order_of_magnitude
+
+
+class TestStreamingStatisticMethods(unittest.TestCase):
+    def test_running_stats(self):
+        rng = random.Random(1120)
+        given = [rng.gauss(100, 15) for _ in range(5000)]
+        actual = RunningStats()
+        actual.update(given)
+        self.assertEqual(len(given), actual.count)
+        self.assertAlmostEqual(statistics.fmean(given), actual.mean(), 9)
+        self.assertAlmostEqual(statistics.pvariance(given), actual.variance(), 7)
+        self.assertAlmostEqual(statistics.stdev(given), actual.stdev(1), 9)
+        self.assertEqual((min(given), max(given)), (actual.min, actual.max))
+        merged = RunningStats()
+        shard = RunningStats()
+        merged.update(given[:1234])
+        shard.update(given[1234:])
+        merged.merge(shard)
+        merged.merge(RunningStats())
+        self.assertAlmostEqual(actual.mean(), merged.mean(), 9)
+        self.assertAlmostEqual(actual.variance(), merged.variance(), 7)
+        self.assertEqual((actual.min, actual.max), (merged.min, merged.max))
+        actual = RunningStats()
+        actual.update([1, 2.5, Decimal(-15, 1)])
+        self.assertAlmostEqual(2 / 3, actual.mean(), 15)
+        self.assertEqual((-1.5, 2.5), (actual.min, actual.max))
+        with self.assertRaises(ValueError):
+            RunningStats().mean()
+        with self.assertRaises(ValueError):
+            actual.variance(3)
+
+    def test_running_stats_exact(self):
+        rng = random.Random(1120)
+        given = [Decimal(rng.randint(-10**9, 10**9), rng.randint(0, 6)) for _ in range(1000)]
+        fractions = list(map(to_fraction, given))
+        actual = RunningStats(exact=True)
+        actual.update(given[:500])
+        shard = RunningStats(exact=True)
+        shard.update(given[500:])
+        actual.merge(shard)
+        self.assertEqual(sum(fractions), to_fraction(actual.total()))
+        for expected, value in ((statistics.mean(fractions), actual.mean(40)),
+                                (statistics.variance(fractions), actual.variance(1, 40))):
+            self.assertLess(abs(to_fraction(value) - expected), abs(expected) / 10**39)
+        self.assertEqual((min(given), max(given)), (actual.min, actual.max))
+        actual = RunningStats(exact=True)
+        actual.update([1, 2, 4])
+        self.assertEqual(Decimal(7, 0), actual.total())
+        self.assertLess(abs(to_fraction(actual.variance(0, 20)) - Fraction(14, 9)), Fraction(1, 10**19))
+        with self.assertRaises(ValueError):
+            actual.merge(RunningStats())
+        with self.assertRaises(ValueError):
+            RunningStats().total()
+
+    def test_running_stats_exact_stdev(self):
+        actual = RunningStats(exact=True)
+        actual.update([Decimal(0), Decimal(2468, 3)])
+        # The variance 1.522756 has more than precision + 2 digits, and its root is exactly 1.234
+        self.assertEqual(Decimal(1234, 3), actual.stdev(0, 4))
+        self.assertEqual(Decimal(123, 2), actual.stdev(0, 3))
+        self.assertEqual(Decimal(174513, 5), actual.stdev(1, 6))
+        rng = random.Random(1120)
+        actual = RunningStats(exact=True)
+        actual.update(Decimal(rng.randint(-10**6, 10**6), 3) for _ in range(100))
+        for ddof in (0, 1):
+            for precision in (1, 5, 12):
+                root = to_fraction(actual.stdev(ddof, precision))
+                ulp = Fraction(10) ** (len(str(root.numerator // root.denominator)) - precision)
+                variance = to_fraction(actual.variance(ddof, 60))
+                self.assertLessEqual(root ** 2, variance)
+                self.assertGreater((root + ulp) ** 2, variance)
+
+    def test_quantile_sketch(self):
+        rng = random.Random(1120)
+        count = 50000
+        given = list(range(count))
+        rng.shuffle(given)
+        whole = QuantileSketch(200, seed=1)
+        whole.update(given)
+        merged = QuantileSketch(200, seed=2)
+        for start in range(0, count, 10000):
+            shard = QuantileSketch(200, seed=start)
+            shard.update(given[start:start + 10000])
+            merged.merge(shard)
+        for sketch in (whole, merged):
+            self.assertEqual(count, sketch.count)
+            self.assertLess(sum(map(len, sketch._levels)), 3 * 200)
+            fractions = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+            for fraction, actual in zip(fractions, sketch.quantiles(fractions)):
+                self.assertLess(abs(actual / count - fraction), 0.02)
+            self.assertEqual([0, count - 1], sketch.quantiles([0, 1]))
+            self.assertLess(abs(sketch.rank(count // 4) - 0.25), 0.02)
+        decimals = QuantileSketch()
+        decimals.update(Decimal(x, 2) for x in range(101))
+        self.assertEqual(Decimal(50, 2), decimals.quantile(0.5))
+        with self.assertRaises(ValueError):
+            QuantileSketch().quantile(0.5)
+
+
+class TestOrderedViewMethods(unittest.TestCase):
+    def test_top_k(self):
+        rng = random.Random(1120)
+        given = histogram(rng.randrange(1000) for _ in range(5000))
+        expected = sorted_dict_pairs(given)
+        self.assertEqual(expected[:10], top_k_by_key(given, 10))
+        self.assertEqual(expected[::-1][:10], top_k_by_key(given, 10, reverse=True))
+        self.assertEqual(expected, top_k_by_key(given, len(given) + 1))
+        by_value = top_k_by_value(given, 10)
+        self.assertEqual(sorted(given.values(), reverse=True)[:10], [value for _, value in by_value])
+        self.assertTrue(all(given[key] == value for key, value in by_value))
+        self.assertEqual([("b", 2), ("a", 2)], top_k_by_value({"b": 2, "c": 1, "a": 2}, 2))
+        self.assertEqual([], top_k_by_value(given, 0))
+
+    def test_ordered_histogram(self):
+        rng = random.Random(1120)
+        given = [rng.randrange(-500, 500) for _ in range(3000)]
+        actual = OrderedHistogram(given[:1000])
+        for value in given[1000:2000]:
+            actual.add(value)
+        actual.merge(histogram(given[2000:2500]))
+        actual.merge(OrderedHistogram(given[2500:]))
+        expected = histogram(given)
+        self.assertEqual(sorted_dict_pairs(expected), actual.items())
+        self.assertEqual(sorted_dict_pairs(expected), sorted_dict_pairs(actual))
+        self.assertEqual(sorted(expected), list(actual))
+        self.assertEqual(len(expected), len(actual))
+        self.assertEqual([(key, value) for key, value in sorted_dict_pairs(expected) if -10 <= key < 10],
+                         actual.items(-10, 10))
+        self.assertEqual(sorted_dict_pairs(expected)[:5], actual.first(5))
+        self.assertEqual(top_k_by_value(expected, 5)[0][1], actual.top(5)[0][1])
+        key = actual.keys()[3]
+        del actual[key]
+        self.assertNotIn(key, actual)
+        self.assertNotIn(key, actual.keys())
+        self.assertEqual(0, actual.get(key, 0))
+        self.assertEqual(len(expected) - 1, len(actual.to_dict()))
+        words = OrderedHistogram("les saucisses et saucissons".split())
+        words.add("les", 2)
+        self.assertEqual({"et": 1, "les": 3, "saucisses": 1, "saucissons": 1}, words.to_dict())
+        self.assertEqual(["et", "les", "saucisses", "saucissons"], words.keys())
+
 
 if __name__ == "__main__":
     unittest.main()